@@ -36,6 +36,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         global WALL, SUPPORT, TURRET, SCOUT, DEMOLISHER, INTERCEPTOR, MP, SP, REFUND_THRESHOLD_WALL, REFUND_THRESHOLD_TURRET
         global EDGE_BLOCK_LOCATIONS_LEFT, EDGE_BLOCK_LOCATIONS_RIGHT
         global BLOCK_EDGE_ENEMY_MP_THRESHOLD, DEMOLISHER_ENEMY_EDGE_STRENGTH_THRESHOLD, UPGRADE_EDGE_WALL_THRESHOLD
+        global ATTACK_MIN_SCOUTS, ATTACK_PLAN_DISCOUNT, ATTACK_PLAN_HORIZON, ATTACK_PLAN_MAX_CHOICES
         global ENEMY_EDGE_DEFENSE_LOCATIONS_LEFT, ENEMY_EDGE_DEFENSE_LOCATIONS_RIGHT 
         global DEFENSE_INTERCEPTOR_LOCATION_LEFT, DEFENSE_INTERCEPTOR_LOCATION_RIGHT
         WALL = config["unitInformation"][0]["shorthand"]
@@ -72,6 +73,14 @@ class AlgoStrategy(gamelib.AlgoCore):
         BLOCK_EDGE_ENEMY_MP_THRESHOLD = 12
         UPGRADE_EDGE_WALL_THRESHOLD = 15
 
+        # attack waves are planned over the next turns, a wave smaller than this is worth nothing
+        ATTACK_MIN_SCOUTS = 17
+        ATTACK_PLAN_DISCOUNT = 0.8
+        ATTACK_PLAN_HORIZON = 6
+        ATTACK_PLAN_MAX_CHOICES = 150000
+        self.resource_planner = gamelib.ResourcePlanner(config)
+        self.support_optimizer = gamelib.SupportOptimizer(config)
+
         # Important characteristics of a game state, will be parsed in self.parse_game_state()
         self.my_left_edge_blocked = True
         self.my_right_edge_blocked = True
@@ -87,6 +96,15 @@ class AlgoStrategy(gamelib.AlgoCore):
 
         # enemy deployment insights
         self.batch_count_history = [0, 0, 0]
+        self.ledger = gamelib.DamageLedger(config)
+        self.opponent_model = gamelib.OpponentModel(config)
+
+        # the first turns are replayed from disk when the config, this file and gamelib are unchanged
+        self.opening_book = gamelib.OpeningBook(config, {
+            "build_order": self.build_order,
+            "strategy": gamelib.file_digest(__file__),
+            "gamelib": gamelib.gamelib_digest(),
+        })
 
 
     def on_turn(self, turn_state):
@@ -97,12 +115,40 @@ class AlgoStrategy(gamelib.AlgoCore):
         unit deployments, and transmitting your intended deployments to the
         game engine.
         """
-        game_state = gamelib.GameState(self.config, turn_state)
-        self.starter_strategy(game_state)
+        game_state = self.make_game_state(turn_state)
+        if self.opening_book.covers(game_state.turn_number):
+            self.play_from_opening_book(game_state, turn_state)
+        else:
+            self.starter_strategy(game_state)
 
         game_state.submit_turn()
 
 
+    def play_from_opening_book(self, game_state, turn_state):
+        digest = gamelib.board_digest(turn_state, [self.get_strategy_state(), self.ledger.damaged_last_turn(), self.opponent_model.history])
+        entry = self.opening_book.lookup(digest)
+        if entry is not None:
+            for name, value in self.opening_book.apply(entry, game_state).items():
+                setattr(self, name, value)
+        else:
+            random_state = random.getstate()
+            self.starter_strategy(game_state)
+            # a turn that drew a random number would replay the same draw every game, so it is computed live every time
+            if random.getstate() == random_state:
+                self.opening_book.record(digest, game_state, self.get_strategy_state())
+
+
+    def get_strategy_state(self):
+        """
+        Everything starter_strategy reads from or writes to self, so a stored turn can be replayed exactly
+        """
+        return {name: getattr(self, name) for name in [
+            "my_left_edge_blocked", "my_right_edge_blocked", "enemy_left_edge_blocked", "enemy_right_edge_blocked",
+            "enemy_left_edge_strength", "enemy_right_edge_strength", "my_MP", "enemy_MP",
+            "turn_strategy", "min_sp_to_save", "batch_count_history",
+        ]}
+
+
     def starter_strategy(self, game_state):
         self.parse_game_state(game_state)
         self.build_defences(game_state)
@@ -221,8 +267,9 @@ class AlgoStrategy(gamelib.AlgoCore):
                 and not self.enemy_left_edge_blocked and not self.my_right_edge_blocked and not self.enemy_right_edge_blocked:
             # situation where both edges are open and enemy is likely to ping scouts
             # do not spawn two groups of interceptors
-            # randomly choose one edge to close
-            if random.randint(0, 1) == 0:
+            # close the edge the enemy is most likely to attack, randomly if there is no telling
+            left_threat, right_threat = self.predict_enemy_edge_threats(game_state)
+            if left_threat > right_threat or (left_threat == right_threat and random.randint(0, 1) == 0):
                 self.block_left_edge(game_state)
             else:
                 self.block_right_edge(game_state)
@@ -237,6 +284,21 @@ class AlgoStrategy(gamelib.AlgoCore):
             if self.enemy_MP < BLOCK_EDGE_ENEMY_MP_THRESHOLD or self.turn_strategy == "attack_left":
                 self.block_right_edge(game_state)
 
+    def predict_enemy_edge_threats(self, game_state):
+        """
+        Chance that the enemy's next scout or demolisher attack ends up breaching on our left and right edges
+        """
+        left_threat = 0
+        right_threat = 0
+        for prediction in self.opponent_model.predict(game_state, 3, [3, 4]):
+            if not prediction["breach"]:
+                continue
+            if prediction["path"][-1][0] < game_state.HALF_ARENA:
+                left_threat += prediction["probability"]
+            else:
+                right_threat += prediction["probability"]
+        return left_threat, right_threat
+
     def block_left_edge(self, game_state):
         for location in EDGE_BLOCK_LOCATIONS_LEFT:
             game_state.attempt_spawn(WALL, location)
@@ -266,16 +328,26 @@ class AlgoStrategy(gamelib.AlgoCore):
                     locations.append([x, y])
         return locations
 
+    def non_edge_friendly_locations(self, game_state):
+        """
+        The locations on our half that are not on our edges, where structures can go
+        without blocking the locations we spawn our own units from
+        """
+        friendly_edges = game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_LEFT) + game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_RIGHT)
+        return [location for location in self.enumerate_friendly_side_locations(game_state) if location not in friendly_edges]
+
 
     def refund_low_health_structures(self, game_state):
         for location in self.enumerate_friendly_side_locations(game_state):
             structure = game_state.contains_stationary_unit(location)
             if structure:
+                # assume the structure takes as much damage this turn as it did last turn
+                health = structure.health - self.ledger.damage_last_turn(location)
                 if structure.unit_type == TURRET:
-                    if structure.health / structure.max_health < REFUND_THRESHOLD_TURRET:
+                    if health / structure.max_health < REFUND_THRESHOLD_TURRET:
                         game_state.attempt_remove(location)
                 elif structure.unit_type == WALL:
-                    if structure.health / structure.max_health < REFUND_THRESHOLD_WALL:
+                    if health / structure.max_health < REFUND_THRESHOLD_WALL:
                         game_state.attempt_remove(location)
 
 
@@ -314,13 +386,15 @@ class AlgoStrategy(gamelib.AlgoCore):
                 if self.should_use_wall_on_edge():
                     self.block_left_edge(game_state)
                 else:
-                    self.spawn_interceptor(game_state, DEFENSE_INTERCEPTOR_LOCATION_LEFT, self.choose_number_of_interceptor_based_on_enemy_MP())
+                    location = self.choose_interceptor_location(game_state, DEFENSE_INTERCEPTOR_LOCATION_LEFT)
+                    self.spawn_interceptor(game_state, location, self.choose_number_of_interceptor_based_on_enemy_MP())
             if not self.enemy_right_edge_blocked and not self.my_right_edge_blocked:
                 # enemy has high MP and is likely attacking on the right
                 if self.should_use_wall_on_edge():
                     self.block_right_edge(game_state)
                 else:
-                    self.spawn_interceptor(game_state, DEFENSE_INTERCEPTOR_LOCATION_RIGHT, self.choose_number_of_interceptor_based_on_enemy_MP())
+                    location = self.choose_interceptor_location(game_state, DEFENSE_INTERCEPTOR_LOCATION_RIGHT)
+                    self.spawn_interceptor(game_state, location, self.choose_number_of_interceptor_based_on_enemy_MP())
         elif self.turn_strategy == "attack_left":
             if self.is_enemy_left_edge_misdirecting(game_state) and not self.enemy_left_edge_blocked:
                 self.ping_one_batch(game_state, [23, 9])
@@ -341,6 +415,25 @@ class AlgoStrategy(gamelib.AlgoCore):
                 first_group_size = self.choose_number_of_scouts_in_first_group_based_on_enemy_edge_strength(self.enemy_right_edge_strength)
                 self.ping_scouts(game_state, 4, 1, first_group_size, self.my_MP - first_group_size)
 
+    def choose_interceptor_location(self, game_state, default_location):
+        """
+        Edge location on the same side as default_location whose interceptors have the enemy's predicted attacks on that side in range the longest
+        """
+        left = default_location[0] < game_state.HALF_ARENA
+        waves = []
+        for prediction in self.opponent_model.predict(game_state, 3, [3, 4]):
+            if prediction["breach"] and (prediction["path"][-1][0] < game_state.HALF_ARENA) == left:
+                unit_type = self.config["unitInformation"][prediction["unit_type"]]["shorthand"]
+                waves.append([prediction["path"], unit_type, prediction["probability"]])
+        if not waves:
+            return default_location
+        edge = game_state.game_map.BOTTOM_LEFT if left else game_state.game_map.BOTTOM_RIGHT
+        spawns = [location for location in game_state.game_map.get_edge_locations(edge) if not game_state.contains_stationary_unit(location)]
+        best = gamelib.InterceptionPlanner(game_state, INTERCEPTOR).best_spawns(waves, spawns)
+        if not best or best[0]["score"] <= 0:
+            return default_location
+        return best[0]["location"]
+
     def ping_one_batch(self, game_state, location):
         game_state.attempt_spawn(SCOUT, location, 1000)
 
@@ -379,7 +472,7 @@ class AlgoStrategy(gamelib.AlgoCore):
 
     def evaluate_next_turn_strategy(self, game_state):
         self.my_MP = game_state.get_resource(MP, 0)
-        if self.my_MP < 17:
+        if not self.should_attack_next_turn(game_state):
             self.turn_strategy = "defend"
         else:
             if self.compute_enemy_left_edge_defense_strength(game_state) > self.compute_enemy_right_edge_defense_strength(game_state):
@@ -390,9 +483,45 @@ class AlgoStrategy(gamelib.AlgoCore):
                 self.turn_strategy = "attack_left"
                 for location in EDGE_BLOCK_LOCATIONS_LEFT:
                     game_state.attempt_remove(location)
+            self.build_attack_supports(game_state)
     
+    def build_attack_supports(self, game_state):
+        """
+        Supports giving the most shield per SP to next turn's scouts, planned for the side we now attack from
+        """
+        location = [23, 9] if self.turn_strategy == "attack_left" else [4, 9]
+        if game_state.contains_stationary_unit(location):
+            return
+        path = game_state.find_path_to_edge(location)
+        if not path:
+            return
+        # keep the edge block locations free for walls
+        reserved = EDGE_BLOCK_LOCATIONS_LEFT + EDGE_BLOCK_LOCATIONS_RIGHT
+        candidates = [location for location in self.non_edge_friendly_locations(game_state) if location not in reserved]
+        plan = self.support_optimizer.plan(game_state, path, game_state.get_resource(SP) - self.min_sp_to_save, candidates)
+        for job in plan["jobs"]:
+            if job["type"] == "spawn":
+                game_state.attempt_spawn(SUPPORT, job["location"])
+            else:
+                game_state.attempt_upgrade(job["location"])
+
+    def should_attack_next_turn(self, game_state):
+        """
+        Plans attack waves from the MP we will have next turn, and attacks if the plan sends one right away
+        """
+        next_MP = self.resource_planner.next_mp(game_state.turn_number, self.my_MP)
+        waves, _ = self.resource_planner.plan_attacks(
+            game_state.turn_number + 1, next_MP, lambda units: units - ATTACK_MIN_SCOUTS + 1,
+            horizon=ATTACK_PLAN_HORIZON, max_choices=ATTACK_PLAN_MAX_CHOICES, min_units=ATTACK_MIN_SCOUTS, discount=ATTACK_PLAN_DISCOUNT)
+        if not waves:
+            # no horizon could be planned, fall back to attacking as soon as a wave is big enough
+            return next_MP >= ATTACK_MIN_SCOUTS
+        return waves[0] > 0
+
     def on_action_frame(self, turn_string):
         state = json.loads(turn_string)
+        self.ledger.consume(state)
+        self.opponent_model.consume(state)
         if state["turnInfo"][0] == 1 and state["turnInfo"][2] == 0:
             spawns = state["events"]["spawn"]
             locations = set()
@@ -0,0 +1,140 @@
+from .board import HALF_ARENA
+from .navigation import ShortestPathFinder
+from .survival import SurvivalEstimator
+
+
+class DemolisherAnalyzer:
+    """Works out what demolishers sent along a line of cheap structures do, for many proposed lines at once.
+
+    A line of structures in front of a demolisher spawn keeps the demolishers walking along it, at a
+    distance where they can hit the enemy's front rows from out of reach of most turrets. For each
+    proposed line and spawn, the line is put on the map just long enough to find the path the
+    demolishers take behind it, and the walk is then played out by a SurvivalEstimator: the frames
+    spent on each tile, the enemy structures in range on the way and the damage done to each.
+
+    The line is placed in the order given until the SP budget runs out, the way attempt_spawn would
+    build it, so a line that cannot be afforded in full is analysed with the gap it would have. The
+    analysis also tells where the path first crosses the line's row, and whether that is through the
+    line rather than around its end. Locations already holding a structure are kept and cost nothing.
+    The line is placed in a transaction of the GameState that is rolled back, see GameState.begin, so
+    the map and the paths it has cached are left as they were. The estimates of every line share the
+    estimator's per-tile lookups, which is what makes scanning many lines cheap.
+
+    Attributes :
+        * game_state (:obj: GameState): The board the lines are proposed on
+        * unit_type (str): The type of the attacking units, DEMOLISHER by default
+        * line_type (str): The type of the line's structures, the cheapest structure by default
+
+    """
+    def __init__(self, game_state, unit_type=None, line_type=None, estimator=None):
+        """Sets up the analyzer
+
+        Args:
+            game_state: The GameState to analyse, lines are proposed for player 0
+            unit_type: Optional, the type of the attacking units
+            line_type: Optional, the type of the line's structures
+            estimator: Optional, a SurvivalEstimator of the same board. Made if not given.
+
+        """
+        self.game_state = game_state
+        unit_information = game_state.config["unitInformation"]
+        self.unit_type = unit_type or unit_information[4]["shorthand"]
+        if line_type is None:
+            line_type = min(unit_information[:3], key=lambda unit: unit.get("cost1", 0))["shorthand"]
+        self.line_type = line_type
+        self.__line_cost = game_state.type_cost(line_type)[game_state.SP]
+        self.__estimator = estimator or SurvivalEstimator(game_state)
+        self.__path_finder = ShortestPathFinder()
+
+    def __place(self, line, budget):
+        """Adds the affordable part of a line to the map, returns the locations added and the SP spent
+        """
+        game_state = self.game_state
+        game_map = game_state.game_map
+        added = []
+        spent = 0
+        for location in line:
+            if not game_map.in_arena_bounds(location) or location[1] >= HALF_ARENA:
+                continue
+            if game_map[location]:
+                continue
+            if spent + self.__line_cost > budget:
+                break
+            game_map.add_unit(self.line_type, location, 0)
+            added.append(list(location))
+            spent += self.__line_cost
+        return added, spent
+
+    def __path(self, line, spawn, budget):
+        """The path from spawn with the line in place, the locations of the line built and the SP spent
+        """
+        game_state = self.game_state
+        game_map = game_state.game_map
+        game_state.begin()
+        try:
+            added, spent = self.__place(line, budget)
+            path = None
+            if not game_state.contains_stationary_unit(spawn):
+                end_points = game_map.get_edge_locations(game_state.get_target_edge(spawn))
+                path = self.__path_finder.navigate_multiple_endpoints(spawn, end_points, game_state)
+        finally:
+            game_state.rollback()
+        if path:
+            path = [list(location) for location in path]
+        return path, added, spent
+
+    def analyze(self, line, spawn, count=None, budget=None):
+        """Analyses demolishers sent from a spawn location along a proposed line
+
+        Args:
+            line: The locations of the line's structures, in the order they are built
+            spawn: The location the demolishers are spawned on
+            count: Optional, the number of demolishers. As many as the MP held can buy if None.
+            budget: Optional, the SP that can be spent on the line. The SP held if None.
+
+        Returns:
+            The dict of SurvivalEstimator.estimate for the group, with the keys line, the locations built, cost,
+            the SP they cost, spawn, path, crossing, the first location of the path on or past the line's row,
+            None if it never gets there, and leaks, True if crossing is within the line's length. None if the
+            spawn location is blocked, by the line or otherwise.
+
+        """
+        if count is None:
+            count = self.game_state.number_affordable(self.unit_type)
+        if budget is None:
+            budget = self.game_state.get_resource(self.game_state.SP)
+        path, added, spent = self.__path(line, spawn, budget)
+        if not path:
+            return None
+        result = self.__estimator.estimate(path, self.unit_type, count)
+        row = max(location[1] for location in line) if line else HALF_ARENA
+        xs = [location[0] for location in line if location[1] == row] or [-1]
+        crossing = next((location for location in path if location[1] >= row), None)
+        result["line"] = added
+        result["cost"] = spent
+        result["spawn"] = list(spawn)
+        result["path"] = path
+        result["crossing"] = crossing
+        result["leaks"] = crossing is not None and min(xs) <= crossing[0] <= max(xs)
+        return result
+
+    def scan(self, candidates, count=None, budget=None):
+        """Analyses many proposed lines and picks the best
+
+        Args:
+            candidates: A list of [line, spawn] to analyse, see analyze
+            count: Optional, the number of demolishers, as in analyze
+            budget: Optional, the SP that can be spent on each line, as in analyze
+
+        Returns:
+            A list of the dicts returned by analyze, sorted by damage dealt and then by the SP the line costs, best
+            first. Candidates with a blocked spawn location are left out.
+
+        """
+        results = []
+        for line, spawn in candidates:
+            result = self.analyze(line, spawn, count, budget)
+            if result is not None:
+                results.append(result)
+        results.sort(key=lambda result: (-result["damage"], result["cost"]))
+        return results
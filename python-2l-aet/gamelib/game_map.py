@@ -18,6 +18,9 @@ class GameMap:
         * TOP_LEFT (int): A constant that represents the top left edge
         * BOTTOM_LEFT (int): Hidden challenge! Can you guess what this constant represents???
         * BOTTOM_RIGHT (int): A constant that represents the bottom right edge
+        * version (int): Changed every time units are added to or removed from the map. A number is never given to two different boards,
+            but a board restored by GameState.rollback gets its number back.
+        * structure_version (int): Changed every time a structure is added to or removed from the map, in the same way
 
     """
     def __init__(self, config):
@@ -35,6 +38,13 @@ class GameMap:
         self.TOP_LEFT = 1
         self.BOTTOM_LEFT = 2
         self.BOTTOM_RIGHT = 3
+        self.version = 0
+        self.structure_version = 0
+        # the last numbers given out, so versions restored by a rollback are never given to another board
+        self.__last_version = 0
+        self.__last_structure_version = 0
+        # the undo log of the open GameState transaction, None if there is none
+        self._undo_log = None
         self.__map = self.__empty_grid()
         self.__start = [13,0]
     
@@ -46,7 +56,9 @@ class GameMap:
 
     def __setitem__(self, location, val):
         if type(location) == tuple and len(location) == 2 and self.in_arena_bounds(location):
+            self.__log_tile(location[0], location[1])
             self.__map[location[0]][location[1]] = val
+            self._mark_changed(True)
             return
         self._invalid_coordinates(location)
 
@@ -75,6 +87,27 @@ class GameMap:
                 grid[x].append([])
         return grid
 
+    def _mark_changed(self, structures):
+        """Bumps the version counters used by GameState to invalidate its cached paths and attackers.
+        Called internally whenever the contents of the map change.
+        """
+        self.__last_version += 1
+        self.version = self.__last_version
+        if structures:
+            self.__last_structure_version += 1
+            self.structure_version = self.__last_structure_version
+
+    def __log_tile(self, x, y):
+        """Records the units on a tile in the undo log of an open transaction, before they are changed
+        """
+        if self._undo_log is not None:
+            self._undo_log.append((self._restore_tile, (x, y, list(self.__map[x][y]))))
+
+    def _restore_tile(self, x, y, units):
+        """Puts back the units of a tile, used by GameState.rollback. Versions are restored by the caller.
+        """
+        self.__map[x][y] = units
+
     def _invalid_coordinates(self, location):
         self.warn("{} is out of bounds.".format(str(location)))
 
@@ -168,10 +201,12 @@ class GameMap:
 
         x, y = location
         new_unit = GameUnit(unit_type, self.config, player_index, None, location[0], location[1])
+        self.__log_tile(x, y)
         if not new_unit.stationary:
             self.__map[x][y].append(new_unit)
         else:
             self.__map[x][y] = [new_unit]
+        self._mark_changed(new_unit.stationary)
 
     def remove_unit(self, location):
         """Remove all units on the map in the given location.
@@ -186,7 +221,9 @@ class GameMap:
             self._invalid_coordinates(location)
         
         x, y = location
+        self.__log_tile(x, y)
         self.__map[x][y] = []
+        self._mark_changed(True)
 
     def get_locations_in_range(self, location, radius):
         """Gets locations in a circular area around a location
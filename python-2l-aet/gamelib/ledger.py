@@ -0,0 +1,207 @@
+import json
+from array import array
+
+from .board import TILE_COUNT, tile_index, tile_location
+
+
+class DamageLedger:
+    """Keeps running totals of what happened during the action phases of a game.
+
+    Feed it every action frame from on_action_frame with consume(). Only the damage, death,
+    breach and spawn events of a frame are read, so the work done per frame only depends on
+    the number of events in it. The totals are stored in flat arrays indexed by tile, see board.py,
+    and can be queried from on_turn.
+
+    Player indices are 0 for you and 1 for the enemy, as in GameState.
+
+    Attributes :
+        * turn (int): The turn of the last action phase consumed
+        * attack_turns (list): For each player, the number of turns they spawned mobile units on
+        * units_spawned (list): For each player, the number of mobile units of each unit type index they spawned
+        * mp_spent (list): For each player, the total MP spent on mobile units
+        * turn_mp_spent (list): For each player, the MP spent on mobile units in the last action phase
+        * breaches_scored (list): For each player, the number of times they scored
+
+    """
+    def __init__(self, config):
+        """Sets up empty totals
+
+        Args:
+            config (JSON): The config passed to on_game_start
+
+        """
+        self.config = config
+        unit_information = config["unitInformation"]
+        self.__unit_count = len(unit_information)
+        self.__structure = [unit.get("unitCategory") == 0 for unit in unit_information]
+        self.__mobile = [unit.get("unitCategory") == 1 for unit in unit_information]
+        self.__mp_cost = [float(unit.get("cost2", 0)) for unit in unit_information]
+
+        self.turn = -1
+        self.attack_turns = [0, 0]
+        self.units_spawned = [[0] * self.__unit_count for _ in range(2)]
+        self.mp_spent = [0.0, 0.0]
+        self.turn_mp_spent = [0.0, 0.0]
+        self.breaches_scored = [0, 0]
+
+        self.__damage = array("d", [0.0]) * TILE_COUNT
+        self.__turn_damage = array("d", [0.0]) * TILE_COUNT
+        self.__turn_damaged_tiles = []
+        self.__breaches = [array("l", [0]) * TILE_COUNT for _ in range(2)]
+        self.__breach_damage = [array("d", [0.0]) * TILE_COUNT for _ in range(2)]
+        self.__spawns = [[array("l", [0]) * TILE_COUNT for _ in range(self.__unit_count)] for _ in range(2)]
+
+    def consume(self, frame):
+        """Adds the events of one action frame to the totals
+
+        Args:
+            frame: An action frame, either the string passed to on_action_frame or the parsed json
+
+        """
+        if isinstance(frame, str):
+            frame = json.loads(frame)
+        turn_info = frame["turnInfo"]
+        if int(turn_info[0]) != 1:
+            return
+        if int(turn_info[2]) == 0 or int(turn_info[1]) != self.turn:
+            self.__start_turn(int(turn_info[1]))
+
+        events = frame["events"]
+        for event in events.get("spawn", []):
+            self.__spawn(event)
+        for event in events.get("damage", []):
+            location, amount, unit_type = event[0], float(event[1]), int(event[2])
+            if self.__structure[unit_type]:
+                index = tile_index(location)
+                self.__damage[index] += amount
+                if self.__turn_damage[index] == 0:
+                    self.__turn_damaged_tiles.append(index)
+                self.__turn_damage[index] += amount
+        for event in events.get("death", []):
+            if self.__structure[int(event[1])]:
+                self.__damage[tile_index(event[0])] = 0
+        for event in events.get("breach", []):
+            index = tile_index(event[0])
+            player_index = int(event[4]) - 1
+            self.__breaches[player_index][index] += 1
+            self.__breach_damage[player_index][index] += float(event[1])
+            self.breaches_scored[player_index] += 1
+
+    def __start_turn(self, turn):
+        self.turn = turn
+        self.turn_mp_spent = [0.0, 0.0]
+        for index in self.__turn_damaged_tiles:
+            self.__turn_damage[index] = 0
+        self.__turn_damaged_tiles = []
+
+    def __spawn(self, event):
+        location, unit_type, player_index = event[0], int(event[1]), int(event[3]) - 1
+        if self.__structure[unit_type]:
+            # A new structure starts with a clean record
+            self.__damage[tile_index(location)] = 0
+        elif self.__mobile[unit_type]:
+            if self.turn_mp_spent[player_index] == 0:
+                self.attack_turns[player_index] += 1
+            self.__spawns[player_index][unit_type][tile_index(location)] += 1
+            self.units_spawned[player_index][unit_type] += 1
+            self.mp_spent[player_index] += self.__mp_cost[unit_type]
+            self.turn_mp_spent[player_index] += self.__mp_cost[unit_type]
+
+    def damage_taken(self, location):
+        """Gets the damage the structure at a location has taken since it was built
+
+        Args:
+            location: The location of the structure
+
+        Returns:
+            The total damage dealt to it, 0 if there is no structure there
+
+        """
+        return self.__damage[tile_index(location)]
+
+    def damage_last_turn(self, location):
+        """Gets the damage the structure at a location took in the last action phase
+
+        Args:
+            location: The location of the structure
+
+        Returns:
+            The damage dealt to it in the last action phase consumed
+
+        """
+        return self.__turn_damage[tile_index(location)]
+
+    def damaged_last_turn(self):
+        """Gets the structures that took damage in the last action phase
+
+        Returns:
+            A list of [location, damage] pairs, most damaged first
+
+        """
+        damaged = [[tile_location(index), self.__turn_damage[index]] for index in self.__turn_damaged_tiles]
+        damaged.sort(key=lambda pair: -pair[1])
+        return damaged
+
+    def breaches(self, location, player_index):
+        """Gets the number of times a player's units scored from a location
+
+        Args:
+            location: The edge location the units left the board from
+            player_index: The player who scored, 0 for you 1 for the enemy
+
+        Returns:
+            The number of breaches at that location
+
+        """
+        return self.__breaches[player_index][tile_index(location)]
+
+    def breach_locations(self, player_index):
+        """Gets every location a player has scored from
+
+        Args:
+            player_index: The player who scored, 0 for you 1 for the enemy
+
+        Returns:
+            A list of [location, breaches, damage] lists, most breached first
+
+        """
+        counts = self.__breaches[player_index]
+        result = [[tile_location(index), counts[index], self.__breach_damage[player_index][index]] for index in range(TILE_COUNT) if counts[index]]
+        result.sort(key=lambda entry: -entry[1])
+        return result
+
+    def spawn_count(self, location, player_index, unit_type_index=None):
+        """Gets the number of mobile units a player has spawned at a location
+
+        Args:
+            location: The spawn location
+            player_index: The player who spawned the units, 0 for you 1 for the enemy
+            unit_type_index: Optional, only count units of this index into config["unitInformation"]
+
+        Returns:
+            The number of units spawned there this game
+
+        """
+        index = tile_index(location)
+        if unit_type_index is not None:
+            return self.__spawns[player_index][unit_type_index][index]
+        return sum(spawns[index] for spawns in self.__spawns[player_index])
+
+    def favourite_spawns(self, player_index, count=3):
+        """Gets the locations a player spawns mobile units at most often
+
+        Args:
+            player_index: The player who spawned the units, 0 for you 1 for the enemy
+            count: The number of locations to return
+
+        Returns:
+            A list of up to count [location, units spawned] pairs, most used first
+
+        """
+        totals = {}
+        for spawns in self.__spawns[player_index]:
+            for index in range(TILE_COUNT):
+                if spawns[index]:
+                    totals[index] = totals.get(index, 0) + spawns[index]
+        ranked = sorted(totals.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [[tile_location(index), total] for index, total in ranked[:count]]
@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from .util import debug_write
+
+BOOK_VERSION = 1
+# Environment variable that turns books off when set to "off", or names the directory they are stored in
+BOOK_ENVIRONMENT_VARIABLE = "OPENING_BOOK"
+
+
+def config_hash(config, params=None):
+    """Hashes a game config together with the algo's own parameters
+
+    Args:
+        config: The config passed to on_game_start
+        params: Any json serializable value describing the algo, e.g. its thresholds and build order
+
+    Returns:
+        A hex string that changes whenever the config or the parameters change
+
+    """
+    payload = json.dumps({"version": BOOK_VERSION, "config": config, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path):
+    """Hashes the contents of a file, used to key a book on the source of algo_strategy.py
+
+    Args:
+        path: The file to hash
+
+    Returns:
+        A hex string of the file's contents
+
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def gamelib_digest():
+    """Hashes the source of every gamelib module, used to key a book on the gamelib its plans were made with
+
+    Returns:
+        A hex string that changes whenever a gamelib module changes
+
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8"))
+            digest.update(file_digest(os.path.join(directory, name)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def board_digest(serialized_string, extra=None):
+    """Hashes the parts of a turn string that decide what an algo will do on that turn
+
+    Unit ids, frame timings and time taken are left out since they differ from game to game
+    even when the board is the same.
+
+    Args:
+        serialized_string: The turn string passed to on_turn
+        extra: Any json serializable value to fold into the digest, e.g. the strategy's own state
+
+    Returns:
+        A hex string identifying the board
+
+    """
+    state = json.loads(serialized_string)
+    board = {
+        "turn": state["turnInfo"][1],
+        "p1Stats": state["p1Stats"][:3],
+        "p2Stats": state["p2Stats"][:3],
+        "p1Units": [[unit[:3] for unit in units] for units in state["p1Units"]],
+        "p2Units": [[unit[:3] for unit in units] for units in state["p2Units"]],
+        "extra": extra,
+    }
+    payload = json.dumps(board, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class OpeningBook:
+    """Stores the plans an algo made on its first few turns so later games can skip recomputing them.
+
+    The first turns of a game are played on the same board every time, so whatever the
+    strategy decided then can be replayed as long as the config and the algo are unchanged.
+    Decisions depend on gamelib as well as on the strategy, so the parameters should include
+    gamelib_digest along with file_digest of the strategy. A book lives in a single json file
+    named after the hash of the config and the algo's parameters, so any change to either
+    simply starts a new book. A turn whose decisions drew on random numbers should not be
+    recorded, since replaying it would skip the draws and repeat the first outcome every game.
+
+    Setting the OPENING_BOOK environment variable to off turns the book off, so covers is
+    False for every turn and nothing is read or written, and setting it to a directory stores
+    books there instead. Scripts that need games to play out the same whether or not a book
+    exists, such as arena runs and profiling, turn it off.
+
+    Each entry holds the build and deploy commands for one turn, the strategy state to restore
+    after that turn, and the paths and attackers looked up on the turn start board so a
+    GameState can be primed with them.
+
+    Attributes :
+        * key (str): The hash of the config and parameters this book is valid for
+        * path (str): The file the book is read from and written to
+        * max_turn (int): Plans are only looked up and recorded for turns below this number
+        * enabled (bool): False if the book was turned off
+        * hits (int): The number of successful lookups this game
+        * misses (int): The number of lookups that fell back to live computation this game
+
+    """
+    def __init__(self, config, params=None, directory=None, max_turn=3, enabled=None):
+        """Loads the book for this config and parameters if one exists on disk
+
+        Args:
+            config: The config passed to on_game_start
+            params: Any json serializable value describing the algo
+            directory: Where books are stored. Defaults to the OPENING_BOOK environment variable, or an opening-book
+                folder next to gamelib if it is not set
+            max_turn: Plans are only looked up and recorded for turns below this number
+            enabled: Optional, False turns the book off. Off if the OPENING_BOOK environment variable is off if None.
+
+        """
+        setting = os.environ.get(BOOK_ENVIRONMENT_VARIABLE, "")
+        if enabled is None:
+            enabled = setting.lower() != "off"
+        if directory is None:
+            directory = setting if setting and setting.lower() != "off" else \
+                os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "opening-book")
+        self.key = config_hash(config, params)
+        self.path = os.path.join(directory, "{}.json".format(self.key))
+        self.max_turn = max_turn
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.config = config
+        self.__entries = self.__load() if enabled else {}
+
+    def __load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                book = json.load(f)
+        except (OSError, ValueError) as e:
+            debug_write("Could not read opening book {}: {}".format(self.path, e))
+            return {}
+        if book.get("key") != self.key:
+            return {}
+        return book.get("entries", {})
+
+    def __save(self):
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"key": self.key, "entries": self.__entries}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            debug_write("Could not write opening book {}: {}".format(self.path, e))
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def covers(self, turn_number):
+        """Whether plans are looked up and recorded on the given turn
+        """
+        return self.enabled and turn_number < self.max_turn
+
+    def lookup(self, digest):
+        """Gets the plan stored for a board
+
+        Args:
+            digest: The board_digest of the turn string
+
+        Returns:
+            The stored entry, or None if the turn has to be computed live
+
+        """
+        entry = self.__entries.get(digest)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def apply(self, entry, game_state):
+        """Loads a stored plan into a GameState so it can be submitted
+
+        The commands are put on the build and deploy stacks as they were when the plan was
+        recorded, and the recorded paths and attackers are put into the GameState's caches
+        so any further queries on the turn start board are lookups.
+
+        Args:
+            entry: An entry returned by lookup
+            game_state: The GameState for the current turn
+
+        Returns:
+            The strategy state stored with the plan
+
+        """
+        self.prime(entry, game_state)
+        game_state._build_stack = [tuple(command) for command in entry["build"]]
+        game_state._deploy_stack = [tuple(command) for command in entry["deploy"]]
+        return entry.get("state", {})
+
+    def prime(self, entry, game_state):
+        """Fills a GameState's path and attacker caches from a stored entry
+
+        Args:
+            entry: An entry returned by lookup
+            game_state: A GameState for the board the entry was recorded on
+
+        """
+        if game_state.game_map.structure_version != game_state._turn_start_version:
+            return
+        for x, y, edge, path in entry.get("paths", []):
+            game_state._path_cache[(x, y, edge)] = path
+            game_state._turn_start_paths[(x, y, edge)] = path
+
+        if game_state.game_map.version != game_state._attackers_cache_version:
+            return
+        for x, y, player_index, locations in entry.get("threats", []):
+            attackers = []
+            for location in locations:
+                for unit in game_state.game_map[location]:
+                    if unit.damage_i + unit.damage_f > 0 and unit.player_index != player_index:
+                        attackers.append(unit)
+            game_state._attackers_cache[(x, y, player_index)] = attackers
+
+    def record(self, digest, game_state, state=None):
+        """Stores what the strategy did this turn and writes the book to disk
+
+        Args:
+            digest: The board_digest of the turn string
+            game_state: The GameState after the strategy has queued its commands
+            state: Any json serializable strategy state that should be restored when the plan is replayed
+
+        """
+        if not self.covers(game_state.turn_number):
+            return
+
+        # Attackers are looked up on a fresh copy of the board since the strategy may have built on the one it was given
+        from .game_state import GameState
+        turn_start = GameState(self.config, game_state.serialized_string)
+        turn_start.suppress_warnings(True)
+
+        paths = []
+        threats = []
+        seen = set()
+        for (x, y, edge), path in game_state._turn_start_paths.items():
+            if path is None:
+                continue
+            paths.append([x, y, edge, path])
+            player_index = 0 if y < game_state.HALF_ARENA else 1
+            for location in path:
+                key = (location[0], location[1], player_index)
+                if key in seen:
+                    continue
+                seen.add(key)
+                attackers = turn_start.get_attackers(location, player_index)
+                threats.append([location[0], location[1], player_index, [[unit.x, unit.y] for unit in attackers]])
+
+        self.__entries[digest] = {
+            "turn": game_state.turn_number,
+            "build": [list(command) for command in game_state._build_stack],
+            "deploy": [list(command) for command in game_state._deploy_stack],
+            "state": state if state is not None else {},
+            "paths": paths,
+            "threats": threats,
+        }
+        self.__save()
@@ -90,7 +90,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         unit deployments, and transmitting your intended deployments to the
         game engine.
         """
-        game_state = gamelib.GameState(self.config, turn_state)
+        game_state = self.make_game_state(turn_state)
         self.starter_strategy(game_state)
 
         game_state.submit_turn()
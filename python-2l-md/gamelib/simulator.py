@@ -0,0 +1,498 @@
+import json
+
+from .game_state import GameState
+from .navigation import ShortestPathFinder
+from .targeting import TargetingEngine
+from .unit import GameUnit
+
+EVENT_TYPES = ["selfDestruct", "breach", "damage", "shield", "move", "spawn", "death", "attack", "melee"]
+# Index of the player field of each event, and of the fields holding locations
+EVENT_PLAYER = {"spawn": 3, "damage": 4, "death": 3, "breach": 4, "selfDestruct": 5, "shield": 6, "move": 5, "attack": 6}
+EVENT_LOCATIONS = {"spawn": [0], "damage": [0], "death": [0], "breach": [0], "selfDestruct": [0], "shield": [0, 1], "move": [0, 1], "attack": [0, 1]}
+
+
+def flip_location(location):
+    """Rotates a location half a turn around the center of the board
+    """
+    return [27 - location[0], 27 - location[1]]
+
+
+def flip_frame(frame):
+    """Turns a frame around so it is seen from player 2's side, the way the engine sends it to the second algo.
+    Player 2's units, stats and events are reported as player 1's and every location is rotated.
+
+    Args:
+        frame: A turn or action frame as parsed json
+
+    Returns:
+        A new frame, the input is not changed
+
+    """
+    flipped = dict(frame)
+    flipped["p1Stats"], flipped["p2Stats"] = frame["p2Stats"], frame["p1Stats"]
+    for key, other in (("p1Units", "p2Units"), ("p2Units", "p1Units")):
+        flipped[key] = [[flip_location(unit[:2]) + list(unit[2:]) for unit in units] for units in frame[other]]
+
+    events = {}
+    for name, entries in frame.get("events", {}).items():
+        events[name] = []
+        for event in entries:
+            event = list(event)
+            for index in EVENT_LOCATIONS.get(name, []):
+                event[index] = flip_location(event[index])
+            if name == "selfDestruct":
+                event[1] = [flip_location(location) for location in event[1]]
+            if name in EVENT_PLAYER:
+                event[EVENT_PLAYER[name]] = 3 - event[EVENT_PLAYER[name]]
+            events[name].append(event)
+    flipped["events"] = events
+
+    if "endStats" in frame:
+        end_stats = dict(frame["endStats"])
+        end_stats["player1"], end_stats["player2"] = frame["endStats"]["player2"], frame["endStats"]["player1"]
+        end_stats["winner"] = 3 - frame["endStats"]["winner"]
+        flipped["endStats"] = end_stats
+    return flipped
+
+
+class SimulatedUnit(GameUnit):
+    """A GameUnit with the state the simulator tracks while it is on the board
+
+    Attributes :
+        * id (str): The id reported in frames, unique within a simulation
+        * target_edge (int): The edge a mobile unit is heading to
+        * steps (int): The number of tiles a mobile unit has moved
+        * progress (float): How close a mobile unit is to its next move, it moves when this reaches 1
+        * last_direction (int): ShortestPathFinder.HORIZONTAL or VERTICAL, the direction of the unit's last move
+        * shielded_by (set): The ids of the supports that have already shielded this unit
+
+    """
+    def __init__(self, unit_type, config, player_index, health, x, y, unit_id):
+        GameUnit.__init__(self, unit_type, config, player_index, health, x, y)
+        self.id = unit_id
+        self.target_edge = None
+        self.steps = 0
+        self.progress = 0.0
+        self.last_direction = 0
+        self.shielded_by = set()
+        self.path = None
+        self.path_index = 0
+        self.path_version = -1
+
+
+class Simulator:
+    """Plays out the deploy and action phases of a game the way the engine does.
+
+    The board is held in a GameState, so paths are found by the same code algos use. Targets
+    are found by TargetingEngine, which picks the same targets as GameState.get_target. Player 0
+    is player 1 in frames and is at the bottom of the board. Use flip_frame to get what player 2
+    sees.
+
+    The rules follow the engine closely, but not exactly. Every frame supports shield, then
+    mobile units move, breach or self destruct, then every unit attacks its target. Units with
+    no health left are removed at the end of the frame. Structures marked for removal are
+    refunded in proportion to their remaining health once the action phase is over.
+
+    Attributes :
+        * config (JSON): The game config
+        * game_state (:obj: GameState): Holds the board. Its resources are not used, see resources
+        * turn_number (int): The current turn
+        * frame (int): The last action frame played this turn, -1 during the deploy phase
+        * frames_played (int): The number of action frames played over the whole game
+        * health (list): The health of both players
+        * resources (list): [SP, MP] for both players
+        * time (list): The time in milliseconds each player took on their last turn, reported in frames
+        * stats (list): The endStats of both players, without their names
+        * winner (int): 0 or 1 once the game is over, None until then
+        * max_turns (int): The game is decided on health once this many turns have been played
+
+    """
+    def __init__(self, config, game_state=None, max_turns=100):
+        """Sets up a simulation
+
+        Args:
+            config (JSON): The game config
+            game_state: Optional, a GameState to copy the board, resources and health from. A new game is started if not given.
+            max_turns: The game is decided on health once this many turns have been played
+
+        """
+        self.config = config
+        self.max_turns = max_turns
+        self.__type_index = {unit["shorthand"]: index for index, unit in enumerate(config["unitInformation"])}
+        self.__types = [unit["shorthand"] for unit in config["unitInformation"]]
+        self.__next_id = 1
+        self.__units = {}
+        self.__events = self.__empty_events()
+        self.__paths = {}
+        self.__paths_version = -1
+        self.__path_finder = ShortestPathFinder()
+        self.__targeting = TargetingEngine(config)
+
+        resources = config["resources"]
+        if game_state is None:
+            self.turn_number = 0
+            self.health = [resources["startingHP"], resources["startingHP"]]
+            self.resources = [[resources["startingCores"], resources["startingBits"]], [resources["startingCores"], resources["startingBits"]]]
+        else:
+            self.turn_number = game_state.turn_number
+            self.health = [game_state.my_health, game_state.enemy_health]
+            self.resources = [game_state.get_resources(0), game_state.get_resources(1)]
+        self.frame = -1
+        self.frames_played = 0
+        self.time = [0, 0]
+        self.winner = None
+        self.stats = [self.__empty_stats(), self.__empty_stats()]
+
+        self.game_state = GameState(config, json.dumps(self.__frame_dict(0, -1, self.__empty_events(), units=False)))
+        self.game_state.suppress_warnings(True)
+        game_map = self.game_state.game_map
+        self.__edges = [set(tuple(location) for location in game_map.get_edge_locations(edge)) for edge in range(4)]
+        if game_state is not None:
+            for location in game_state.game_map:
+                for unit in game_state.game_map[location]:
+                    copy = self.__add_unit(unit.unit_type, unit.player_index, location, unit.health)
+                    if unit.upgraded:
+                        copy.upgrade()
+                    copy.pending_removal = unit.pending_removal
+            self.__events = self.__empty_events()
+
+    @staticmethod
+    def __empty_events():
+        return {name: [] for name in EVENT_TYPES}
+
+    @staticmethod
+    def __empty_stats():
+        return {
+            "stationary_resource_spent": 0, "dynamic_resource_spent": 0, "dynamic_resource_destroyed": 0,
+            "dynamic_resource_spoiled": 0, "stationary_resource_left_on_board": 0, "points_scored": 0,
+            "crashed": False, "timeout_death": False, "time_damage_taken": 0, "total_computation_time": 0,
+        }
+
+    def __add_unit(self, unit_type, player_index, location, health=None):
+        unit = SimulatedUnit(unit_type, self.config, player_index, health, location[0], location[1], str(self.__next_id))
+        self.__next_id += 1
+        self.__units[unit.id] = unit
+        self.game_state.game_map[location].append(unit)
+        self.game_state.game_map._mark_changed(unit.stationary)
+        if not unit.stationary:
+            unit.target_edge = self.game_state.get_target_edge(location)
+        self.__events["spawn"].append([list(location), self.__type_index[unit_type], unit.id, player_index + 1])
+        return unit
+
+    def __remove_unit(self, unit):
+        del self.__units[unit.id]
+        self.game_state.game_map[unit.x, unit.y].remove(unit)
+        self.game_state.game_map._mark_changed(unit.stationary)
+
+    def __frame_dict(self, turn_type, frame, events, units=True):
+        frame_dict = {
+            "p1Units": self.__serialize_units(0) if units else [[] for _ in self.__types],
+            "p2Units": self.__serialize_units(1) if units else [[] for _ in self.__types],
+            "turnInfo": [turn_type, self.turn_number, frame],
+            "p1Stats": [self.health[0], self.resources[0][0], self.resources[0][1], self.time[0]],
+            "p2Stats": [self.health[1], self.resources[1][0], self.resources[1][1], self.time[1]],
+            "events": events,
+        }
+        return frame_dict
+
+    def __serialize_units(self, player_index):
+        units = [[] for _ in self.__types]
+        # Removals and upgrades are listed again under the REMOVE and UPGRADE types
+        remove_index = 6 if len(self.__types) > 6 else None
+        upgrade_index = 7 if len(self.__types) > 7 else None
+        for unit in self.__units.values():
+            if unit.player_index != player_index:
+                continue
+            entry = [unit.x, unit.y, unit.health, unit.id]
+            units[self.__type_index[unit.unit_type]].append(entry)
+            if unit.pending_removal and remove_index is not None:
+                units[remove_index].append(entry)
+            if unit.upgraded and upgrade_index is not None:
+                units[upgrade_index].append(entry)
+        return units
+
+    def turn_frame(self):
+        """The frame sent to algos at the start of the deploy phase, as parsed json
+        """
+        return self.__frame_dict(0, -1, self.__empty_events())
+
+    def end_frame(self, names=("player1", "player2"), duration=0):
+        """The frame sent to algos once the game is over, as parsed json
+
+        Args:
+            names: The names of the two algos
+            duration: The time in milliseconds the game took
+
+        """
+        stats = []
+        for player_index in range(2):
+            player_stats = dict(self.stats[player_index])
+            player_stats["name"] = names[player_index]
+            player_stats["stationary_resource_left_on_board"] = sum(
+                unit.cost[0] for unit in self.__units.values() if unit.stationary and unit.player_index == player_index)
+            stats.append(player_stats)
+        frame = self.__frame_dict(2, max(self.frame, 0), self.__empty_events())
+        frame["endStats"] = {
+            "duration": duration,
+            "winner": (self.winner if self.winner is not None else self.__leader()) + 1,
+            "turns": self.turn_number,
+            "frames": self.frames_played,
+            "player1": stats[0],
+            "player2": stats[1],
+        }
+        return frame
+
+    def __leader(self):
+        if self.health[0] != self.health[1]:
+            return 0 if self.health[0] > self.health[1] else 1
+        # A draw on health goes to the faster algo
+        return 0 if self.stats[0]["total_computation_time"] <= self.stats[1]["total_computation_time"] else 1
+
+    def __in_own_half(self, player_index, location):
+        return location[1] < 14 if player_index == 0 else location[1] >= 14
+
+    def build(self, player_index, commands):
+        """Places structures, upgrades and removals for one player, as sent on their first line
+
+        Args:
+            player_index: 0 or 1
+            commands: A list of [unit type, x, y], with locations as seen from player 1's side
+
+        Returns:
+            The number of commands that were valid and affordable
+
+        """
+        done = 0
+        game_map = self.game_state.game_map
+        for command in commands:
+            unit_type, location = command[0], [int(command[1]), int(command[2])]
+            if unit_type not in self.__type_index or not game_map.in_arena_bounds(location) or not self.__in_own_half(player_index, location):
+                continue
+            index = self.__type_index[unit_type]
+            structure = self.game_state.contains_stationary_unit(location)
+            if index == 6:
+                if structure and structure.player_index == player_index:
+                    structure.pending_removal = True
+                    done += 1
+            elif index == 7:
+                if structure and structure.player_index == player_index and not structure.upgraded:
+                    cost = self.game_state.type_cost(structure.unit_type, upgrade=True)[0]
+                    if self.resources[player_index][0] >= cost:
+                        self.resources[player_index][0] -= cost
+                        self.stats[player_index]["stationary_resource_spent"] += cost
+                        structure.upgrade()
+                        done += 1
+            elif self.config["unitInformation"][index].get("unitCategory") == 0 and not game_map[location]:
+                cost = self.config["unitInformation"][index].get("cost1", 0)
+                if self.resources[player_index][0] >= cost:
+                    self.resources[player_index][0] -= cost
+                    self.stats[player_index]["stationary_resource_spent"] += cost
+                    self.__add_unit(unit_type, player_index, location)
+                    done += 1
+        return done
+
+    def deploy(self, player_index, commands):
+        """Places mobile units for one player, as sent on their second line
+
+        Args:
+            player_index: 0 or 1
+            commands: A list of [unit type, x, y], with locations as seen from player 1's side
+
+        Returns:
+            The number of units placed
+
+        """
+        done = 0
+        own_edges = self.__edges[2] | self.__edges[3] if player_index == 0 else self.__edges[0] | self.__edges[1]
+        for command in commands:
+            unit_type, location = command[0], [int(command[1]), int(command[2])]
+            index = self.__type_index.get(unit_type)
+            if index is None or self.config["unitInformation"][index].get("unitCategory") != 1:
+                continue
+            if tuple(location) not in own_edges or self.game_state.contains_stationary_unit(location):
+                continue
+            cost = self.config["unitInformation"][index].get("cost2", 0)
+            if self.resources[player_index][1] >= cost:
+                self.resources[player_index][1] -= cost
+                self.stats[player_index]["dynamic_resource_spent"] += cost
+                self.__add_unit(unit_type, player_index, location)
+                done += 1
+        return done
+
+    def run_action_phase(self, on_frame=None, max_frames=1000):
+        """Plays the action phase until no mobile units are left or a player has no health left
+
+        Args:
+            on_frame: Optional, called with every frame as parsed json, starting with frame 0
+            max_frames: A safety limit on the number of frames
+
+        Returns:
+            The number of frames played
+
+        """
+        self.frame = 0
+        events, self.__events = self.__events, self.__empty_events()
+        if on_frame is not None:
+            on_frame(self.__frame_dict(1, 0, events))
+        while self.winner is None and self.frame < max_frames and any(not unit.stationary for unit in self.__units.values()):
+            self.frame += 1
+            self.__shield()
+            self.__move()
+            self.__attack()
+            self.__remove_dead()
+            self.__check_winner(final=False)
+            events, self.__events = self.__events, self.__empty_events()
+            if on_frame is not None:
+                on_frame(self.__frame_dict(1, self.frame, events))
+        self.frames_played += self.frame + 1
+        self.__finish_action_phase()
+        return self.frame + 1
+
+    def __shield(self):
+        for support in list(self.__units.values()):
+            if not support.stationary or support.shieldRange <= 0:
+                continue
+            for location in self.game_state.game_map.get_locations_in_range([support.x, support.y], support.shieldRange):
+                for unit in self.game_state.game_map[location]:
+                    if unit.stationary or unit.player_index != support.player_index or support.id in unit.shielded_by:
+                        continue
+                    # the bonus is for how far forward the support is placed
+                    y = support.y if support.player_index == 0 else 27 - support.y
+                    amount = support.shieldPerUnit + support.shieldBonusPerY * y
+                    unit.health += amount
+                    unit.shielded_by.add(support.id)
+                    self.__events["shield"].append([[support.x, support.y], [unit.x, unit.y], amount, self.__type_index[support.unit_type], support.id, unit.id, support.player_index + 1])
+
+    def __move(self):
+        for unit in list(self.__units.values()):
+            if unit.stationary or unit.id not in self.__units:
+                continue
+            unit.progress += unit.speed
+            if unit.progress < 1:
+                continue
+            unit.progress -= 1
+            path = self.__path(unit)
+            if unit.path_index + 1 >= len(path):
+                self.__self_destruct(unit)
+                continue
+            old_location = [unit.x, unit.y]
+            new_location = path[unit.path_index + 1]
+            unit.path_index += 1
+            unit.last_direction = self.__path_finder.VERTICAL if old_location[0] == new_location[0] else self.__path_finder.HORIZONTAL
+            self.game_state.game_map[old_location].remove(unit)
+            unit.x, unit.y = new_location
+            self.game_state.game_map[new_location].append(unit)
+            self.game_state.game_map._mark_changed(False)
+            unit.steps += 1
+            self.__events["move"].append([old_location, list(new_location), [0, 0], self.__type_index[unit.unit_type], unit.id, unit.player_index + 1])
+            if tuple(new_location) in self.__edges[unit.target_edge]:
+                self.__breach(unit)
+
+    def __path(self, unit):
+        structure_version = self.game_state.game_map.structure_version
+        if unit.path is None or unit.path_version != structure_version:
+            if structure_version != self.__paths_version:
+                self.__paths = {}
+                self.__paths_version = structure_version
+            key = (unit.x, unit.y, unit.target_edge, unit.last_direction)
+            if key not in self.__paths:
+                end_points = self.game_state.game_map.get_edge_locations(unit.target_edge)
+                self.__paths[key] = self.__path_finder.navigate_multiple_endpoints([unit.x, unit.y], end_points, self.game_state, unit.last_direction)
+            unit.path = self.__paths[key]
+            unit.path_index = 0
+            unit.path_version = structure_version
+        return unit.path
+
+    def __breach(self, unit):
+        damage = self.config["unitInformation"][self.__type_index[unit.unit_type]].get("playerBreachDamage", 1)
+        enemy = 1 - unit.player_index
+        self.health[enemy] -= damage
+        self.resources[unit.player_index][0] += damage * self.config["resources"].get("coresForPlayerDamage", 0)
+        self.stats[unit.player_index]["points_scored"] += damage
+        self.__events["breach"].append([[unit.x, unit.y], damage, self.__type_index[unit.unit_type], unit.id, unit.player_index + 1])
+        self.__remove_unit(unit)
+
+    def __self_destruct(self, unit):
+        type_config = self.config["unitInformation"][self.__type_index[unit.unit_type]]
+        location = [unit.x, unit.y]
+        if unit.steps >= type_config.get("selfDestructStepsRequired", 5):
+            targets = []
+            for target_location in self.game_state.game_map.get_locations_in_range(location, type_config.get("selfDestructRange", 1.5)):
+                for target in self.game_state.game_map[target_location]:
+                    if target.player_index == unit.player_index:
+                        continue
+                    damage = type_config.get("selfDestructDamageTower" if target.stationary else "selfDestructDamageWalker", 0)
+                    if damage <= 0:
+                        continue
+                    target.health -= damage
+                    targets.append(list(target_location))
+                    self.__events["damage"].append([list(target_location), damage, self.__type_index[target.unit_type], target.id, target.player_index + 1])
+            self.__events["selfDestruct"].append([location, targets, type_config.get("selfDestructDamageWalker", 0), self.__type_index[unit.unit_type], unit.id, unit.player_index + 1])
+        self.__events["death"].append([location, self.__type_index[unit.unit_type], unit.id, unit.player_index + 1, False])
+        self.__remove_unit(unit)
+
+    def __attack(self):
+        attackers = [unit for unit in self.__units.values() if unit.damage_f + unit.damage_i > 0 and unit.health > 0]
+        targets = self.__targeting.get_targets(self.game_state.game_map, attackers)
+        for unit, target in zip(attackers, targets):
+            if target is None:
+                continue
+            damage = unit.damage_f if target.stationary else unit.damage_i
+            target.health -= damage
+            self.__events["attack"].append([[unit.x, unit.y], [target.x, target.y], damage, self.__type_index[unit.unit_type], unit.id, target.id, unit.player_index + 1])
+            self.__events["damage"].append([[target.x, target.y], damage, self.__type_index[target.unit_type], target.id, target.player_index + 1])
+
+    def __remove_dead(self):
+        for unit in list(self.__units.values()):
+            if unit.health > 0:
+                continue
+            if not unit.stationary:
+                self.stats[unit.player_index]["dynamic_resource_destroyed"] += unit.cost[1]
+            self.__events["death"].append([[unit.x, unit.y], self.__type_index[unit.unit_type], unit.id, unit.player_index + 1, False])
+            self.__remove_unit(unit)
+
+    def __check_winner(self, final):
+        if self.health[0] <= 0 or self.health[1] <= 0 or (final and self.turn_number + 1 >= self.max_turns):
+            self.winner = self.__leader()
+
+    def __finish_action_phase(self):
+        for unit in list(self.__units.values()):
+            if unit.stationary and unit.pending_removal:
+                refund = unit.cost[0] * self.config["unitInformation"][self.__type_index[unit.unit_type]].get("refundPercentage", 0) * unit.health / unit.max_health
+                self.resources[unit.player_index][0] += refund
+                self.__remove_unit(unit)
+            elif not unit.stationary:
+                self.__remove_unit(unit)
+        self.__events = self.__empty_events()
+        self.__check_winner(final=True)
+
+    def next_turn(self):
+        """Starts the next deploy phase, giving both players their income and decaying their MP
+
+        Returns:
+            The new turn frame, as parsed json
+
+        """
+        self.turn_number += 1
+        self.frame = -1
+        resources = self.config["resources"]
+        mp_gained = resources["bitsPerRound"] + resources["bitGrowthRate"] * (self.turn_number // resources["turnIntervalForBitSchedule"])
+        for player_index in range(2):
+            sp_gained = resources["coresPerRound"]
+            for unit in self.__units.values():
+                if unit.player_index == player_index and unit.stationary:
+                    type_config = self.config["unitInformation"][self.__type_index[unit.unit_type]]
+                    if unit.upgraded:
+                        type_config = dict(type_config, **type_config.get("upgrade", {}))
+                    sp_gained += type_config.get("generatesResource1", 0)
+                    self.resources[player_index][1] += type_config.get("generatesResource2", 0)
+            sp, mp = self.resources[player_index]
+            kept = mp * (1 - resources["bitDecayPerRound"])
+            self.stats[player_index]["dynamic_resource_spoiled"] += mp - kept
+            self.resources[player_index] = [sp + sp_gained, round(kept + mp_gained, 1)]
+        return self.turn_frame()
+
+    def is_over(self):
+        """Whether the game has been decided
+        """
+        return self.winner is not None
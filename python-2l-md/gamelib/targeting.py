@@ -0,0 +1,118 @@
+from .board import ARENA_SIZE, HALF_ARENA, TILE_COUNT, ARENA_TILES, hit_radius, tiles_in_range_by_distance
+
+
+class TargetingEngine:
+    """Finds the targets of many attackers at once, with the same results as GameState.get_target.
+
+    The units on the board are sorted once into buckets per tile, split by player and into mobile
+    units and structures. The tiles in range of every tile are worked out once per attack range and
+    grouped by distance, closest first, see board.py, so an attacker only looks at the closest group
+    holding a unit it can attack. The buckets are rebuilt only when GameMap.version changes.
+
+    The targeting priority is the same as get_target: mobile units, then the nearest unit, then
+    the lowest health, then the lowest y (highest for player 1's attackers), then the furthest
+    from the center of the board. Ties keep the unit get_target finds first.
+
+    Attributes :
+        * config (JSON): The game config
+
+    """
+    def __init__(self, config):
+        """Sets up the engine
+
+        Args:
+            config (JSON): The game config
+
+        """
+        self.config = config
+        self.__hit_radius = hit_radius(config)
+        self.__game_map = None
+        self.__version = -1
+        # for each player, tile index -> units on the tile, for mobile units and structures
+        self.__mobile = [[None] * TILE_COUNT for _ in range(2)]
+        self.__structures = [[None] * TILE_COUNT for _ in range(2)]
+        self.__mobile_count = [0, 0]
+        self.__structure_count = [0, 0]
+
+    def index_units(self, game_map):
+        """Sorts the units of a map into buckets, does nothing if the map has not changed since the last call
+
+        Args:
+            game_map: The GameMap holding the units
+
+        """
+        if game_map is self.__game_map and game_map.version == self.__version:
+            return
+        self.__game_map = game_map
+        self.__version = game_map.version
+        self.__mobile = [[None] * TILE_COUNT for _ in range(2)]
+        self.__structures = [[None] * TILE_COUNT for _ in range(2)]
+        self.__mobile_count = [0, 0]
+        self.__structure_count = [0, 0]
+        for index in ARENA_TILES:
+            units = game_map[index % ARENA_SIZE, index // ARENA_SIZE]
+            for unit in units:
+                player = unit.player_index
+                if unit.stationary:
+                    buckets, counts = self.__structures[player], self.__structure_count
+                else:
+                    buckets, counts = self.__mobile[player], self.__mobile_count
+                if buckets[index] is None:
+                    buckets[index] = []
+                buckets[index].append(unit)
+                counts[player] += 1
+
+    def __closest(self, groups, buckets, lowest_y):
+        """The best unit in the closest group of tiles holding any units
+        """
+        for group in groups:
+            best = None
+            for index in group:
+                units = buckets[index]
+                if units is None:
+                    continue
+                for unit in units:
+                    key = (unit.health, unit.y if lowest_y else -unit.y, -abs(HALF_ARENA - 0.5 - unit.x))
+                    if best is None or key < best_key:
+                        best, best_key = unit, key
+            if best is not None:
+                return best
+        return None
+
+    def get_target(self, attacking_unit):
+        """Gets the target of a unit on the map last passed to index_units
+
+        Args:
+            attacking_unit: A GameUnit
+
+        Returns:
+            The GameUnit this unit would choose to attack, the same as GameState.get_target, None if there is none.
+
+        """
+        enemy = 1 - attacking_unit.player_index
+        index = int(attacking_unit.y) * ARENA_SIZE + int(attacking_unit.x)
+        groups = None
+        if attacking_unit.damage_i != 0 and self.__mobile_count[enemy]:
+            groups = tiles_in_range_by_distance(index, attacking_unit.attackRange, self.__hit_radius)
+            target = self.__closest(groups, self.__mobile[enemy], attacking_unit.player_index == 0)
+            if target is not None:
+                return target
+        if attacking_unit.damage_f != 0 and self.__structure_count[enemy]:
+            if groups is None:
+                groups = tiles_in_range_by_distance(index, attacking_unit.attackRange, self.__hit_radius)
+            return self.__closest(groups, self.__structures[enemy], attacking_unit.player_index == 0)
+        return None
+
+    def get_targets(self, game_map, attackers):
+        """Gets the targets of many units on the same board at once
+
+        Args:
+            game_map: The GameMap holding the units
+            attackers: A list of GameUnits
+
+        Returns:
+            A list with the target of each attacker, or None for attackers with nothing to attack
+
+        """
+        self.index_units(game_map)
+        return [self.get_target(unit) for unit in attackers]
@@ -0,0 +1,174 @@
+from array import array
+
+from .board import EDGE_TILES, hit_radius, tile_index, tile_location, tiles_in_range
+from .pockets import target_edge
+
+
+def path_timeline(path, speed):
+    """Works out which tile a mobile unit walking a path is on in every frame
+
+    Units move as in Simulator: every frame a unit adds its speed to its progress and moves a tile
+    when the progress reaches 1, then attacks. It leaves the board on the frame it steps onto its
+    target edge, or tries to step past the end of a path that does not reach it and self destructs.
+
+    Args:
+        path: A list of locations, such as one returned by find_path_to_edge, starting where the unit is spawned
+        speed: The unit's speed, as in the config
+
+    Returns:
+        An array of the tile index (see board.py) the unit attacks from in every frame, first frame first,
+        and True if it leaves the board by reaching its edge, False if it self destructs.
+
+    """
+    frames = array("l")
+    if not path or speed <= 0:
+        return frames, False
+    indices = [tile_index(location) for location in path]
+    edge = set(EDGE_TILES[target_edge(indices[0])])
+    progress = 0
+    position = 0
+    while True:
+        progress += speed
+        if progress >= 1:
+            progress -= 1
+            if position + 1 >= len(indices):
+                return frames, False
+            position += 1
+            if indices[position] in edge:
+                return frames, True
+        frames.append(indices[position])
+
+
+class InterceptionPlanner:
+    """Finds where to spawn interceptors so they meet the enemy's predicted attacks, from every spawn location at once.
+
+    Both the interceptors and the enemy's units walk their paths frame by frame, see path_timeline,
+    and the interceptors can only fire on a frame where the enemy unit is in their attack range.
+    For each enemy wave, every tile is given an int whose bits are the frames in which the wave is
+    in range of that tile. Checking a spawn location is then one bit test per frame of its own
+    timeline, so all the edge locations are compared in one pass over short lists of ints. The
+    timelines of the interceptors are worked out once per spawn location.
+
+    Paths are taken as they are at the start of the action phase, and the interceptors are
+    assumed to live as long as their path lasts.
+
+    Attributes :
+        * game_state (:obj: GameState): The board the interceptors are planned on
+        * unit_type (str): The type of the intercepting units, INTERCEPTOR by default
+
+    """
+    def __init__(self, game_state, unit_type=None):
+        """Sets up the planner
+
+        Args:
+            game_state: The GameState to plan on
+            unit_type: Optional, the type of the intercepting units
+
+        """
+        self.game_state = game_state
+        unit_information = game_state.config["unitInformation"]
+        self.unit_type = unit_type or unit_information[5]["shorthand"]
+        self.__speeds = {unit.get("shorthand"): unit.get("speed", 0) for unit in unit_information}
+        self.__hit_radius = hit_radius(game_state.config)
+        self.__attack_range = [unit for unit in unit_information if unit.get("shorthand") == self.unit_type][0].get("attackRange", 0)
+        # spawn location -> timeline of an interceptor spawned there
+        self.__timelines = {}
+
+    def default_spawns(self):
+        """Gets the edge locations on your side that are not blocked by a structure
+        """
+        game_map = self.game_state.game_map
+        locations = game_map.get_edge_locations(game_map.BOTTOM_LEFT) + game_map.get_edge_locations(game_map.BOTTOM_RIGHT)
+        return [location for location in locations if not self.game_state.contains_stationary_unit(location)]
+
+    def timeline(self, location):
+        """Gets the timeline of an interceptor spawned on a location, see path_timeline
+
+        Args:
+            location: The spawn location
+
+        Returns:
+            The array of tile indices from path_timeline, None if the location is blocked
+
+        """
+        key = (int(location[0]), int(location[1]))
+        if key not in self.__timelines:
+            path = None
+            if not self.game_state.contains_stationary_unit(location):
+                path = self.game_state.find_path_to_edge(location)
+            self.__timelines[key] = path_timeline(path, self.__speeds[self.unit_type])[0] if path else None
+        return self.__timelines[key]
+
+    def __reach(self, frames):
+        """For every tile in range of a timeline, the frames in which it is in range as the bits of an int
+        """
+        reach = {}
+        for frame, index in enumerate(frames):
+            bit = 1 << frame
+            for tile in tiles_in_range(index, self.__attack_range, self.__hit_radius):
+                reach[tile] = reach.get(tile, 0) | bit
+        return reach
+
+    def intercepts(self, path, unit_type, spawns=None):
+        """Works out when interceptors from every spawn location get an enemy wave in range
+
+        Args:
+            path: The path of the enemy wave, such as one returned by find_path_to_edge
+            unit_type: The type of the enemy units, such as SCOUT
+            spawns: Optional, the locations to try. Every unblocked edge location on your side if None.
+
+        Returns:
+            A list of dicts, one for each unblocked spawn location, with the keys location, frame, the first frame
+            the wave is in range, None if it never is, frames, the number of frames it is in range, and meets, where
+            the interceptors are on the first frame.
+
+        """
+        enemy_frames = path_timeline(path, self.__speeds[unit_type])[0]
+        reach = self.__reach(enemy_frames)
+        results = []
+        for location in self.default_spawns() if spawns is None else spawns:
+            frames = self.timeline(location)
+            if frames is None:
+                continue
+            first = None
+            count = 0
+            for frame in range(min(len(frames), len(enemy_frames))):
+                if reach.get(frames[frame], 0) >> frame & 1:
+                    count += 1
+                    if first is None:
+                        first = frame
+            results.append({
+                "location": list(location),
+                "frame": first,
+                "frames": count,
+                "meets": tile_location(frames[first]) if first is not None else None,
+            })
+        return results
+
+    def best_spawns(self, waves, spawns=None):
+        """Ranks spawn locations by how long their interceptors have the enemy's predicted waves in range
+
+        Args:
+            waves: A list of [path, unit_type, weight] of the enemy waves to defend against, weight being
+                for example the chance of the wave, as OpponentModel.predict gives it
+            spawns: Optional, the locations to try. Every unblocked edge location on your side if None.
+
+        Returns:
+            A list of dicts with the keys location, score, the weighted number of frames the waves are in range,
+            and frame, the first frame any wave is in range, None if none is. Sorted by score and then by frame,
+            best first.
+
+        """
+        if spawns is None:
+            spawns = self.default_spawns()
+        scores = {}
+        for path, unit_type, weight in waves:
+            for result in self.intercepts(path, unit_type, spawns):
+                key = tuple(result["location"])
+                score = scores.setdefault(key, {"location": result["location"], "score": 0, "frame": None})
+                score["score"] += weight * result["frames"]
+                if result["frame"] is not None and (score["frame"] is None or result["frame"] < score["frame"]):
+                    score["frame"] = result["frame"]
+        results = list(scores.values())
+        results.sort(key=lambda result: (-result["score"], result["frame"] is None, result["frame"] or 0))
+        return results
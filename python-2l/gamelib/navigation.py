@@ -2,7 +2,9 @@ import heapq
 import math
 import sys
 import queue
+from collections import deque
 from .util import debug_write
+from .board import ARENA_SIZE, EDGE_DIRECTIONS, IDEALNESS
 
 class Node:
     """A path-finding node
@@ -52,13 +54,14 @@ class ShortestPathFinder:
         self.game_state = game_state
         self.game_map = [[Node() for x in range(self.game_state.ARENA_SIZE)] for y in range(self.game_state.ARENA_SIZE)]
 
-    def navigate_multiple_endpoints(self, start_point, end_points, game_state):
+    def navigate_multiple_endpoints(self, start_point, end_points, game_state, previous_move_direction=0):
         """Finds the path a unit would take to reach a set of endpoints
 
         Args:
             * start_point: The starting location of the unit
             * end_points: The end points of the unit, should be a list of edge locations
             * game_state: The current game state
+            * previous_move_direction: HORIZONTAL or VERTICAL if the unit is already moving, used to break ties between equally short steps
 
         Returns:
             The path a unit at start_point would take when trying to reach end_points given the current game state.
@@ -77,35 +80,47 @@ class ShortestPathFinder:
         #Do pathfinding
         ideal_endpoints = self._idealness_search(start_point, end_points)
         self._validate(ideal_endpoints, end_points)
-        return self._get_path(start_point, end_points)
+        return self._get_path(start_point, end_points, previous_move_direction)
 
     def _idealness_search(self, start, end_points):
         """
         Finds the most ideal tile in our 'pocket' of pathable space. 
-        The edge if it is available, or the best self destruct location otherwise
+        The edge if it is available, or the best self destruct location otherwise.
+        PocketMap in pockets.py answers the same question for every tile at once.
         """
-        current = queue.Queue()
-        current.put(start)
-        best_idealness = self._get_idealness(start, end_points)
+        # returning the end point itself, so _validate finds it in end_points
+        end_set = {(location[0], location[1]): location for location in end_points}
+        if (start[0], start[1]) in end_set:
+            return end_set[start[0], start[1]]
+        # the edge's idealness table, so the direction of the edge is only worked out once
+        idealness = IDEALNESS[EDGE_DIRECTIONS.index(tuple(self._get_direction_from_endpoints(end_points)))]
+
+        current = deque([start])
+        best_idealness = idealness[start[1] * ARENA_SIZE + start[0]]
         self.game_map[start[0]][start[1]].visited_idealness = True
         most_ideal = start
 
-        while not current.empty():
-            search_location = current.get()
+        while current:
+            search_location = current.popleft()
             for neighbor in self._get_neighbors(search_location):
-                if not self.game_state.game_map.in_arena_bounds(neighbor) or self.game_map[neighbor[0]][neighbor[1]].blocked:
+                if not self.game_state.game_map.in_arena_bounds(neighbor):
                     continue
-
                 x, y = neighbor
-                current_idealness = self._get_idealness(neighbor, end_points)
+                node = self.game_map[x][y]
+                if node.blocked or node.visited_idealness:
+                    continue
+
+                # every reachable edge location is equally ideal, so the search can stop at the first one
+                if (x, y) in end_set:
+                    return end_set[x, y]
 
+                current_idealness = idealness[y * ARENA_SIZE + x]
                 if current_idealness > best_idealness:
                     best_idealness = current_idealness
                     most_ideal = neighbor
 
-                if not self.game_map[x][y].visited_idealness and not self.game_map[x][y].blocked:
-                    self.game_map[x][y].visited_idealness = True
-                    current.put(neighbor)
+                node.visited_idealness = True
+                current.append(neighbor)
 
         return most_ideal
 
@@ -194,14 +209,13 @@ class ShortestPathFinder:
         #self.print_map()
         return
 
-    def _get_path(self, start_point, end_points):
+    def _get_path(self, start_point, end_points, move_direction=0):
         """Once all nodes are validated, and a target is found, the unit can path to its target
 
         """
         #GET THE PATH
         path = [start_point]
         current = start_point
-        move_direction = 0
 
         while not self.game_map[current[0]][current[1]].pathlength == 0:
             #debug_write("current tile {} has cost {}".format(current, self.game_map[current[0]][current[1]].pathlength))
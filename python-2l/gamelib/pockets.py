@@ -0,0 +1,141 @@
+from array import array
+
+from .board import ARENA_SIZE, HALF_ARENA, TILE_COUNT, ARENA_TILES, NEIGHBORS, EDGE_TILES, IDEALNESS, tile_index, tile_location
+
+# For every tile, the edge it is on, -1 if it is not on an edge
+EDGE_OF = array("b", [-1]) * TILE_COUNT
+for _edge, _tiles in enumerate(EDGE_TILES):
+    for _index in _tiles:
+        EDGE_OF[_index] = _edge
+
+
+def label_pockets(blocked):
+    """Numbers the connected groups of open tiles (pockets) of a board
+
+    Args:
+        blocked: For every tile index, true if a structure is on it
+
+    Returns:
+        labels, an array of the pocket number of every tile, 0 for blocked tiles and tiles outside the arena,
+        ends, for every pocket number a list of the pocket's most ideal tile for each edge (see IDEALNESS in board.py),
+        or -1 for the edges the pocket touches, and sizes, for every pocket number the number of tiles in it.
+        ends and sizes hold None for pocket number 0.
+
+    """
+    labels = array("l", [0]) * TILE_COUNT
+    ends = [None]
+    sizes = [None]
+    for index in ARENA_TILES:
+        if blocked[index] or labels[index]:
+            continue
+        label = len(ends)
+        labels[index] = label
+        pocket = [index]
+        touches = set()
+        for tile in pocket:
+            if EDGE_OF[tile] != -1:
+                touches.add(EDGE_OF[tile])
+            for neighbor in NEIGHBORS[tile]:
+                if not blocked[neighbor] and not labels[neighbor]:
+                    labels[neighbor] = label
+                    pocket.append(neighbor)
+        ends.append([-1 if edge in touches else max(pocket, key=IDEALNESS[edge].__getitem__) for edge in range(4)])
+        sizes.append(len(pocket))
+    return labels, ends, sizes
+
+
+def target_edge(index):
+    """Same as GameState.get_target_edge, on a tile index
+    """
+    left = index % ARENA_SIZE < HALF_ARENA
+    bottom = index // ARENA_SIZE < HALF_ARENA
+    if left:
+        return 0 if bottom else 3
+    return 1 if bottom else 2
+
+
+class PocketMap:
+    """Splits the open tiles of the board into pockets, groups of tiles units can walk between, once.
+
+    A unit that cannot reach its target edge walks to the most ideal tile of its pocket and self
+    destructs there, see ShortestPathFinder._idealness_search. Since every tile of a pocket ends at
+    the same place, labelling the pockets once answers where a unit spawned on any tile ends up
+    without searching the board again. Edges are numbered as in GameMap: TOP_RIGHT, TOP_LEFT,
+    BOTTOM_LEFT and BOTTOM_RIGHT. The map is not updated when structures are added or removed.
+
+    Attributes :
+        * labels (array): For every tile index, the number of its pocket, 0 for blocked tiles, see board.py
+        * count (int): The number of pockets
+
+    """
+    def __init__(self, game_state):
+        """Labels the pockets of the board of game_state
+
+        Args:
+            game_state: The GameState to analyse
+
+        """
+        blocked = bytearray(TILE_COUNT)
+        for index in ARENA_TILES:
+            if game_state.contains_stationary_unit(tile_location(index)):
+                blocked[index] = 1
+        self.labels, self.__ends, self.__sizes = label_pockets(blocked)
+        self.count = len(self.__ends) - 1
+
+    def __lookup(self, location, target_edge_index):
+        index = tile_index(location)
+        label = self.labels[index]
+        if not label:
+            return 0, -1
+        if target_edge_index is None:
+            target_edge_index = target_edge(index)
+        return label, self.__ends[label][target_edge_index]
+
+    def pocket(self, location):
+        """Gets the pocket of a location
+
+        Args:
+            location: The location to check
+
+        Returns:
+            The number of the location's pocket, 0 if there is a structure on it
+
+        """
+        return self.labels[tile_index(location)]
+
+    def size(self, location):
+        """Gets the number of tiles in the pocket of a location, 0 if there is a structure on it
+        """
+        label = self.labels[tile_index(location)]
+        return self.__sizes[label] if label else 0
+
+    def reaches_edge(self, location, target_edge=None):
+        """Checks if a unit at a location can reach its target edge
+
+        Args:
+            location: The location of a hypothetical unit
+            target_edge: The edge the unit wants to reach. Induced from location if None, as in find_path_to_edge.
+
+        Returns:
+            True if the unit can reach the edge, False if it would self destruct or there is a structure on the location
+
+        """
+        label, end = self.__lookup(location, target_edge)
+        return label != 0 and end == -1
+
+    def self_destruct_location(self, location, target_edge=None):
+        """Gets where a unit at a location self destructs if it cannot reach its target edge
+
+        Args:
+            location: The location of a hypothetical unit
+            target_edge: The edge the unit wants to reach. Induced from location if None, as in find_path_to_edge.
+
+        Returns:
+            The last location of the unit's path when it cannot reach the edge, the same as find_path_to_edge.
+            None if it can reach the edge or there is a structure on the location.
+
+        """
+        label, end = self.__lookup(location, target_edge)
+        if not label or end == -1:
+            return None
+        return tile_location(end)
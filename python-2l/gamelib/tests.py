@@ -1,7 +1,23 @@
 import unittest
 import json
+import os
+import tempfile
 from .game_state import GameState
 from .unit import GameUnit
+from .opening_book import OpeningBook, board_digest, gamelib_digest
+from .ledger import DamageLedger
+from .opponent_model import OpponentModel
+from .resource_planner import ResourcePlanner
+from .simulator import Simulator, flip_frame
+from .criticality import CriticalityMap
+from .pockets import PocketMap
+from .targeting import TargetingEngine
+from .shield_map import ShieldMap
+from .survival import SurvivalEstimator
+from .demolisher import DemolisherAnalyzer
+from .timeline import InterceptionPlanner, path_timeline
+from .placement import TurretOptimizer, SupportOptimizer
+from .board import hit_radius, tile_index, tile_location, tiles_in_range, tiles_in_range_by_distance
 
 class BasicTests(unittest.TestCase):
 
@@ -192,6 +208,18 @@ class BasicTests(unittest.TestCase):
         state.suppress_warnings(True)
         return state
 
+    def simulate_action_phase(self, game, deploys, enemy_deploys=()):
+        """Deploys units for both players on a board and returns the Simulator's frames, the deploy frame first
+        """
+        simulator = Simulator(game.config, game)
+        for player_index, units in enumerate([deploys, enemy_deploys]):
+            if units:
+                simulator.resources[player_index][1] = 100
+                simulator.deploy(player_index, units)
+        frames = []
+        simulator.run_action_phase(frames.append)
+        return frames
+
     def test_basic(self):
         self.assertEqual(True, True, "It's the end of the world as we know it, and I feel fine")
 
@@ -239,6 +267,11 @@ class BasicTests(unittest.TestCase):
         game = self.make_turn_0_map()
         self.assertEqual(1, len(game.game_map.get_locations_in_range([13,13], 0)), "We should be in 0 range of ourself")
         self.assertEqual(37, len(game.game_map.get_locations_in_range([13,13], 3.5)), "Wrong number of tiles in range")
+        for location, radius in [[[13, 13], 3.5], [[0, 13], 4.5], [[14, 0], 2]]:
+            tiles = tiles_in_range(tile_index(location), radius, hit_radius(game.config))
+            self.assertEqual(game.game_map.get_locations_in_range(location, radius), [tile_location(index) for index in tiles], "Tiles in range do not match get_locations_in_range")
+            groups = tiles_in_range_by_distance(tile_index(location), radius, hit_radius(game.config))
+            self.assertEqual(sorted(tiles), sorted(index for group in groups for index in group), "Groups should hold every tile in range")
 
     def _test_get_attackers(self):
         game = self.make_turn_0_map()
@@ -275,3 +308,416 @@ class BasicTests(unittest.TestCase):
         actual = game.project_future_MP(turns)
         self.assertAlmostEqual(actual, expected, 0, "Expected {} MP {} turns from now, got {}".format(expected, turns, actual))
 
+    def test_path_cache(self):
+        game = self.make_turn_0_map()
+        path = game.find_path_to_edge([13, 0])
+        self.assertEqual(path, game.find_path_to_edge([13, 0]), "Cached path differs from the computed one")
+        path[0][0] = -1
+        self.assertEqual([13, 0], game.find_path_to_edge([13, 0])[0], "Callers should not be able to change cached paths")
+        game.game_map.add_unit("FF", [13, 1], 0)
+        self.assertNotIn([13, 1], game.find_path_to_edge([13, 0]), "Path cache was not invalidated by a new structure")
+
+    def test_carry_forward(self):
+        game = self.make_turn_0_map()
+        turn_1 = json.loads(game.serialized_string)
+        turn_1["turnInfo"] = [0, 1, -1]
+        turn_1["p1Units"][0] = [[13, 6, 60.0, "1"], [14, 6, 60.0, "2"]]
+        turn_1["p2Units"][2] = [[13, 20, 75.0, "3"]]
+        first = GameState(game.config, json.dumps(turn_1), game)
+        self.assertEqual(3, len(first.board_delta["added"]), "New structures were not reported")
+        first.find_path_to_edge([13, 0])
+        first.get_attackers([13, 17], 0)
+        first.get_attackers([13, 4], 0)
+
+        turn_2 = json.loads(json.dumps(turn_1))
+        turn_2["turnInfo"] = [0, 2, -1]
+        turn_2["p1Units"][0][0][2] = 20.0
+        turn_2["p1Units"][6] = [[14, 6, 60.0, "2"]]
+        second = GameState(game.config, json.dumps(turn_2), first)
+        fresh = GameState(game.config, json.dumps(turn_2))
+        for x, y in [[13, 6], [14, 6], [13, 20]]:
+            carried, parsed = second.game_map[x, y][0], fresh.game_map[x, y][0]
+            self.assertEqual((carried.unit_type, carried.health, carried.pending_removal), (parsed.unit_type, parsed.health, parsed.pending_removal), "Carried unit differs from parsed unit")
+        self.assertIs(first.game_map[13, 20][0], second.game_map[13, 20][0], "Unchanged structure was rebuilt")
+        self.assertEqual([[13, 6]], second.board_delta["damaged"], "Damaged structure was not reported")
+        self.assertIn((13, 0, game.game_map.TOP_RIGHT), second._path_cache, "Path was not carried to an unchanged board")
+        self.assertIn((13, 17, 0), second._attackers_cache, "Attackers were not carried to an unchanged board")
+
+        turn_3 = json.loads(json.dumps(turn_2))
+        turn_3["turnInfo"] = [0, 3, -1]
+        turn_3["p2Units"][2] = []
+        third = GameState(game.config, json.dumps(turn_3), second)
+        self.assertEqual([[13, 20]], third.board_delta["removed"], "Removed structure was not reported")
+        self.assertNotIn((13, 0, game.game_map.TOP_RIGHT), third._path_cache, "Path was carried across a changed board")
+        self.assertNotIn((13, 17, 0), third._attackers_cache, "Attackers near a removed turret were carried")
+        self.assertIn((13, 4, 0), third._attackers_cache, "Attackers far from any change were not carried")
+        self.assertEqual([], third.get_attackers([13, 17], 0), "Removed turret is still attacking")
+
+    def test_damage_ledger(self):
+        config = self.make_turn_0_map().config
+        ledger = DamageLedger(config)
+        events = {"selfDestruct":[],"breach":[],"damage":[],"shield":[],"move":[],"spawn":[],"death":[],"attack":[],"melee":[]}
+        frame_0 = {"turnInfo":[1,1,0], "events":dict(events, spawn=[[[13, 27], 3, "5", 2], [[13, 27], 3, "6", 2], [[13, 6], 0, "7", 1]])}
+        frame_1 = {"turnInfo":[1,1,1], "events":dict(events, damage=[[[13, 6], 2.0, 0, "7", 1], [[13, 6], 2.0, 0, "7", 1]], breach=[[[13, 0], 1.0, 3, "5", 2]])}
+        ledger.consume(frame_0)
+        ledger.consume(json.dumps(frame_1))
+        self.assertEqual(4.0, ledger.damage_taken([13, 6]), "Structure damage was not added up")
+        self.assertEqual([[[13, 6], 4.0]], ledger.damaged_last_turn(), "Damaged structures were not listed")
+        self.assertEqual(1, ledger.breaches([13, 0], 1), "Breach was not counted")
+        self.assertEqual(2, ledger.spawn_count([13, 27], 1), "Spawns were not counted")
+        self.assertEqual([[[13, 27], 2]], ledger.favourite_spawns(1), "Favourite spawn location is wrong")
+        self.assertEqual([0, 1], ledger.attack_turns, "Attack turns were not counted")
+
+        frame_2 = {"turnInfo":[1,2,0], "events":dict(events, death=[[[13, 6], 0, "7", 1, False]])}
+        ledger.consume(frame_2)
+        self.assertEqual(0, ledger.damage_last_turn([13, 6]), "Damage of the last turn was not reset")
+        self.assertEqual(0, ledger.damage_taken([13, 6]), "Destroyed structure kept its damage")
+        self.assertEqual([0.0, 0.0], ledger.turn_mp_spent, "MP spent was not reset for the new turn")
+
+    def test_opponent_model(self):
+        game = self.make_turn_0_map()
+        model = OpponentModel(game.config, decay=0.5)
+        self.assertEqual([], model.predict(game), "An empty model should not predict attacks")
+        for turn, location in [(1, [13, 27]), (2, [13, 27]), (3, [5, 18])]:
+            spawns = [[location, 3, str(i), 2] for i in range(4)] + [[[13, 0], 3, "9", 1]]
+            model.consume({"turnInfo":[1,turn,0], "p2Stats":[30.0,25.0,1.0,0], "events":{"spawn":spawns}})
+        self.assertEqual(3, len(model.history), "Enemy spawns were not recorded")
+        self.assertEqual(5.0, model.expected_attack_mp(), "MP before spawning is wrong")
+        distribution = model.distribution()
+        self.assertEqual([5, 18], distribution[0][0], "The most recent attack should be the most likely")
+        self.assertAlmostEqual(1.0, sum(entry[2] for entry in distribution), msg="Probabilities do not add up to 1")
+
+        game.attempt_spawn("DF", [25, 12])
+        predictions = model.predict(game, 1)
+        self.assertEqual(1, len(predictions), "Prediction count is wrong")
+        self.assertEqual(game.find_path_to_edge([5, 18]), predictions[0]["path"], "Predicted path is wrong")
+        self.assertEqual(4, predictions[0]["units"], "Predicted group size is wrong")
+        self.assertTrue(predictions[0]["breach"], "Path on an empty board should reach the edge")
+        self.assertGreater(model.predict(game, 2)[1]["damage"], 0, "Turret next to the path did no damage")
+
+    def test_resource_planner(self):
+        game = self.make_turn_0_map()
+        planner = ResourcePlanner(game.config)
+        projection = planner.project(game, 3)
+        for turns in range(1, 4):
+            self.assertEqual(game.project_future_MP(turns), projection[turns - 1][0][1], "Projected MP differs from project_future_MP")
+            self.assertEqual(game.project_future_MP(turns, 1), projection[turns - 1][1][1], "Projected enemy MP differs from project_future_MP")
+        self.assertEqual(40, projection[2][0][0], "Projected SP is wrong")
+
+        waves, value = planner.plan_attacks(0, 5, lambda units: max(0, units - 7), horizon=4, discount=1)
+        self.assertEqual((0, 0, 0, 13), waves, "Waiting for the largest wave should be best")
+        self.assertEqual(6, value, "Value of the plan is wrong")
+        self.assertEqual(([], 0), planner.plan_attacks(0, 5, lambda units: units, max_choices=0), "Nothing should be planned without choices")
+        waves, _ = planner.plan_attacks(0, 5, lambda units: max(0, units - 7), horizon=4, max_choices=60, discount=1)
+        self.assertEqual(planner.horizon, len(waves), "The longest horizon finished within the choices should be planned")
+        self.assertLess(len(waves), 4)
+
+        builds = planner.plan_builds(3, [[2, 1], [1, 1], [2, 3], [6, 5]], 2)
+        self.assertEqual([[1, 2], [0]], builds, "Knapsack chose the wrong structures")
+
+    def test_simulator(self):
+        game = self.make_turn_0_map()
+        simulator = Simulator(game.config)
+        self.assertEqual(1, simulator.build(0, [["FF", 13, 10], ["FF", 13, 20]]), "Structures can only be built on your own half")
+        self.assertEqual(2, simulator.deploy(0, [["PI", 13, 0], ["PI", 13, 0], ["PI", 13, 5]]), "Mobile units can only be deployed on your own edges")
+
+        frames = []
+        simulator.run_action_phase(frames.append)
+        self.assertEqual(3, len(frames[0]["events"]["spawn"]), "Spawns should be reported in the first frame")
+        self.assertEqual(2, sum(len(frame["events"]["breach"]) for frame in frames), "Both units should have breached")
+        starting_health = game.config["resources"]["startingHP"]
+        self.assertEqual(starting_health - 2, simulator.health[1], "Breaches did not take health")
+        self.assertEqual([starting_health, starting_health], [frames[0]["p1Stats"][0], frames[0]["p2Stats"][0]], "Frame stats are wrong")
+
+        turn_frame = simulator.next_turn()
+        self.assertEqual(1, turn_frame["turnInfo"][1], "Turn number was not advanced")
+        starting_mp = game.config["resources"]["startingBits"]
+        self.assertEqual(game.project_future_MP(1, 0, starting_mp - 2), turn_frame["p1Stats"][2], "MP income differs from project_future_MP")
+        next_game = GameState(game.config, json.dumps(turn_frame))
+        self.assertEqual("FF", next_game.contains_stationary_unit([13, 10]).unit_type, "Structures should stay on the board")
+
+        flipped = flip_frame(frames[0])
+        self.assertEqual([[14, 17], 0, "1", 2], flipped["events"]["spawn"][0], "Spawn was not flipped")
+        self.assertEqual(frames[0]["p1Stats"], flipped["p2Stats"], "Stats were not swapped")
+        self.assertEqual(frames[0], flip_frame(flipped), "Flipping twice should give the same frame")
+
+    def test_criticality(self):
+        game = self.make_turn_0_map()
+        for x in range(28):
+            game.game_map.add_unit("FF", [x, 13], 0)
+        criticality = CriticalityMap(game)
+        self.assertEqual([], criticality.changes_if_destroyed([13, 5]), "An empty tile should not change any paths")
+        changes = [change for change in criticality.changes_if_destroyed([13, 13]) if change["player_index"] == 1]
+        self.assertEqual(len(criticality.starts[1]), criticality.new_breaches[1][tile_index([13, 13])], "Every enemy unit should breach through the gap")
+        self.assertTrue(all(change["new_breach"] for change in changes), "Walled off units should not breach before the gap opens")
+
+        game.game_map.remove_unit([13, 13])
+        for change in changes:
+            self.assertEqual(game.find_path_to_edge(change["start"]), change["path"], "Path through the gap is wrong")
+        self.assertGreaterEqual(criticality.most_critical(0, 1)[0][1], 1, "A wall holding back a breach should be critical")
+        self.assertEqual([], criticality.most_critical(1), "The enemy has no structures")
+
+    def test_pockets(self):
+        game = self.make_turn_0_map()
+        for x in range(28):
+            game.game_map.add_unit("FF", [x, 13], 0)
+        pockets = PocketMap(game)
+        self.assertEqual(2, pockets.count, "A full wall should split the board in two")
+        self.assertEqual(0, pockets.pocket([0, 13]), "Walls are not in a pocket")
+        self.assertNotEqual(pockets.pocket([13, 0]), pockets.pocket([13, 27]), "Tiles on either side of the wall should be in different pockets")
+        self.assertEqual(14 * 14 - 14, pockets.size([13, 0]), "Bottom pocket has the wrong size")
+        self.assertFalse(pockets.reaches_edge([13, 0]), "A walled off unit should not reach the edge")
+        self.assertTrue(pockets.reaches_edge([13, 0], game.game_map.BOTTOM_RIGHT), "A unit should reach an edge of its own pocket")
+        self.assertIsNone(pockets.self_destruct_location([13, 0], game.game_map.BOTTOM_RIGHT), "A unit that reaches the edge does not self destruct")
+        for location in [[13, 0], [20, 7], [3, 12]]:
+            self.assertEqual(game.find_path_to_edge(location)[-1], pockets.self_destruct_location(location), "Self destruct location does not match the path")
+
+    def test_targeting(self):
+        game = self.make_turn_0_map()
+        for location in [[13, 13], [14, 13], [10, 14], [13, 16], [16, 15]]:
+            game.game_map.add_unit("DF", location, 1)
+        for location in [[12, 12], [15, 11], [13, 10]]:
+            game.game_map.add_unit("DF", location, 0)
+        for location in [[13, 12], [13, 12], [14, 12], [12, 15], [14, 14]]:
+            game.game_map.add_unit("SI", location, 0)
+        game.game_map.add_unit("PI", [15, 14], 1)
+        attackers = [unit for location in game.game_map for unit in game.game_map[location]]
+        engine = TargetingEngine(game.config)
+        targets = engine.get_targets(game.game_map, attackers)
+        for unit, target in zip(attackers, targets):
+            self.assertIs(game.get_target(unit), target, "Target of unit at {} does not match get_target".format([unit.x, unit.y]))
+        turret = game.game_map[13, 13][0]
+        self.assertFalse(engine.get_target(turret).stationary, "Turret should target mobile units first")
+
+        game.game_map.remove_unit([13, 12])
+        self.assertIs(game.get_target(turret), engine.get_targets(game.game_map, [turret])[0], "Units were not sorted again after the map changed")
+
+    def test_shield_map(self):
+        game = self.make_turn_0_map()
+        game.config["unitInformation"][1].update({"shieldRange": 2, "shieldPerUnit": 3, "upgrade": {"shieldRange": 3, "shieldBonusPerY": 1}})
+        game.game_map.add_unit("EF", [13, 2], 0)
+        game.game_map.add_unit("EF", [13, 4], 0)
+        game.game_map[13, 4][0].upgrade()
+        game.game_map.add_unit("EF", [13, 25], 1)
+        shields = ShieldMap(game)
+        self.assertEqual(3, shields.shield_at([13, 0]), "Only the closer support should reach the edge")
+        self.assertEqual(3 + 3 + 4, shields.shield_at([13, 3]), "Upgraded support should give a bonus for each row forward")
+        self.assertEqual(3, shields.shield_at([13, 26], 1), "Enemy support bonus should count rows from the top")
+        self.assertEqual(0, shields.shield_at([13, 26], 0), "Enemy supports should not shield your units")
+        self.assertEqual(10, shields.path_shield([[13, 0], [13, 1], [13, 2], [13, 3], [13, 5]]), "Each support should shield a unit once")
+        self.assertEqual([[[13, 4], 7]], shields.supports_in_range([13, 7]), "Only the upgraded support reaches this far")
+
+    def test_survival(self):
+        game = self.make_turn_0_map()
+        for location in [[23, 14], [24, 15], [25, 15], [26, 14]]:
+            game.game_map.add_unit("DF", location, 1)
+        game.game_map.add_unit("FF", [22, 14], 1)
+        estimator = SurvivalEstimator(game)
+        path = game.find_path_to_edge([13, 0])
+        results = estimator.estimate(path, "PI", [1, 4, 8])
+        self.assertEqual([1, 4, 8], [result["units"] for result in results], "Every group size should be estimated")
+        self.assertEqual(0, results[0]["reached"], "A lone scout should not get past four turrets")
+        self.assertLess(results[1]["reached"], results[2]["reached"], "Larger groups should spread the turrets' fire")
+        for result in results:
+            frames = self.simulate_action_phase(game, [["PI", 13, 0]] * result["units"])
+            breaches = sum(len(frame["events"]["breach"]) for frame in frames)
+            self.assertEqual(breaches, result["reached"], "Estimate for {} units differs from the simulator".format(result["units"]))
+        self.assertEqual(estimator.estimate(path, "PI", 4), results[1], "A single group size should give a single dict")
+
+        best = estimator.best_spawns([[13, 0], [0, 13]], "PI", [4])
+        self.assertEqual(2, len(best), "Every spawn location should be estimated")
+        self.assertGreaterEqual(best[0]["reached"], best[1]["reached"], "Spawns should be sorted best first")
+
+    def test_demolisher(self):
+        game = self.make_turn_0_map()
+        for x in range(8, 20):
+            game.game_map.add_unit("FF", [x, 14], 1)
+        game.game_map.add_unit("DF", [4, 16], 1)
+        versions = game.game_map.version, game.game_map.structure_version
+        analyzer = DemolisherAnalyzer(game)
+        self.assertEqual(["EI", "FF"], [analyzer.unit_type, analyzer.line_type], "Demolishers and the cheapest structure should be the defaults")
+        line = [[x, 11] for x in range(27, 5, -1)]
+        result = analyzer.analyze(line, [24, 10], 3, budget=100)
+        self.assertEqual(versions, (game.game_map.version, game.game_map.structure_version), "The map versions should be restored")
+        self.assertFalse(game.contains_stationary_unit([10, 11]), "The line should be taken off the map")
+        self.assertEqual(20, len(result["line"]), "Only the line's locations in the arena should be built")
+        self.assertEqual([5, 11], result["crossing"], "The demolishers should walk around the end of the line")
+        self.assertFalse(result["leaks"])
+        self.assertTrue(all(location[1] == 10 for location, _ in result["positions"][:20]), "The demolishers should walk along the line")
+        self.assertEqual(result["damage"], sum(damage for _, damage in result["damaged"]), "Damage should add up over the structures hit")
+        self.assertIn([[4, 16], 12], result["in_range"])
+
+        for location in result["line"]:
+            game.game_map.add_unit("FF", location, 0)
+        frames = self.simulate_action_phase(game, [["EI", 24, 10]] * 3)
+        health = sum(unit[2] for units in frames[-1]["p2Units"][:3] for unit in units)
+        self.assertEqual(12 * 75 + game.config["unitInformation"][2]["startHealth"] - health, result["damage"], "Estimate differs from the simulator")
+        for location in result["line"]:
+            game.game_map.remove_unit(location)
+
+        short = analyzer.analyze(line, [24, 10], 3, budget=8)
+        self.assertEqual(8, short["cost"], "The line should be built until the budget runs out")
+        self.assertTrue(short["leaks"], "A line with a gap should leak")
+        results = analyzer.scan([[line, [24, 10]], [[[x, 11] for x in range(0, 22)], [3, 10]], [line, [25, 11]]], 3, 100)
+        self.assertEqual(2, len(results), "Blocked spawn locations should be left out")
+        self.assertGreaterEqual(results[0]["damage"], results[1]["damage"], "Lines should be sorted best first")
+
+    def test_timeline(self):
+        frames, breach = path_timeline([[13, 0], [13, 1], [13, 2]], 0.5)
+        self.assertEqual([13, 41, 41, 69, 69], list(frames), "A unit should move every other frame at speed 0.5")
+        self.assertFalse(breach, "A path that does not reach the edge should end in a self destruct")
+
+        game = self.make_turn_0_map()
+        planner = InterceptionPlanner(game)
+        path = game.find_path_to_edge([14, 27])
+        results = planner.intercepts(path, "PI")
+        self.assertEqual(28, len(results), "Every edge location should be tried on an empty board")
+        for result in results[::9]:
+            frames = self.simulate_action_phase(game, [["SI"] + result["location"]], [["PI", 14, 27]])
+            attacks = [number for number, frame in enumerate(frames) if any(event[6] == 1 for event in frame["events"]["attack"])]
+            # the first frame from the simulator is the deploy frame
+            self.assertEqual(attacks[0] - 1 if attacks else None, result["frame"], "Interception from {} differs from the simulator".format(result["location"]))
+
+        best = planner.best_spawns([[path, "PI", 0.75], [game.find_path_to_edge([0, 14]), "PI", 0.25]])
+        self.assertEqual(28, len(best))
+        self.assertGreater(best[0]["score"], 0, "Some edge location should meet the waves")
+        self.assertTrue(all(first["score"] >= second["score"] for first, second in zip(best, best[1:])), "Spawns should be sorted best first")
+
+    def test_turret_optimizer(self):
+        game = self.make_turn_0_map()
+        game.config["unitInformation"][3]["startHealth"] = 10000
+        path = game.find_path_to_edge([14, 27])
+        optimizer = TurretOptimizer(game.config)
+        plan = optimizer.plan(game, [[path, "PI", 1, 1]], budget=20)
+        self.assertEqual(0, plan["base"], "There are no turrets on the board yet")
+        self.assertTrue(plan["jobs"], "Some turret should be worth building")
+        self.assertLessEqual(sum(job["cost"] for job in plan["jobs"]), 20, "The plan should fit in the budget")
+        self.assertAlmostEqual(plan["damage"], sum(job["gain"] for job in plan["jobs"]), msg="Gains should add up to the damage")
+        self.assertTrue(all(tile_index(job["location"]) not in [tile_index(location) for location in path] for job in plan["jobs"]), "Turrets should not block the path")
+
+        for job in plan["jobs"]:
+            if job["type"] == "spawn":
+                game.game_map.add_unit("DF", job["location"], 0)
+            else:
+                game.contains_stationary_unit(job["location"]).upgrade()
+        frames = self.simulate_action_phase(game, [], [["PI", 14, 27]])
+        dealt = sum(event[2] for frame in frames for event in frame["events"]["attack"] if event[6] == 1)
+        self.assertEqual(dealt, plan["damage"], "Expected damage differs from the simulator")
+
+        game.config["unitInformation"][3]["startHealth"] = 15
+        capped = optimizer.plan(game, [[path, "PI", 0.5, 2]], budget=20)
+        self.assertEqual(0.5 * 2 * 15, capped["base"], "Damage should be capped at the wave's health, weighted by its chance")
+        self.assertEqual([], capped["jobs"], "Nothing is worth building once the wave is sure to die")
+
+    def test_support_optimizer(self):
+        game = self.make_turn_0_map()
+        path = game.find_path_to_edge([13, 0])
+        self.assertEqual([], SupportOptimizer(game.config).plan(game, path, 20)["jobs"], "Supports that do not shield are not worth building")
+
+        game.config["unitInformation"][1].update({"shieldRange": 3, "shieldPerUnit": 2, "shieldBonusPerY": 0.5})
+        game.config["unitInformation"][1]["upgrade"].update({"shieldRange": 5, "shieldPerUnit": 4, "cost1": 4})
+        game.game_map.add_unit("EF", [13, 3], 0)
+        optimizer = SupportOptimizer(game.config)
+        plan = optimizer.plan(game, path, 16)
+        self.assertEqual(3.5, plan["base"], "The support already on the board should count")
+        self.assertGreater(plan["jobs"][0]["location"][1], 3, "Supports further forward give more shield")
+        upgrade = optimizer.plan(game, path, 16, candidates=[])["jobs"]
+        self.assertEqual([["upgrade", [13, 3], 2]], [[job["type"], job["location"], job["gain"]] for job in upgrade], "Supports on the board can be upgraded")
+        self.assertLessEqual(sum(job["cost"] for job in plan["jobs"]), 16, "The plan should fit in the budget")
+        self.assertTrue(all(job["location"] not in path for job in plan["jobs"]), "Supports should not block the path")
+        ratios = [job["gain"] / job["cost"] for job in plan["jobs"]]
+        self.assertEqual(sorted(ratios, reverse=True), ratios, "Jobs should be chosen by shield per SP")
+
+        for job in plan["jobs"]:
+            if job["type"] == "spawn":
+                game.game_map.add_unit("EF", job["location"], 0)
+            else:
+                game.contains_stationary_unit(job["location"]).upgrade()
+        frames = self.simulate_action_phase(game, [["PI", 13, 0]])
+        shield = sum(event[2] for frame in frames for event in frame["events"]["shield"])
+        self.assertEqual(shield, plan["shield"], "Planned shield differs from the simulator")
+
+    def test_opening_book(self):
+        game = self.make_turn_0_map()
+        config = game.config
+        with tempfile.TemporaryDirectory() as directory:
+            book = OpeningBook(config, {"threshold": 1}, directory)
+            digest = board_digest(game.serialized_string, {"strategy": "defend"})
+            self.assertIsNone(book.lookup(digest), "An empty book should not have any plans")
+
+            game.find_path_to_edge([13, 0])
+            game.attempt_spawn("DF", [13, 6])
+            game.attempt_spawn("SI", [13, 0])
+            book.record(digest, game, {"strategy": "attack"})
+
+            reloaded = OpeningBook(config, {"threshold": 1}, directory)
+            entry = reloaded.lookup(digest)
+            self.assertIsNotNone(entry, "Recorded plan was not written to disk")
+            new_game = GameState(config, game.serialized_string)
+            self.assertEqual({"strategy": "attack"}, reloaded.apply(entry, new_game), "Strategy state was not restored")
+            self.assertEqual([("DF", 13, 6)], new_game._build_stack, "Build stack was not restored")
+            self.assertEqual([("SI", 13, 0)], new_game._deploy_stack, "Deploy stack was not restored")
+            self.assertIn((13, 0, new_game.game_map.TOP_RIGHT), new_game._path_cache, "Paths were not primed")
+
+            other = OpeningBook(config, {"threshold": 2}, directory)
+            self.assertIsNone(other.lookup(digest), "Books with different parameters should not share plans")
+            self.assertEqual(gamelib_digest(), gamelib_digest(), "The gamelib digest should only depend on the sources")
+            stale = OpeningBook(config, {"threshold": 1, "gamelib": gamelib_digest()}, directory)
+            self.assertIsNone(stale.lookup(digest), "Books made with another gamelib should not share plans")
+            self.assertFalse(OpeningBook(config, {"threshold": 1}, directory, enabled=False).covers(0), "A book that is off should not cover any turn")
+
+        environment = os.environ.get("OPENING_BOOK")
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                os.environ["OPENING_BOOK"] = directory
+                self.assertEqual(directory, os.path.dirname(OpeningBook(config).path), "Books should be stored where the environment says")
+                os.environ["OPENING_BOOK"] = "off"
+                self.assertFalse(OpeningBook(config).covers(0), "Books should be turned off by the environment")
+        finally:
+            if environment is None:
+                os.environ.pop("OPENING_BOOK", None)
+            else:
+                os.environ["OPENING_BOOK"] = environment
+
+    def test_transactions(self):
+        game = self.make_turn_0_map()
+        game.game_map.add_unit("DF", [10, 10], 0)
+        path = game.find_path_to_edge([13, 0])
+        cache = game._path_cache
+        resources = game.get_resources()
+        versions = game.game_map.version, game.game_map.structure_version
+
+        game.begin()
+        game.attempt_spawn("FF", [[13, 1], [14, 1]])
+        game.attempt_upgrade([10, 10])
+        game.attempt_spawn("PI", [13, 0], 2)
+        self.assertNotEqual(path, game.find_path_to_edge([13, 0]), "The path should go around the new walls")
+        game.begin()
+        game.attempt_remove([13, 1])
+        game.game_map.remove_unit([14, 1])
+        game.rollback()
+        self.assertTrue(game.contains_stationary_unit([14, 1]), "The inner rollback should only undo the inner changes")
+        self.assertEqual(3, len(game._build_stack), "The inner rollback should only undo the inner commands")
+        game.begin()
+        game.attempt_spawn("FF", [15, 1])
+        game.commit()
+        game.rollback()
+
+        self.assertEqual(resources, game.get_resources(), "Resources should be restored")
+        for location in [[13, 1], [14, 1], [15, 1]]:
+            self.assertFalse(game.contains_stationary_unit(location), "Structures should be removed")
+        self.assertEqual([], game.game_map[13, 0], "Mobile units should be removed")
+        turret = game.contains_stationary_unit([10, 10])
+        self.assertFalse(turret.upgraded, "Upgrades should be undone")
+        self.assertEqual(game.config["unitInformation"][2]["attackRange"], turret.attackRange)
+        self.assertEqual(([], []), (game._build_stack, game._deploy_stack), "Commands should be dropped")
+        self.assertEqual(versions, (game.game_map.version, game.game_map.structure_version), "Versions should be restored")
+        self.assertIs(cache, game._path_cache, "Paths cached before the transaction should be kept")
+        self.assertEqual(path, game.find_path_to_edge([13, 0]))
+
+        game.begin()
+        game.attempt_spawn("FF", [20, 6])
+        self.assertNotEqual(versions[0], game.game_map.version, "A changed board should get a new version")
+        game.commit()
+        self.assertTrue(game.contains_stationary_unit([20, 6]), "Committed changes should be kept")
+        self.assertIsNone(game._undo_log, "The undo log should be dropped once the last transaction ends")
@@ -43,6 +43,9 @@ class AlgoStrategy(gamelib.AlgoCore):
         SP = 0
         # This is a good place to do initial setup
         self.scored_on_locations = []
+        self.opponent_model = gamelib.OpponentModel(config)
+        self.turret_optimizer = gamelib.TurretOptimizer(config)
+        self.support_optimizer = gamelib.SupportOptimizer(config)
 
     def on_turn(self, turn_state):
         """
@@ -52,7 +55,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         unit deployments, and transmitting your intended deployments to the
         game engine.
         """
-        game_state = gamelib.GameState(self.config, turn_state)
+        game_state = self.make_game_state(turn_state)
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(game_state.turn_number))
         game_state.suppress_warnings(True)  #Comment or remove this line to enable warnings.
 
@@ -97,9 +100,8 @@ class AlgoStrategy(gamelib.AlgoCore):
                     best_location = self.least_damage_spawn_location(game_state, scout_spawn_location_options)
                     game_state.attempt_spawn(SCOUT, best_location, 1000)
 
-                # Lastly, if we have spare SP, let's build some supports
-                support_locations = [[13, 2], [14, 2], [13, 3], [14, 3]]
-                game_state.attempt_spawn(SUPPORT, support_locations)
+                # Lastly, if we have spare SP, let's build some supports where they shield our Scouts the most
+                self.build_supports(game_state)
 
     def build_defences(self, game_state):
         """
@@ -120,17 +122,62 @@ class AlgoStrategy(gamelib.AlgoCore):
         # upgrade walls so they soak more damage
         game_state.attempt_upgrade(wall_locations)
 
+    def build_supports(self, game_state):
+        """
+        Build supports and upgrades off our Scouts' path that give them the most shield per SP.
+        If supports do not shield in this config, build them at fixed locations.
+        """
+        scout_location = self.least_damage_spawn_location(game_state, [[13, 0], [14, 0]])
+        path = game_state.find_path_to_edge(scout_location)
+        jobs = []
+        if path:
+            jobs = self.support_optimizer.plan(game_state, path, candidates=self.non_edge_friendly_locations(game_state))["jobs"]
+        if not jobs:
+            support_locations = [[13, 2], [14, 2], [13, 3], [14, 3]]
+            game_state.attempt_spawn(SUPPORT, support_locations)
+        for job in jobs:
+            if job["type"] == "spawn":
+                game_state.attempt_spawn(SUPPORT, job["location"])
+            else:
+                game_state.attempt_upgrade(job["location"])
+
     def build_reactive_defense(self, game_state):
         """
         This function builds reactive defenses based on where the enemy scored on us from.
         We can track where the opponent scored by looking at events in action frames 
         as shown in the on_action_frame function
         """
+        # Once we have seen the enemy attack, place turrets where they deal the most damage to their likely next attacks,
+        # leaving the SP our own attack needs this turn
+        predictions = self.opponent_model.predict(game_state, 3, [3, 4])
+        if predictions:
+            waves = [[prediction["path"], self.config["unitInformation"][prediction["unit_type"]]["shorthand"], prediction["probability"], prediction["units"]] for prediction in predictions]
+            budget = max(0, game_state.get_resource(SP) - self.attack_sp_to_save(game_state))
+            plan = self.turret_optimizer.plan(game_state, waves, budget, self.non_edge_friendly_locations(game_state))
+            for job in plan["jobs"]:
+                if job["type"] == "spawn":
+                    game_state.attempt_spawn(TURRET, job["location"])
+                else:
+                    game_state.attempt_upgrade(job["location"])
+            return
+
         for location in self.scored_on_locations:
             # Build turret one space above so that it doesn't block our own edge spawn locations
             build_location = [location[0], location[1]+1]
             game_state.attempt_spawn(TURRET, build_location)
 
+    def attack_sp_to_save(self, game_state):
+        """
+        The SP the attack in starter_strategy needs after the defenses are built:
+        the open tiles of the cheapest demolisher line, or one support to shield our Scouts.
+        """
+        if game_state.turn_number < 5:
+            return 0
+        if self.detect_enemy_unit(game_state, unit_type=None, valid_x=None, valid_y=[14, 15]) > 10:
+            open_tiles = min(len(self.filter_blocked_locations(line, game_state)) for line, _ in self.demolisher_line_candidates())
+            return open_tiles * game_state.type_cost(self.cheapest_structure(game_state))[SP]
+        return game_state.type_cost(SUPPORT)[SP]
+
     def stall_with_interceptors(self, game_state):
         """
         Send out interceptors at random locations to defend our base from enemy moving units.
@@ -159,22 +206,44 @@ class AlgoStrategy(gamelib.AlgoCore):
         Build a line of the cheapest stationary unit so our demolisher can attack from long range.
         """
         # First let's figure out the cheapest unit
-        # We could just check the game rules, but this demonstrates how to use the GameUnit class
+        cheapest_unit = self.cheapest_structure(game_state)
+
+        # Now let's build out a line of stationary units. This will prevent our demolisher from running into the enemy base.
+        # Instead they will stay at the perfect distance to attack the front two rows of the enemy base.
+        # We keep the line the analyzer expects to do the most damage with the SP and MP we have left.
+        candidates = self.demolisher_line_candidates()
+        analyzer = gamelib.DemolisherAnalyzer(game_state, DEMOLISHER, cheapest_unit)
+        results = analyzer.scan(candidates)
+        line, spawn = candidates[2] if not results else [results[0]["line"], results[0]["spawn"]]
+        game_state.attempt_spawn(cheapest_unit, line)
+
+        # Now spawn demolishers next to the line
+        # By asking attempt_spawn to spawn 1000 units, it will essentially spawn as many as we have resources for
+        game_state.attempt_spawn(DEMOLISHER, spawn, 1000)
+
+    def cheapest_structure(self, game_state):
+        """
+        The cheapest stationary unit to build the demolisher line with.
+        We could just check the game rules, but this demonstrates how to use the GameUnit class
+        """
         stationary_units = [WALL, TURRET, SUPPORT]
         cheapest_unit = WALL
         for unit in stationary_units:
             unit_class = gamelib.GameUnit(unit, game_state.config)
             if unit_class.cost[game_state.MP] < gamelib.GameUnit(cheapest_unit, game_state.config).cost[game_state.MP]:
                 cheapest_unit = unit
+        return cheapest_unit
 
-        # Now let's build out a line of stationary units. This will prevent our demolisher from running into the enemy base.
-        # Instead they will stay at the perfect distance to attack the front two rows of the enemy base.
-        for x in range(27, 5, -1):
-            game_state.attempt_spawn(cheapest_unit, [x, 11])
-
-        # Now spawn demolishers next to the line
-        # By asking attempt_spawn to spawn 1000 units, it will essentially spawn as many as we have resources for
-        game_state.attempt_spawn(DEMOLISHER, [24, 10], 1000)
+    def demolisher_line_candidates(self):
+        """
+        The lines demolisher_line_strategy tries, as [line, spawn location]: a few rows from both sides,
+        with the demolishers spawned on the edge just behind the line's start.
+        """
+        candidates = []
+        for row in [10, 11, 12]:
+            candidates.append([[[x, row] for x in range(27, 5, -1)], [13 + row, row - 1]])
+            candidates.append([[[x, row] for x in range(0, 22)], [14 - row, row - 1]])
+        return candidates
 
     def least_damage_spawn_location(self, game_state, location_options):
         """
@@ -211,6 +280,15 @@ class AlgoStrategy(gamelib.AlgoCore):
                 filtered.append(location)
         return filtered
 
+    def non_edge_friendly_locations(self, game_state):
+        """
+        The locations on our half that are not on our edges, where structures can go
+        without blocking the locations we spawn our own units from
+        """
+        friendly_edges = game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_LEFT) + game_state.game_map.get_edge_locations(game_state.game_map.BOTTOM_RIGHT)
+        return [[x, y] for x in range(game_state.ARENA_SIZE) for y in range(game_state.HALF_ARENA)
+            if game_state.game_map.in_arena_bounds([x, y]) and [x, y] not in friendly_edges]
+
     def on_action_frame(self, turn_string):
         """
         This is the action frame of the game. This function could be called 
@@ -220,6 +298,8 @@ class AlgoStrategy(gamelib.AlgoCore):
         """
         # Let's record at what position we get scored on
         state = json.loads(turn_string)
+        # Remember where the enemy spawns their attacks
+        self.opponent_model.consume(state)
         events = state["events"]
         breaches = events["breach"]
         for breach in breaches:
@@ -14,6 +14,7 @@ class AlgoCore(object):
     """
     def __init__(self):
         self.config = None
+        self._previous_game_state = None
 
     def on_game_start(self, config):
         """
@@ -34,6 +35,17 @@ class AlgoCore(object):
         send_command("[]")
         send_command("[]")
     
+    def make_game_state(self, turn_state):
+        """
+        Builds the GameState for a turn string passed to on_turn. \n
+        The board is carried forward from the GameState this function returned on the previous turn,
+        so only the structures that changed are rebuilt, and paths and attackers that are still valid are kept.
+        The GameUnits of unchanged structures are shared with the previous GameState and updated in place.
+        """
+        game_state = GameState(self.config, turn_state, self._previous_game_state)
+        self._previous_game_state = game_state
+        return game_state
+
     def on_action_frame(self, action_frame_game_state):
         """
         After each deploy phase, the game engine will run the action phase of the round.
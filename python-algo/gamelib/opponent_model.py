@@ -0,0 +1,144 @@
+import json
+
+from .board import tile_index, tile_location
+
+
+class OpponentModel:
+    """Learns where and what the enemy spawns, and predicts their next attacks on your board.
+
+    Feed it every action frame from on_action_frame with consume(). The enemy's spawns are read
+    from the first frame of each action phase. Every location and unit type they have spawned
+    at gets a weight, which decays each time they attack so recent attacks count the most.
+
+    Attributes :
+        * decay (float): How much the weight of older spawns is kept each time the enemy attacks
+        * history (list): Every enemy spawn as [turn, location, unit type index, count, MP they had before spawning]
+        * attack_mp (list): The MP the enemy had on each turn they spawned mobile units
+
+    """
+    def __init__(self, config, decay=0.7):
+        """Sets up an empty model
+
+        Args:
+            config (JSON): The config passed to on_game_start
+            decay: How much the weight of older spawns is kept each time the enemy attacks
+
+        """
+        self.config = config
+        self.decay = decay
+        self.history = []
+        self.attack_mp = []
+        unit_information = config["unitInformation"]
+        self.__mobile = [unit.get("unitCategory") == 1 for unit in unit_information]
+        self.__mp_cost = [float(unit.get("cost2", 0)) for unit in unit_information]
+        self.__speed = [float(unit.get("speed", 1) or 1) for unit in unit_information]
+        # (tile index, unit type index) -> [weight, weighted count]
+        self.__weights = {}
+        self.__total = 0.0
+
+    def consume(self, frame):
+        """Records the enemy's spawns if the frame is the first of an action phase
+
+        Args:
+            frame: An action frame, either the string passed to on_action_frame or the parsed json
+
+        """
+        if isinstance(frame, str):
+            frame = json.loads(frame)
+        turn_info = frame["turnInfo"]
+        if int(turn_info[0]) != 1 or int(turn_info[2]) != 0:
+            return
+
+        groups = {}
+        spent = 0.0
+        for location, unit_type, _, player in (event[:4] for event in frame["events"].get("spawn", [])):
+            unit_type = int(unit_type)
+            if int(player) != 2 or not self.__mobile[unit_type]:
+                continue
+            key = (tile_index(location), unit_type)
+            groups[key] = groups.get(key, 0) + 1
+            spent += self.__mp_cost[unit_type]
+        if not groups:
+            return
+
+        turn = int(turn_info[1])
+        mp = float(frame["p2Stats"][2]) + spent
+        self.attack_mp.append(mp)
+        for weights in self.__weights.values():
+            weights[0] *= self.decay
+            weights[1] *= self.decay
+        self.__total *= self.decay
+        for (index, unit_type), count in sorted(groups.items()):
+            self.history.append([turn, tile_location(index), unit_type, count, mp])
+            weights = self.__weights.setdefault((index, unit_type), [0.0, 0.0])
+            weights[0] += 1
+            weights[1] += count
+            self.__total += 1
+
+    def distribution(self, unit_type_indices=None):
+        """Gets how likely the enemy is to use each spawn location next time they attack
+
+        Args:
+            unit_type_indices: Optional, only include spawns of these indices into config["unitInformation"]
+
+        Returns:
+            A list of [location, unit type index, probability, expected count] lists, most likely first
+
+        """
+        entries = [(key, weights) for key, weights in self.__weights.items() if unit_type_indices is None or key[1] in unit_type_indices]
+        total = sum(weights[0] for _, weights in entries)
+        result = []
+        for (index, unit_type), (weight, count) in entries:
+            result.append([tile_location(index), unit_type, weight / total, count / weight])
+        result.sort(key=lambda entry: (-entry[2], entry[0][1], entry[0][0], entry[1]))
+        return result
+
+    def expected_attack_mp(self):
+        """Gets the average MP the enemy had when they attacked, or None if they never did
+        """
+        if not self.attack_mp:
+            return None
+        return sum(self.attack_mp) / len(self.attack_mp)
+
+    def predict(self, game_state, count=3, unit_type_indices=None):
+        """Works out the paths and damage taken of the enemy's most likely next attacks against the current board
+
+        The paths are looked up through the GameState, so they are cached with the rest of its paths.
+        Damage is the damage your structures deal to the group while it walks its path, assuming
+        every attacker in range fires at it every frame.
+
+        Args:
+            game_state: The GameState for the current turn
+            count: The number of attacks to predict
+            unit_type_indices: Optional, only predict spawns of these indices into config["unitInformation"]
+
+        Returns:
+            A list of dicts with the keys location, unit_type, probability, units, path, damage and breach, most likely first.
+            breach is True if the path ends on your edge.
+
+        """
+        predictions = []
+        for location, unit_type, probability, units in self.distribution(unit_type_indices):
+            if len(predictions) >= count:
+                break
+            if game_state.contains_stationary_unit(location):
+                continue
+            target_edge = game_state.get_target_edge(location)
+            path = game_state.find_path_to_edge(location, target_edge)
+            if not path:
+                continue
+            frames_per_tile = 1 / self.__speed[unit_type]
+            damage = 0
+            for tile in path:
+                for attacker in game_state.get_attackers(tile, 1):
+                    damage += attacker.damage_i * frames_per_tile
+            predictions.append({
+                "location": location,
+                "unit_type": unit_type,
+                "probability": probability,
+                "units": units,
+                "path": path,
+                "damage": damage,
+                "breach": path[-1] in game_state.game_map.get_edge_locations(target_edge),
+            })
+        return predictions
@@ -0,0 +1,272 @@
+import heapq
+
+from .board import ARENA_SIZE, HALF_ARENA, ARENA_TILES, hit_radius, tile_index, tile_location, tiles_in_range
+from .shield_map import ShieldMap
+from .timeline import path_timeline
+
+class TurretOptimizer:
+    """Chooses where to build and upgrade turrets so they deal the most damage to the enemy's predicted attacks.
+
+    Every predicted wave walks its path frame by frame, see path_timeline, and a turret deals its
+    damage to the wave on every frame the wave is in its range. The tiles in range of every tile
+    are worked out once per attack range, see board.py, so the frames a wave spends in range of
+    every possible site are found by spreading the frames spent on each path tile over its range.
+    The damage a wave can take is capped at the health of all its units plus the shield they pick
+    up from the enemy's supports, and expected damage weighs each wave by its chance. Capped sums
+    like this have diminishing returns, so turrets and upgrades are chosen greedily by expected
+    damage per SP, lazily: a choice is only re-evaluated when it comes to the top of the queue.
+
+    Turrets already on the board count towards the damage dealt, and their upgrades are candidates
+    too. Sites on the predicted paths are left out, since building there would change the paths.
+    Turrets are assumed to survive the attacks, and paths to stay as they are.
+    The tiles in range are kept for the whole game.
+
+    Attributes :
+        * config (JSON): The game config
+        * turret_type (str): The shorthand of the turret
+
+    """
+    def __init__(self, config):
+        """Sets up the optimizer
+
+        Args:
+            config (JSON): The game config
+
+        """
+        self.config = config
+        unit_information = config["unitInformation"]
+        turret = unit_information[2]
+        upgrade = turret.get("upgrade", {})
+        self.turret_type = turret["shorthand"]
+        self.__hit_radius = hit_radius(config)
+        self.__types = {unit.get("shorthand"): unit for unit in unit_information}
+        # [attack range, damage to mobile units] of a turret and an upgraded turret
+        base = [turret.get("attackRange", 0), turret.get("attackDamageWalker", 0)]
+        self.__levels = [base, [upgrade.get("attackRange", base[0]), upgrade.get("attackDamageWalker", base[1])]]
+        self.__costs = [turret.get("cost1", 0), upgrade.get("cost1", turret.get("cost1", 0))]
+
+    def __coverage(self, frames_on, attack_range):
+        """For every tile, the frames a wave spends in range of a turret with the given range on it
+        """
+        coverage = {}
+        for tile, frames in frames_on.items():
+            for site in tiles_in_range(tile, attack_range, self.__hit_radius):
+                coverage[site] = coverage.get(site, 0) + frames
+        return coverage
+
+    def plan(self, game_state, waves, budget=None, candidates=None):
+        """Chooses the turrets and upgrades to build
+
+        Args:
+            game_state: The GameState for the current turn, turrets are placed for player 0
+            waves: A list of [path, unit_type, weight, units] of the enemy's predicted attacks, weight being for
+                example the chance of the attack and units the number of units in it, as OpponentModel.predict gives them
+            budget: Optional, the SP to spend. The SP held if None.
+            candidates: Optional, the locations turrets may be built on. Every tile on your side if None. Tiles that
+                are blocked or on the paths are always left out.
+
+        Returns:
+            A dict with the keys jobs, the turrets and upgrades to build in the order they were chosen, as dicts with
+            the keys type ("spawn" or "upgrade"), unit, location, cost and gain, the expected damage they add, damage,
+            the expected damage dealt with the jobs built, and base, the expected damage dealt by the turrets already
+            on the board.
+
+        """
+        if budget is None:
+            budget = game_state.get_resource(game_state.SP)
+        shield_map = ShieldMap(game_state)
+        weights = []
+        caps = []
+        coverage = []
+        on_paths = set()
+        for path, unit_type, weight, units in waves:
+            type_config = self.__types[unit_type]
+            frames_on = {}
+            for index in path_timeline(path, type_config.get("speed", 0))[0]:
+                frames_on[index] = frames_on.get(index, 0) + 1
+            weights.append(weight)
+            caps.append(units * (type_config.get("startHealth", 0) + shield_map.path_shield(path, 1)))
+            coverage.append([self.__coverage(frames_on, attack_range) for attack_range, _ in self.__levels])
+            on_paths.update(tile_index(location) for location in path)
+
+        def increments(index, level):
+            """The damage to every wave a turret on a tile adds by going up to a level, as [wave, damage]
+            """
+            result = []
+            for wave, (base, upgraded) in enumerate(coverage):
+                damage = self.__levels[level][1] * (base if level == 0 else upgraded).get(index, 0)
+                if level == 1:
+                    damage -= self.__levels[0][1] * base.get(index, 0)
+                if damage > 0:
+                    result.append([wave, damage])
+            return result
+
+        def gain(changes):
+            return sum(weights[wave] * (min(caps[wave], dealt[wave] + damage) - min(caps[wave], dealt[wave])) for wave, damage in changes)
+
+        dealt = [0] * len(waves)
+        queue = []
+        for index in ARENA_TILES:
+            if index // ARENA_SIZE >= HALF_ARENA:
+                continue
+            unit = game_state.contains_stationary_unit(tile_location(index))
+            if not unit or unit.player_index != 0 or unit.unit_type != self.turret_type:
+                continue
+            for wave, damage in increments(index, 0) + (increments(index, 1) if unit.upgraded else []):
+                dealt[wave] += damage
+            if not unit.upgraded:
+                queue.append([index, 1])
+        if candidates is None:
+            candidates = [index for index in ARENA_TILES if index // ARENA_SIZE < HALF_ARENA]
+        else:
+            candidates = [tile_index(location) for location in candidates]
+        queue += [[index, 0] for index in candidates if index not in on_paths and not game_state.contains_stationary_unit(tile_location(index))]
+        base_damage = sum(weight * min(cap, damage) for weight, cap, damage in zip(weights, caps, dealt))
+
+        # lazy greedy: the gains in the heap are upper bounds, since gains only shrink as damage is added
+        heap = []
+        for order, (index, level) in enumerate(queue):
+            changes = increments(index, level)
+            if changes:
+                heap.append((-gain(changes) / self.__costs[level], order, index, level, changes))
+        heapq.heapify(heap)
+        order = len(queue)
+        jobs = []
+        while heap:
+            _, number, index, level, changes = heapq.heappop(heap)
+            cost = self.__costs[level]
+            if cost > budget:
+                continue
+            value = gain(changes)
+            if value <= 0:
+                continue
+            if heap and -value / cost > heap[0][0]:
+                heapq.heappush(heap, (-value / cost, number, index, level, changes))
+                continue
+            for wave, damage in changes:
+                dealt[wave] += damage
+            budget -= cost
+            jobs.append({
+                "type": "spawn" if level == 0 else "upgrade",
+                "unit": self.turret_type,
+                "location": tile_location(index),
+                "cost": cost,
+                "gain": value,
+            })
+            if level == 0:
+                changes = increments(index, 1)
+                if changes:
+                    heapq.heappush(heap, (-gain(changes) / self.__costs[1], order, index, 1, changes))
+                    order += 1
+        return {
+            "jobs": jobs,
+            "damage": sum(weight * min(cap, damage) for weight, cap, damage in zip(weights, caps, dealt)),
+            "base": base_damage,
+        }
+
+
+class SupportOptimizer:
+    """Chooses where to build and upgrade supports so a planned attack picks up the most shield per SP.
+
+    A support shields every unit of a wave that comes within its shieldRange once, see ShieldMap,
+    so the shield a support gives a wave only depends on whether any tile the wave stands on is in
+    range. The tiles in range of the path, for the range of a support and of an upgraded support,
+    are found once from the same tiles in range TurretOptimizer uses, and then every site's shield is a
+    lookup. Supports and upgrades are chosen by shield per SP, an upgrade only once its support is
+    built or already on the board. Sites on the path are left out so the attack keeps its path.
+
+    Attributes :
+        * config (JSON): The game config
+        * support_type (str): The shorthand of the support
+
+    """
+    def __init__(self, config):
+        """Sets up the optimizer
+
+        Args:
+            config (JSON): The game config
+
+        """
+        self.config = config
+        unit_information = config["unitInformation"]
+        support = unit_information[1]
+        upgrade = support.get("upgrade", {})
+        self.support_type = support["shorthand"]
+        self.__hit_radius = hit_radius(config)
+        # [shield range, shield per unit, shield bonus per row forward] of a support and an upgraded support
+        base = [support.get("shieldRange", 0), support.get("shieldPerUnit", 0), support.get("shieldBonusPerY", 0)]
+        self.__levels = [base, [upgrade.get(key, value) for key, value in zip(["shieldRange", "shieldPerUnit", "shieldBonusPerY"], base)]]
+        self.__costs = [support.get("cost1", 0), upgrade.get("cost1", support.get("cost1", 0))]
+
+    def plan(self, game_state, path, budget=None, candidates=None):
+        """Chooses the supports and upgrades to build for an attack
+
+        Args:
+            game_state: The GameState for the current turn, supports are placed for player 0
+            path: The path of the attack, such as one returned by find_path_to_edge
+            budget: Optional, the SP to spend. The SP held if None.
+            candidates: Optional, the locations supports may be built on. Every tile on your side if None. Tiles that
+                are blocked or on the path are always left out.
+
+        Returns:
+            A dict with the keys jobs, the supports and upgrades to build in the order they were chosen, as dicts with
+            the keys type ("spawn" or "upgrade"), unit, location, cost and gain, the shield they add to each unit of the
+            attack, shield, the shield each unit picks up with the jobs built, and base, the shield each unit picks up
+            from the supports already on the board.
+
+        """
+        if budget is None:
+            budget = game_state.get_resource(game_state.SP)
+        # the tiles the units stand on at the start of a frame, every tile of the path but a breached edge
+        stood = set(path_timeline(path, 1)[0])
+        stood.add(tile_index(path[0]))
+        covered = [set(), set()]
+        for level, (radius, _, _) in enumerate(self.__levels):
+            if radius > 0:
+                for tile in stood:
+                    covered[level].update(tiles_in_range(tile, radius, self.__hit_radius))
+
+        def shield(index, level):
+            _, per_unit, per_row = self.__levels[level]
+            return per_unit + per_row * (index // ARENA_SIZE) if index in covered[level] else 0
+
+        base_shield = ShieldMap(game_state).path_shield([tile_location(index) for index in stood], 0)
+        on_path = set(tile_index(location) for location in path)
+        items = []
+        for index in ARENA_TILES:
+            if index // ARENA_SIZE >= HALF_ARENA:
+                continue
+            unit = game_state.contains_stationary_unit(tile_location(index))
+            if unit and unit.player_index == 0 and unit.unit_type == self.support_type and not unit.upgraded:
+                items.append([index, 1, shield(index, 1) - shield(index, 0)])
+        if candidates is None:
+            candidates = [index for index in ARENA_TILES if index // ARENA_SIZE < HALF_ARENA]
+        else:
+            candidates = [tile_index(location) for location in candidates]
+        items += [[index, 0, shield(index, 0)] for index in candidates if index not in on_path and not game_state.contains_stationary_unit(tile_location(index))]
+
+        heap = [(-value / self.__costs[level], order, index, level, value) for order, (index, level, value) in enumerate(items) if value > 0]
+        heapq.heapify(heap)
+        order = len(items)
+        jobs = []
+        total = base_shield
+        while heap:
+            _, _, index, level, value = heapq.heappop(heap)
+            cost = self.__costs[level]
+            if cost > budget:
+                continue
+            budget -= cost
+            total += value
+            jobs.append({
+                "type": "spawn" if level == 0 else "upgrade",
+                "unit": self.support_type,
+                "location": tile_location(index),
+                "cost": cost,
+                "gain": value,
+            })
+            if level == 0:
+                value = shield(index, 1) - shield(index, 0)
+                if value > 0:
+                    heapq.heappush(heap, (-value / self.__costs[1], order, index, 1, value))
+                    order += 1
+        return {"jobs": jobs, "shield": total, "base": base_shield}
@@ -36,13 +36,6 @@ class AlgoStrategy(gamelib.AlgoCore):
         SCOUT = config["unitInformation"][3]["shorthand"]
         DEMOLISHER = config["unitInformation"][4]["shorthand"]
         INTERCEPTOR = config["unitInformation"][5]["shorthand"]
-        # for frame analysis
-        self.mobile_unit_indices = [3, 4, 5]
-        self.costs = {
-            3: config["unitInformation"][3]["cost2"],
-            4: config["unitInformation"][4]["cost2"],
-            5: config["unitInformation"][5]["cost2"],
-        }
         MP = 1
         SP = 0
 
@@ -56,6 +49,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         self.enemy_rush_threshold = 7
         self.should_attack_left = True
         self.hole_exists = True
+        self.ledger = gamelib.DamageLedger(config)
 
     def on_turn(self, turn_state):
         """
@@ -65,7 +59,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         unit deployments, and transmitting your intended deployments to the
         game engine.
         """
-        game_state = gamelib.GameState(self.config, turn_state)
+        game_state = self.make_game_state(turn_state)
 
         self.starter_strategy(game_state)
         game_state.submit_turn()
@@ -227,6 +221,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         Full doc on format of a game frame at in json-docs.html in the root of the Starterkit.
         """
         state = json.loads(turn_string)
+        self.ledger.consume(state)
         if state["turnInfo"][0] == 1:
             if state["turnInfo"][2] == 0:
                 # analyse enemy turret structure
@@ -244,16 +239,7 @@ class AlgoStrategy(gamelib.AlgoCore):
                     self.should_attack_left = new_should_attack_left
             
                 # get the number of MPs that the opponent is using to spawn units, and adjust accordingly
-                new_threshold = min(
-                    self.enemy_rush_threshold, 
-                    sum(map(
-                        lambda spawn_action: self.costs[spawn_action[1]],
-                        filter(
-                            lambda spawn_action: spawn_action[3] == 2 and spawn_action[1] in self.mobile_unit_indices, 
-                            state["events"]["spawn"],
-                        ),
-                    )),
-                )
+                new_threshold = min(self.enemy_rush_threshold, self.ledger.turn_mp_spent[1])
                 if new_threshold > 0:
                     self.enemy_rush_threshold = new_threshold
 
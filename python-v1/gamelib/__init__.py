@@ -16,6 +16,48 @@ Investigating it is useful for advanced players interested in getting data from
 The Navigation class in navigation.py contains functions related to path-finding, which are used by GameState in pathing related functions. 
 Investigating it is useful for advanced player who want to optimize the slow default pathing algorithm we provide. \n 
 
+The OpeningBook class in opening_book.py stores the plans made on the first turns of a game on disk, keyed by a hash of the config. 
+Investigating it is useful for players who want to skip recomputing the same opening every game. \n
+
+The DamageLedger class in ledger.py keeps running totals of the damage, deaths, breaches and spawns seen in action frames. 
+Investigating it is useful for players who want on_turn to know what happened during the last action phases. \n
+
+The OpponentModel class in opponent_model.py learns where the enemy spawns their units and predicts the paths and damage of their next attacks. 
+Investigating it is useful for players who want to defend against what the enemy usually does. \n
+
+The ResourcePlanner class in resource_planner.py projects both players' MP and SP and plans when to save and when to spend them. 
+Investigating it is useful for players who want to replace fixed MP thresholds with a plan. \n
+
+The Simulator class in simulator.py plays out deploy and action phases the way the engine does, and flip_frame turns frames around for player 2. 
+Investigating it is useful for players who want to test moves or run whole matches without the engine. \n
+
+The CriticalityMap class in criticality.py works out, for every structure, how both players' paths would change if it were destroyed. 
+Investigating it is useful for players deciding which structures to repair, replace or refund. \n
+
+The PocketMap class in pockets.py labels the groups of tiles units can walk between, and where a unit spawned on any tile ends up. 
+Investigating it is useful for players who want to know which tiles are walled off without searching for every path. \n
+
+The TargetingEngine class in targeting.py finds the targets of every unit on a board at once, the same as GameState.get_target but faster. 
+Investigating it is useful for players who simulate action frames. \n
+
+The ShieldMap class in shield_map.py works out the shield mobile units pick up from supports on every tile and along a path. 
+Investigating it is useful for players choosing where to spawn their attacks. \n
+
+The SurvivalEstimator class in survival.py estimates how many units of a group reach the edge, and the damage they deal, for every spawn location and group size. 
+Investigating it is useful for players deciding where and how many units to send. \n
+
+The DemolisherAnalyzer class in demolisher.py works out the path, targets and damage of demolishers sent along a proposed line of structures. 
+Investigating it is useful for players who want to pick the best demolisher line every turn. \n
+
+The InterceptionPlanner class in timeline.py works out where units walking a path are on every frame, and which of your edge locations send interceptors that meet a predicted enemy wave. 
+Investigating it is useful for players choosing where to spawn interceptors. \n
+
+The TurretOptimizer class in placement.py chooses where to build and upgrade turrets so they deal the most damage to the enemy's predicted attacks, 
+and the SupportOptimizer class where to build and upgrade supports so your own attack picks up the most shield. 
+Investigating it is useful for players who want their structures to follow the attacks. \n
+
+board.py contains helpers for storing per-tile values in flat arrays. \n
+
 util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write().
 """
 
@@ -24,6 +66,19 @@ from .util import debug_write
 from .game_state import GameState
 from .unit import GameUnit
 from .game_map import GameMap
+from .ledger import DamageLedger
+from .opponent_model import OpponentModel
+from .resource_planner import ResourcePlanner
+from .simulator import Simulator, flip_frame
+from .opening_book import OpeningBook, board_digest, file_digest, gamelib_digest
+from .criticality import CriticalityMap
+from .pockets import PocketMap
+from .targeting import TargetingEngine
+from .shield_map import ShieldMap
+from .survival import SurvivalEstimator
+from .demolisher import DemolisherAnalyzer
+from .timeline import InterceptionPlanner, path_timeline
+from .placement import TurretOptimizer, SupportOptimizer
 
-__all__ = ["algocore", "game_state", "game_map", "navigation", "unit", "util"]
+__all__ = ["algocore", "board", "criticality", "demolisher", "game_state", "game_map", "ledger", "navigation", "opening_book", "opponent_model", "placement", "pockets", "resource_planner", "shield_map", "simulator", "survival", "targeting", "timeline", "unit", "util"]
  
\ No newline at end of file
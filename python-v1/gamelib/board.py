@@ -0,0 +1,131 @@
+"""
+Helpers for storing per-tile values in flat arrays instead of nested lists or dicts.
+A tile (x, y) is stored at index y * ARENA_SIZE + x.
+"""
+import math
+
+ARENA_SIZE = 28
+HALF_ARENA = ARENA_SIZE // 2
+TILE_COUNT = ARENA_SIZE * ARENA_SIZE
+
+
+def tile_index(location):
+    """Gets the flat array index of a location
+
+    Args:
+        location: A location [x, y]
+
+    Returns:
+        The index of the location in an array of TILE_COUNT values
+
+    """
+    return int(location[1]) * ARENA_SIZE + int(location[0])
+
+
+def tile_location(index):
+    """Gets the location stored at a flat array index
+
+    Args:
+        index: An index returned by tile_index
+
+    Returns:
+        The location [x, y]
+
+    """
+    return [index % ARENA_SIZE, index // ARENA_SIZE]
+
+
+def in_arena(x, y):
+    """Same as GameMap.in_arena_bounds, without needing a GameMap
+    """
+    row_size = y + 1 if y < HALF_ARENA else ARENA_SIZE - y
+    start_x = HALF_ARENA - row_size
+    return 0 <= y < ARENA_SIZE and start_x <= x < start_x + row_size * 2
+
+
+ARENA_TILES = [index for index in range(TILE_COUNT) if in_arena(index % ARENA_SIZE, index // ARENA_SIZE)]
+
+# For every tile, the indices of its neighbors inside the arena, in the order the pathfinder visits them: up, down, right, left
+NEIGHBORS = [
+    tuple(y2 * ARENA_SIZE + x2 for x2, y2 in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)) if in_arena(x2, y2))
+    for x, y in (tile_location(index) for index in range(TILE_COUNT))
+]
+
+# The tile indices of each edge, in the order of GameMap.get_edges: top right, top left, bottom left, bottom right
+EDGE_TILES = [
+    [(ARENA_SIZE - 1 - num) * ARENA_SIZE + HALF_ARENA + num for num in range(HALF_ARENA)],
+    [(ARENA_SIZE - 1 - num) * ARENA_SIZE + HALF_ARENA - 1 - num for num in range(HALF_ARENA)],
+    [num * ARENA_SIZE + HALF_ARENA - 1 - num for num in range(HALF_ARENA)],
+    [num * ARENA_SIZE + HALF_ARENA + num for num in range(HALF_ARENA)],
+]
+
+# The x and y direction units heading for each edge prefer, in the order of GameMap.get_edges
+EDGE_DIRECTIONS = [(1, 1), (-1, 1), (-1, -1), (1, -1)]
+
+# For each edge, how much a unit heading for that edge wants to reach each tile when it cannot reach the edge itself,
+# the same as ShortestPathFinder._get_idealness for tiles off the edge
+IDEALNESS = [
+    [ARENA_SIZE * (y if up else ARENA_SIZE - 1 - y) + (x if right else ARENA_SIZE - 1 - x) for x, y in (tile_location(index) for index in range(TILE_COUNT))]
+    for right, up in ((True, True), (False, True), (False, False), (True, False))
+]
+
+
+def hit_radius(config):
+    """Gets the getHitRadius of a config, the distance past a unit's range that its range still reaches
+    """
+    return config["unitInformation"][0].get("getHitRadius", 0.51)
+
+
+# (radius, hit radius) -> tile index -> tile indices in range, and the same grouped by distance
+_IN_RANGE = {}
+_BY_DISTANCE = {}
+
+
+def tiles_in_range(index, radius, hit_radius):
+    """Gets the tiles in range of a tile, the same as GameMap.get_locations_in_range. Worked out once per tile and range.
+
+    Args:
+        index: The tile index of the center
+        radius: The range, such as a unit's attackRange or shieldRange
+        hit_radius: The hit radius of the config, see hit_radius
+
+    Returns:
+        A list of tile indices, in the order get_locations_in_range lists the locations. Do not modify it.
+
+    """
+    tiles = _IN_RANGE.get((radius, hit_radius))
+    if tiles is None:
+        tiles = _IN_RANGE[(radius, hit_radius)] = [None] * TILE_COUNT
+    in_range = tiles[index]
+    if in_range is None:
+        x, y = index % ARENA_SIZE, index // ARENA_SIZE
+        search_radius = math.ceil(radius)
+        in_range = tiles[index] = [j * ARENA_SIZE + i for i in range(x - search_radius, x + search_radius + 1) for j in range(y - search_radius, y + search_radius + 1)
+            if in_arena(i, j) and math.sqrt((x - i)**2 + (y - j)**2) < radius + hit_radius]
+    return in_range
+
+
+def tiles_in_range_by_distance(index, radius, hit_radius):
+    """Gets the tiles in range of a tile grouped by distance, see tiles_in_range
+
+    Args:
+        index: The tile index of the center
+        radius: The range, such as a unit's attackRange or shieldRange
+        hit_radius: The hit radius of the config, see hit_radius
+
+    Returns:
+        A list of lists of tile indices at the same distance, closest first. Each list keeps the order of tiles_in_range,
+        so ties are broken the same way as get_target. Do not modify them.
+
+    """
+    tiles = _BY_DISTANCE.get((radius, hit_radius))
+    if tiles is None:
+        tiles = _BY_DISTANCE[(radius, hit_radius)] = [None] * TILE_COUNT
+    groups = tiles[index]
+    if groups is None:
+        x, y = index % ARENA_SIZE, index // ARENA_SIZE
+        by_distance = {}
+        for tile in tiles_in_range(index, radius, hit_radius):
+            by_distance.setdefault(math.sqrt((x - tile % ARENA_SIZE)**2 + (y - tile // ARENA_SIZE)**2), []).append(tile)
+        groups = tiles[index] = [by_distance[distance] for distance in sorted(by_distance)]
+    return groups
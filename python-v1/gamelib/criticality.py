@@ -0,0 +1,316 @@
+from array import array
+from collections import deque
+
+from .board import ARENA_SIZE, TILE_COUNT, ARENA_TILES, NEIGHBORS, EDGE_TILES, EDGE_DIRECTIONS, IDEALNESS, tile_index, tile_location
+from .pockets import label_pockets
+
+HORIZONTAL = 1
+VERTICAL = 2
+# The edges each player's units are spawned on
+PLAYER_EDGES = [(2, 3), (0, 1)]
+
+
+class CriticalityMap:
+    """Works out, for every structure on the board, how the paths of units spawned on either player's
+    edges would change if that one structure were destroyed.
+
+    Units spawned on an edge walk to the opposite edge, or to the most ideal tile they can reach if
+    the edge is blocked off, the same as find_path_to_edge. A distance field to each edge is found
+    once with a breadth first search. For each structure only the distances that removing it
+    shortens are searched again, and only the paths next to a tile that became as close to the
+    edge as the path's next step are walked again. Results are stored in flat arrays indexed by
+    tile, see board.py.
+
+    This does not reach the few milliseconds asked for a board of about 100 structures: building
+    the map takes about 4 ms on an empty board and 6 to 7 ms on a full one on a fast machine, and
+    up to twice that on a slow one. Most of it is walking the path of every start once, and again
+    for the starts next to each structure whose removal shortens a distance, which costs about as
+    much as the find_path_to_edge calls it replaces.
+
+    Starts are edge tiles without a structure, so an edge structure's death does not add a start.
+    Player indices are 0 for you and 1 for the enemy, as in GameState.
+
+    Attributes :
+        * starts (list): For each player, the tile indices of their edge tiles without a structure
+        * paths (dict): The current path, as a list of tile indices, of a unit spawned on each start
+        * new_breaches (list): For each player, the number of their starts that would only reach the opposite edge if the structure on a tile died
+        * changed_paths (list): For each player, the number of their paths that would change if the structure on a tile died
+        * length_change (list): For each player, the total change in the length of their paths if the structure on a tile died
+        * criticality (array): For each tile with a structure, new_breaches plus the fraction of changed paths of the opponent of the structure's owner
+
+    """
+    def __init__(self, game_state):
+        """Works out the paths on the board of game_state and how every structure changes them
+
+        Args:
+            game_state: The GameState to analyse
+
+        """
+        self.__blocked = bytearray(TILE_COUNT)
+        self.__owner = {}
+        for index in ARENA_TILES:
+            unit = game_state.contains_stationary_unit(tile_location(index))
+            if unit:
+                self.__blocked[index] = 1
+                self.__owner[index] = unit.player_index
+
+        self.__fields = [self.__edge_field(edge) for edge in range(4)]
+        self.__memos = [{} for _ in range(4)]
+        self.__labels, self.__ideals, _ = label_pockets(self.__blocked)
+        # (label, edge) -> [distance field to the pocket's most ideal tile, walks made on it]
+        self.__pockets = {}
+
+        self.starts = [[index for edge in PLAYER_EDGES[player] for index in EDGE_TILES[edge] if not self.__blocked[index]] for player in range(2)]
+        self.__players = {start: player for player in range(2) for start in self.starts[player]}
+        self.__edge_starts = [[] for _ in range(4)]
+        self.__targets = {}
+        self.paths = {}
+        # for each edge, tile index -> [start, the longest distance the tile can have and still change the start's path]
+        self.__watchers = [{} for _ in range(4)]
+        for player in range(2):
+            for edge in PLAYER_EDGES[player]:
+                target = (edge + 2) % 4
+                for start in EDGE_TILES[edge]:
+                    if self.__blocked[start]:
+                        continue
+                    field, memo = self.__path_field(start, target)
+                    self.paths[start] = self.__walk(start, field, target, memo)
+                    self.__edge_starts[target].append(start)
+                    self.__targets[start] = target
+                    self.__watch(start, field, self.__watchers[target])
+
+        self.new_breaches = [array("l", [0]) * TILE_COUNT for _ in range(2)]
+        self.changed_paths = [array("l", [0]) * TILE_COUNT for _ in range(2)]
+        self.length_change = [array("l", [0]) * TILE_COUNT for _ in range(2)]
+        self.criticality = array("d", [0.0]) * TILE_COUNT
+        # tile index -> [start, new path] for every path that changes if the structure on the tile dies
+        self.__changes = {}
+        for index in self.__owner:
+            self.__evaluate(index)
+
+    def __edge_field(self, edge):
+        """The distance from every tile to the closest open tile of the edge, -1 if it cannot be reached
+        """
+        field = array("l", [-1]) * TILE_COUNT
+        current = deque()
+        for index in EDGE_TILES[edge]:
+            if not self.__blocked[index]:
+                field[index] = 0
+                current.append(index)
+        self.__flood(field, current)
+        return field
+
+    def __flood(self, field, current):
+        """Breadth first search from the tiles in current, shortening the distances in field, returns the tiles that changed
+        """
+        blocked = self.__blocked
+        changed = []
+        while current:
+            index = current.popleft()
+            length = field[index] + 1
+            for neighbor in NEIGHBORS[index]:
+                if not blocked[neighbor] and (field[neighbor] == -1 or field[neighbor] > length):
+                    field[neighbor] = length
+                    changed.append(neighbor)
+                    current.append(neighbor)
+        return changed
+
+    def __path_field(self, start, edge):
+        """The distance field a unit spawned on start walks down to reach the edge on the current board, and the walks made on it
+        """
+        if self.__fields[edge][start] != -1:
+            return self.__fields[edge], self.__memos[edge]
+        key = (self.__labels[start], edge)
+        if key not in self.__pockets:
+            field = array("l", [-1]) * TILE_COUNT
+            ideal = self.__ideals[key[0]][edge]
+            field[ideal] = 0
+            self.__flood(field, deque([ideal]))
+            self.__pockets[key] = field, {}
+        return self.__pockets[key]
+
+    def __watch(self, start, field, watchers):
+        """Records the tiles whose distance can change the start's path.
+        A step only changes if a tile next to it becomes at least as close as the tile it steps to, or a tile on the path changes.
+        """
+        limits = {}
+        path = self.paths[start]
+        for index in path:
+            limit = field[index] - 1
+            for neighbor in NEIGHBORS[index]:
+                if limits.get(neighbor, -1) < limit:
+                    limits[neighbor] = limit
+        for index in path:
+            limits[index] = TILE_COUNT
+        for index, limit in limits.items():
+            entries = watchers.get(index)
+            if entries is None:
+                watchers[index] = [(start, limit)]
+            else:
+                entries.append((start, limit))
+
+    def __walk(self, start, field, edge, memo, move_direction=0):
+        """Walks from start down the distance field, choosing between equally short steps the way the pathfinder does.
+        memo holds the walks already made on the same field, a walk that reaches a tile one of them
+        left in the same direction follows it from there.
+        """
+        direction = EDGE_DIRECTIONS[edge]
+        blocked = self.__blocked
+        path = [start]
+        directions = [move_direction]
+        current = start
+        while field[current] != 0:
+            if (current, move_direction) in memo:
+                walked, position = memo[current, move_direction]
+                path.extend(walked[position + 1:])
+                break
+            best = current
+            best_length = field[current]
+            for neighbor in NEIGHBORS[current]:
+                if blocked[neighbor]:
+                    continue
+                length = field[neighbor]
+                if length > best_length:
+                    continue
+                if length == best_length and not self.__better_direction(current, neighbor, best, move_direction, direction):
+                    continue
+                best = neighbor
+                best_length = length
+            if best == current:
+                break
+            move_direction = VERTICAL if best % ARENA_SIZE == current % ARENA_SIZE else HORIZONTAL
+            path.append(best)
+            directions.append(move_direction)
+            current = best
+        for position, move_direction in enumerate(directions):
+            memo.setdefault((path[position], move_direction), (path, position))
+        return path
+
+    def __better_direction(self, previous, new, best, move_direction, direction):
+        """Same as ShortestPathFinder._better_direction, on tile indices
+        """
+        previous_x, previous_y = previous % ARENA_SIZE, previous // ARENA_SIZE
+        new_x, new_y = new % ARENA_SIZE, new // ARENA_SIZE
+        best_x, best_y = best % ARENA_SIZE, best // ARENA_SIZE
+        if move_direction == HORIZONTAL and new_x != best_x:
+            return previous_y != new_y
+        if move_direction == VERTICAL and new_y != best_y:
+            return previous_x != new_x
+        if move_direction == 0:
+            return previous_y != new_y
+        if new_y == best_y:
+            return (direction[0] == 1 and new_x > best_x) or (direction[0] == -1 and new_x < best_x)
+        if new_x == best_x:
+            return (direction[1] == 1 and new_y > best_y) or (direction[1] == -1 and new_y < best_y)
+        return True
+
+    def __affected(self, changed, field, watchers):
+        """The starts whose path can change because the distances of the changed tiles changed
+        """
+        affected = set()
+        for index in changed:
+            length = field[index]
+            for start, limit in watchers.get(index, ()):
+                if length <= limit:
+                    affected.add(start)
+        return affected
+
+    def __evaluate(self, removed):
+        """Finds the paths that change if the structure on the removed tile dies
+        """
+        self.__blocked[removed] = 0
+        # the groups of open tiles the removed tile joins together
+        touching = {self.__labels[neighbor] for neighbor in NEIGHBORS[removed] if not self.__blocked[neighbor]}
+        changes = []
+        for edge in range(4):
+            field = self.__fields[edge]
+            reached = [field[neighbor] for neighbor in NEIGHBORS[removed] if not self.__blocked[neighbor] and field[neighbor] != -1]
+            if reached or removed in EDGE_TILES[edge]:
+                # every pocket the removed tile touches joins the tiles that reach the edge
+                field = array("l", field)
+                field[removed] = 0 if removed in EDGE_TILES[edge] else min(reached) + 1
+                changed = [removed] + self.__flood(field, deque([removed]))
+                affected = self.__affected(changed, field, self.__watchers[edge])
+            elif any(self.__labels[start] in touching for start in self.__edge_starts[edge]):
+                # the pockets the removed tile touches become one pocket, which still cannot reach the edge
+                ideal = max([self.__ideals[label][edge] for label in touching] + [removed], key=IDEALNESS[edge].__getitem__)
+                label = next(iter(touching))
+                if len(touching) == 1 and ideal == self.__ideals[label][edge]:
+                    field = array("l", self.__pockets[label, edge][0])
+                    field[removed] = min(field[neighbor] for neighbor in NEIGHBORS[removed] if not self.__blocked[neighbor]) + 1
+                    changed = [removed] + self.__flood(field, deque([removed]))
+                    affected = self.__affected(changed, field, self.__watchers[edge])
+                else:
+                    field = array("l", [-1]) * TILE_COUNT
+                    field[ideal] = 0
+                    self.__flood(field, deque([ideal]))
+                    affected = {start for start in self.__edge_starts[edge] if self.__labels[start] in touching}
+            else:
+                continue
+
+            memo = {}
+            for start in sorted(affected):
+                path = self.__walk(start, field, edge, memo)
+                if path != self.paths[start]:
+                    changes.append((start, path))
+        self.__blocked[removed] = 1
+
+        for start, path in changes:
+            player = self.__players[start]
+            old = self.paths[start]
+            self.changed_paths[player][removed] += 1
+            self.length_change[player][removed] += len(path) - len(old)
+            if self.__breaches(start, path) and not self.__breaches(start, old):
+                self.new_breaches[player][removed] += 1
+        opponent = 1 - self.__owner[removed]
+        if self.starts[opponent]:
+            self.criticality[removed] = self.new_breaches[opponent][removed] + self.changed_paths[opponent][removed] / len(self.starts[opponent])
+        if changes:
+            self.__changes[removed] = changes
+
+    def __breaches(self, start, path):
+        """True if the path ends on the edge opposite the start
+        """
+        return path[-1] in EDGE_TILES[self.__targets[start]]
+
+    def changes_if_destroyed(self, location):
+        """Gets how the paths change if the structure at a location is destroyed
+
+        Args:
+            location: The location of a structure
+
+        Returns:
+            A list of dicts, one for each path that changes, with the keys start, player_index, path, end,
+            previous_end, length_change, breach and new_breach. breach is True if the new path reaches the
+            opposite edge and new_breach is True if the old path did not. An empty list if there is no structure at the location.
+
+        """
+        result = []
+        for start, path in self.__changes.get(tile_index(location), []):
+            old = self.paths[start]
+            result.append({
+                "start": tile_location(start),
+                "player_index": self.__players[start],
+                "path": [tile_location(index) for index in path],
+                "end": tile_location(path[-1]),
+                "previous_end": tile_location(old[-1]),
+                "length_change": len(path) - len(old),
+                "breach": self.__breaches(start, path),
+                "new_breach": self.__breaches(start, path) and not self.__breaches(start, old),
+            })
+        return result
+
+    def most_critical(self, player_index=0, count=5):
+        """Gets the structures of a player whose deaths would change the opponent's paths the most
+
+        Args:
+            player_index: The owner of the structures, 0 for you and 1 for the enemy
+            count: The number of structures to return
+
+        Returns:
+            A list of [location, criticality] lists, most critical first. Structures that change no paths are left out.
+
+        """
+        indices = [index for index, owner in self.__owner.items() if owner == player_index and self.criticality[index] > 0]
+        indices.sort(key=lambda index: (-self.criticality[index], index))
+        return [[tile_location(index), self.criticality[index]] for index in indices[:count]]
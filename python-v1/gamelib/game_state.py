@@ -44,15 +44,26 @@ class GameState:
         * my_time (int): The time you took to submit your previous turn
         * enemy_health (int): Your opponents current remaining health
         * enemy_time (int): Your opponents current remaining time
+        * board_delta (dict): The structures that changed since the previous GameState passed in, see __init__. None if there was none.
+
+    Changes can be tried out and undone with begin, rollback and commit, see begin.
 
     """
 
-    def __init__(self, config, serialized_string):
+    def __init__(self, config, serialized_string, previous=None):
         """ Setup a turns variables using arguments passed
 
+        If the GameState of an earlier turn is given, the board is carried forward from it
+        instead of being rebuilt. Structures that are unchanged, or only took damage, reuse
+        the previous GameUnit objects, and the paths and attackers found on the previous turn
+        start board are kept wherever the changes cannot have affected them. The changes are
+        stored in board_delta as lists of locations under "added", "removed", "damaged" and
+        "upgraded".
+
         Args:
             * config (JSON): A json object containing information about the game
             * serialized_string (string): A string containing information about the game state at the start of this turn
+            * previous (:obj: GameState): Optional, the GameState built from the previous turn's string. Its units are updated in place.
 
         """
         self.serialized_string = serialized_string
@@ -96,9 +107,29 @@ class GameState:
         self._player_resources = [
                 {'SP': 0, 'MP': 0},  # player 0, which is you
                 {'SP': 0, 'MP': 0}]  # player 1, which is the opponent
-        self.__parse_state(serialized_string)
-
-    def __parse_state(self, state_line):
+        # Structures as parsed from the turn string, keyed by location, used to carry the board into the next turn
+        self._parsed_structures = {}
+        self._parsed_mobile_units = False
+        self.board_delta = None
+        self.__parse_state(serialized_string, previous)
+
+        # Paths and attackers are cached until the map changes, see GameMap.version and GameMap.structure_version
+        self._path_cache = {}
+        self._path_cache_version = self.game_map.structure_version
+        self._turn_start_version = self.game_map.structure_version
+        self._turn_start_paths = {}
+        self._attackers_cache = {}
+        self._attackers_cache_version = self.game_map.version
+        self._turn_start_map_version = self.game_map.version
+        self._turn_start_attackers = {}
+        if self.board_delta is not None:
+            self.__carry_caches(previous)
+
+        # Undo entries of the open transactions as (function, arguments), and where each transaction starts, see begin
+        self._undo_log = None
+        self._savepoints = []
+
+    def __parse_state(self, state_line, previous=None):
         """
         Fills in map based on the serialized game state so that self.game_map[x,y] is a list of GameUnits at that location.
         state_line is the game state as a json string.
@@ -123,8 +154,22 @@ class GameState:
         p1units = state["p1Units"]
         p2units = state["p2Units"]
 
-        self.__create_parsed_units(p1units, 0)
-        self.__create_parsed_units(p2units, 1)
+        # Only an earlier turn of the same game can be carried forward
+        if previous is not None and (previous.config is not self.config or previous.turn_number >= self.turn_number):
+            previous = None
+
+        if previous is None:
+            self.__create_parsed_units(p1units, 0)
+            self.__create_parsed_units(p2units, 1)
+        else:
+            self.board_delta = {"added": [], "removed": [], "damaged": [], "upgraded": []}
+            self.__carry_parsed_units(p1units, 0, previous)
+            self.__carry_parsed_units(p2units, 1, previous)
+            for location, unit in previous._parsed_structures.items():
+                if self._parsed_structures.get(location) is not unit:
+                    self.board_delta["removed"].append(list(location))
+
+        self._parsed_upgrades = set(location for location, unit in self._parsed_structures.items() if unit.upgraded)
 
     def __create_parsed_units(self, units, player_number):
         """
@@ -148,6 +193,85 @@ class GameState:
                 else:
                     unit = GameUnit(unit_type, self.config, player_number, hp, x, y)
                     self.game_map[x,y].append(unit)
+                    if unit.stationary:
+                        self._parsed_structures[x, y] = unit
+                    else:
+                        self._parsed_mobile_units = True
+
+    def __carry_parsed_units(self, units, player_number, previous):
+        """
+        Helper function for __parse_state to add units to the map, reusing the previous turn's structures where they still match.
+        """
+        typedef = self.config.get("unitInformation")
+        removing = set()
+        upgrading = set()
+        for i, unit_types in enumerate(units):
+            unit_type = typedef[i].get("shorthand")
+            if unit_type == REMOVE or unit_type == UPGRADE:
+                locations = removing if unit_type == REMOVE else upgrading
+                for uinfo in unit_types:
+                    locations.add((int(uinfo[0]), int(uinfo[1])))
+
+        for i, unit_types in enumerate(units):
+            unit_type = typedef[i].get("shorthand")
+            if unit_type == REMOVE or unit_type == UPGRADE:
+                continue
+            for uinfo in unit_types:
+                sx, sy, shp = uinfo[:3]
+                x, y = map(int, [sx, sy])
+                hp = float(shp)
+                if not is_stationary(unit_type):
+                    self._parsed_mobile_units = True
+                    self.game_map[x,y].append(GameUnit(unit_type, self.config, player_number, hp, x, y))
+                    continue
+
+                upgraded = (x, y) in upgrading
+                unit = previous._parsed_structures.get((x, y))
+                # A unit the strategy upgraded last turn is only kept if the upgrade went through
+                if unit is not None and (unit.unit_type != unit_type or unit.player_index != player_number or (unit.upgraded and not upgraded)):
+                    unit = None
+
+                if unit is None:
+                    unit = GameUnit(unit_type, self.config, player_number, hp, x, y)
+                    if upgraded:
+                        unit.upgrade()
+                    self.board_delta["added"].append([x, y])
+                else:
+                    if upgraded and (x, y) not in previous._parsed_upgrades:
+                        if not unit.upgraded:
+                            unit.upgrade()
+                        self.board_delta["upgraded"].append([x, y])
+                    if unit.health != hp:
+                        unit.health = hp
+                        self.board_delta["damaged"].append([x, y])
+                unit.pending_removal = (x, y) in removing
+                self._parsed_structures[x, y] = unit
+                self.game_map[x,y].append(unit)
+
+    def __carry_caches(self, previous):
+        """
+        Helper function for __init__ to keep the previous turn start paths and attackers that the board_delta leaves valid.
+        Paths only depend on which tiles are blocked, and attackers only on the structures that can deal damage.
+        """
+        if not self.board_delta["added"] and not self.board_delta["removed"]:
+            self._path_cache = dict(previous._turn_start_paths)
+            self._turn_start_paths = dict(previous._turn_start_paths)
+
+        if self._parsed_mobile_units or previous._parsed_mobile_units:
+            return
+        max_range = 0
+        for unit_info in self.config["unitInformation"]:
+            max_range = max(max_range, unit_info.get("attackRange", 0), unit_info.get("upgrade", {}).get("attackRange", 0))
+        changed = []
+        for location in self.board_delta["added"] + self.board_delta["removed"] + self.board_delta["upgraded"]:
+            for unit in (self._parsed_structures.get(tuple(location)), previous._parsed_structures.get(tuple(location))):
+                if unit is not None and unit.damage_i + unit.damage_f > 0:
+                    changed.append(location)
+                    break
+        for key, attackers in previous._turn_start_attackers.items():
+            if not any(self.game_map.distance_between_locations(key[:2], location) <= max_range for location in changed):
+                self._attackers_cache[key] = attackers
+                self._turn_start_attackers[key] = attackers
 
     def __resource_required(self, unit_type):
         return self.SP if is_stationary(unit_type) else self.MP
@@ -163,8 +287,17 @@ class GameState:
         elif resource_type == self.SP:
             resource_key = 'SP'
         held_resource = self.get_resource(resource_type, player_index)
+        if self._undo_log is not None:
+            self._undo_log.append((self.__restore_resource, (player_index, resource_key, self._player_resources[player_index][resource_key])))
         self._player_resources[player_index][resource_key] = held_resource + amount
 
+    def __restore_resource(self, player_index, resource_key, amount):
+        self._player_resources[player_index][resource_key] = amount
+
+    def __restore_unit(self, unit, attributes):
+        unit.__dict__.clear()
+        unit.__dict__.update(attributes)
+
     def _invalid_player_index(self, index):
         self.warn("Invalid player index {} passed, player index should always be 0 (yourself) or 1 (your opponent)".format(index))
     
@@ -445,13 +578,72 @@ class GameState:
                     if resources[SP] >= costs[SP] and resources[MP] >= costs[MP]:
                         self.__set_resource(SP, 0 - costs[SP])
                         self.__set_resource(MP, 0 - costs[MP])
+                        if self._undo_log is not None:
+                            self._undo_log.append((self.__restore_unit, (existing_unit, dict(existing_unit.__dict__))))
                         existing_unit.upgrade()
+                        self.game_map._mark_changed(False)
                         self._build_stack.append((UPGRADE, x, y))
                         spawned_units += 1
             else:
                 self.warn("Could not upgrade a unit from {}. Location has no structures or is enemy territory.".format(location))
         return spawned_units
 
+    def begin(self):
+        """Starts a transaction, so the changes made from now on can be undone with rollback or kept with commit.
+
+        While a transaction is open, every change to the map, whether made through attempt_spawn,
+        attempt_remove and attempt_upgrade or directly through game_map, the resources held and the
+        commands queued for submit_turn are recorded in an undo log. rollback undoes them in reverse
+        order, so trying out a placement and undoing it costs as much as the placement itself and
+        nothing is copied. Transactions can be nested: each begin must be ended by a rollback or a
+        commit, which ends the transaction begun last.
+
+        A rollback puts the map versions back, together with the paths and attackers cached when the
+        transaction began, so they stay valid. Changes made to units in other ways, such as changing
+        their health, are not recorded.
+        """
+        if self._undo_log is None:
+            self._undo_log = []
+            self.game_map._undo_log = self._undo_log
+        self._savepoints.append((
+            len(self._undo_log),
+            len(self._build_stack),
+            len(self._deploy_stack),
+            (self.game_map.version, self.game_map.structure_version),
+            (self._path_cache, self._path_cache_version, self._attackers_cache, self._attackers_cache_version),
+        ))
+
+    def rollback(self):
+        """Undoes every change made since the last begin and ends its transaction, see begin
+        """
+        if not self._savepoints:
+            self.warn("Called rollback with no transaction open.")
+            return
+        mark, builds, deploys, versions, caches = self._savepoints.pop()
+        while len(self._undo_log) > mark:
+            undo, arguments = self._undo_log.pop()
+            undo(*arguments)
+        del self._build_stack[builds:]
+        del self._deploy_stack[deploys:]
+        self.game_map.version, self.game_map.structure_version = versions
+        self._path_cache, self._path_cache_version, self._attackers_cache, self._attackers_cache_version = caches
+        self.__end_transaction()
+
+    def commit(self):
+        """Keeps the changes made since the last begin and ends its transaction, see begin.
+        Inside another transaction, the changes can still be undone by rolling that one back.
+        """
+        if not self._savepoints:
+            self.warn("Called commit with no transaction open.")
+            return
+        self._savepoints.pop()
+        self.__end_transaction()
+
+    def __end_transaction(self):
+        if not self._savepoints:
+            self._undo_log = None
+            self.game_map._undo_log = None
+
     def get_target_edge(self, start_location):
         """Gets the target edge given a starting location
 
@@ -487,6 +679,9 @@ class GameState:
             A list of locations corresponding to the path the unit would take 
             to get from it's starting location to the best available end location
 
+        Paths are cached until a structure is added to or removed from the map, 
+        so asking for the same path twice in a turn is cheap.
+
         """
         if self.contains_stationary_unit(start_location):
             self.warn("Attempted to perform pathing from blocked starting location {}".format(start_location))
@@ -495,8 +690,19 @@ class GameState:
         if target_edge is None:
             target_edge = self.get_target_edge(start_location)
 
-        end_points = self.game_map.get_edge_locations(target_edge)
-        return self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
+        if self._path_cache_version != self.game_map.structure_version:
+            self._path_cache = {}
+            self._path_cache_version = self.game_map.structure_version
+
+        key = (int(start_location[0]), int(start_location[1]), target_edge)
+        path = self._path_cache.get(key)
+        if path is None:
+            end_points = self.game_map.get_edge_locations(target_edge)
+            path = self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
+            self._path_cache[key] = path
+            if self._turn_start_version == self.game_map.structure_version:
+                self._turn_start_paths[key] = path
+        return [list(location) for location in path]
 
     def contains_stationary_unit(self, location):
         """Check if a location is blocked, return structures unit if it is
@@ -631,6 +837,14 @@ class GameState:
         if not self.game_map.in_arena_bounds(location):
             self.warn("Location {} is not in the arena bounds.".format(location))
 
+        if self._attackers_cache_version != self.game_map.version:
+            self._attackers_cache = {}
+            self._attackers_cache_version = self.game_map.version
+
+        key = (int(location[0]), int(location[1]), player_index)
+        if key in self._attackers_cache:
+            return list(self._attackers_cache[key])
+
         attackers = []
         """
         Get locations in the range of TURRET units
@@ -644,4 +858,7 @@ class GameState:
             for unit in self.game_map[location_unit]:
                 if unit.damage_i + unit.damage_f > 0 and unit.player_index != player_index and self.game_map.distance_between_locations(location, location_unit) <= unit.attackRange:
                     attackers.append(unit)
-        return attackers
+        self._attackers_cache[key] = attackers
+        if self._turn_start_map_version == self.game_map.version:
+            self._turn_start_attackers[key] = attackers
+        return list(attackers)
@@ -0,0 +1,193 @@
+class _PlanningLimitReached(Exception):
+    pass
+
+
+class ResourcePlanner:
+    """Projects MP and SP for both players and plans when to save and when to spend them.
+
+    MP decays every turn while SP does not, so the two are planned separately. Attack waves are
+    planned with a dynamic program over the MP you could hold on each turn of the horizon, and
+    structures are planned with a knapsack over the SP you hold on each turn. Income for every
+    turn is worked out once, so a projection is a single pass over the horizon for both players.
+
+    Attributes :
+        * config (JSON): The config passed to on_game_start
+        * horizon (int): The number of turns reached by the last call to plan
+
+    """
+    def __init__(self, config):
+        """Reads the resource rules from the config
+
+        Args:
+            config (JSON): The config passed to on_game_start
+
+        """
+        self.config = config
+        resources = config["resources"]
+        self.__mp_kept = 1 - resources["bitDecayPerRound"]
+        self.__mp_per_round = resources["bitsPerRound"]
+        self.__mp_growth = resources["bitGrowthRate"]
+        self.__mp_interval = resources["turnIntervalForBitSchedule"]
+        self.__sp_per_round = resources["coresPerRound"]
+        self.horizon = 0
+
+    def mp_income(self, turn_number):
+        """The MP every player gains at the start of the given turn
+        """
+        return self.__mp_per_round + self.__mp_growth * (turn_number // self.__mp_interval)
+
+    def next_mp(self, turn_number, mp):
+        """The MP a player holding mp after deploying on the given turn will have on the next turn.
+        Matches GameState.project_future_MP.
+        """
+        return round(mp * self.__mp_kept + self.mp_income(turn_number + 1), 1)
+
+    def project(self, game_state, turns):
+        """Projects both players' resources assuming neither spends anything
+
+        Args:
+            game_state: The GameState for the current turn
+            turns: The number of turns to look ahead
+
+        Returns:
+            A list with a [[SP, MP], [SP, MP]] entry for you and the enemy for each of the next turns, in order
+
+        """
+        held = [game_state.get_resources(0), game_state.get_resources(1)]
+        result = []
+        for turn in range(game_state.turn_number, game_state.turn_number + turns):
+            held = [[sp + self.__sp_per_round, self.next_mp(turn, mp)] for sp, mp in held]
+            result.append(held)
+        return result
+
+    def plan_attacks(self, turn_number, mp, wave_value, horizon=8, max_choices=200000, unit_cost=1.0, min_units=1, discount=0.9):
+        """Finds the attack waves that give the most value over the next turns
+
+        Every turn you either save or spend MP on a wave of units. The value of the schedule is the
+        sum of wave_value over its waves, with each turn's wave worth discount times less than the turn
+        before. The horizon is grown one turn at a time until it is reached or max_choices wave sizes
+        have been weighed over all the horizons tried, and the schedule for the longest finished horizon
+        is returned. Counting choices rather than time keeps the plan the same on every computer, so
+        replays and opening books play out the same.
+
+        Args:
+            turn_number: The turn the first wave can be sent on
+            mp: The MP held on that turn
+            wave_value: A function taking the number of units in a wave and returning its value
+            horizon: The most turns to plan
+            max_choices: The most wave sizes the planner may weigh, counted once for every turn and MP held it is tried on
+            unit_cost: The MP cost of a single unit
+            min_units: The smallest wave worth sending
+            discount: How much less a wave is worth for every turn it is delayed
+
+        Returns:
+            A tuple of the number of units to send on each turn, 0 meaning save, and the value of that schedule
+
+        """
+        # the wave sizes left to weigh, shared by every horizon
+        choices_left = [max_choices]
+        best = ([], 0)
+        self.horizon = 0
+        for length in range(1, horizon + 1):
+            memo = {}
+            try:
+                value, waves = self.__best_waves(turn_number, round(mp, 1), length, wave_value, unit_cost, min_units, discount, memo, choices_left)
+            except _PlanningLimitReached:
+                break
+            best = (waves, value)
+            self.horizon = length
+        return best
+
+    def __best_waves(self, turn_number, mp, turns_left, wave_value, unit_cost, min_units, discount, memo, choices_left):
+        key = (turn_number, mp, turns_left)
+        if key in memo:
+            return memo[key]
+        affordable = int(mp // unit_cost)
+        choices = [0] + list(range(max(min_units, 1), affordable + 1))
+        if choices_left[0] < len(choices):
+            raise _PlanningLimitReached()
+        choices_left[0] -= len(choices)
+
+        best = None
+        for units in choices:
+            value = wave_value(units) if units else 0
+            waves = (units,)
+            if turns_left > 1:
+                future_value, future_waves = self.__best_waves(turn_number + 1, self.next_mp(turn_number, mp - units * unit_cost), turns_left - 1, wave_value, unit_cost, min_units, discount, memo, choices_left)
+                value += discount * future_value
+                waves += future_waves
+            # prefer saving on ties
+            if best is None or value > best[0]:
+                best = (value, waves)
+        memo[key] = best
+        return best
+
+    def plan_builds(self, sp, jobs, turns, sp_reserve=0):
+        """Chooses which structures to build on each of the next turns
+
+        Every turn the jobs that fit in the SP held, minus sp_reserve, are chosen by a 0/1 knapsack
+        on their values, and whatever is left is saved for the next turn.
+
+        Args:
+            sp: The SP held on the first turn
+            jobs: A list of [cost, value] for each structure or upgrade you want, e.g. one per build order entry
+            turns: The number of turns to plan
+            sp_reserve: SP that should always be kept
+
+        Returns:
+            A list of the indices into jobs to build on each turn
+
+        """
+        remaining = list(range(len(jobs)))
+        schedule = []
+        for turn in range(turns):
+            if turn > 0:
+                sp += self.__sp_per_round
+            chosen = self.__knapsack([(index, jobs[index]) for index in remaining], sp - sp_reserve)
+            for index in chosen:
+                sp -= jobs[index][0]
+                remaining.remove(index)
+            schedule.append(chosen)
+        return schedule
+
+    @staticmethod
+    def __knapsack(items, capacity):
+        # Costs are in tenths of a point so half point costs are exact
+        capacity = int(round(capacity * 10))
+        if capacity <= 0 or not items:
+            return []
+        best = [(0, ())] * (capacity + 1)
+        for index, (cost, value) in items:
+            cost = int(round(cost * 10))
+            if cost > capacity:
+                continue
+            for room in range(capacity, cost - 1, -1):
+                candidate = best[room - cost][0] + value
+                if candidate > best[room][0]:
+                    best[room] = (candidate, best[room - cost][1] + (index,))
+        return sorted(best[capacity][1])
+
+    def plan(self, game_state, wave_value, jobs=(), horizon=8, max_choices=200000, unit_cost=1.0, min_units=1, discount=0.9, sp_reserve=0):
+        """Plans your spending over the next turns and projects the enemy's resources, see plan_attacks and plan_builds
+
+        Args:
+            game_state: The GameState for the current turn, before anything was spent
+            wave_value: A function taking the number of units in a wave and returning its value
+            jobs: A list of [cost, value] for the structures you want to build
+            horizon: The most turns to plan
+            max_choices: The most wave sizes the attack planner may weigh, see plan_attacks
+            unit_cost: The MP cost of a single unit
+            min_units: The smallest wave worth sending
+            discount: How much less a wave is worth for every turn it is delayed
+            sp_reserve: SP that should always be kept
+
+        Returns:
+            A dict with the keys attacks (units to send on each turn), builds (jobs to build on each turn),
+            value (the value of the attacks) and enemy (the enemy's [SP, MP] on each turn if they save)
+
+        """
+        attacks, value = self.plan_attacks(game_state.turn_number, game_state.get_resource(game_state.MP), wave_value, horizon, max_choices, unit_cost, min_units, discount)
+        turns = max(len(attacks), 1)
+        builds = self.plan_builds(game_state.get_resource(game_state.SP), list(jobs), turns, sp_reserve)
+        enemy = [game_state.get_resources(1)] + [resources[1] for resources in self.project(game_state, turns - 1)]
+        return {"attacks": list(attacks), "builds": builds, "value": value, "enemy": enemy}
@@ -0,0 +1,129 @@
+from array import array
+
+from .board import ARENA_SIZE, TILE_COUNT, ARENA_TILES, hit_radius, tile_index, tile_location, tiles_in_range
+
+
+class ShieldMap:
+    """Works out how much shield each player's mobile units pick up from their supports on every tile.
+
+    A support shields every mobile unit of its owner that comes within its shieldRange once, by its
+    shieldPerUnit plus its shieldBonusPerY for every row it is placed forward of its owner's edge
+    (counted from the bottom for you and from the top for the enemy). Upgraded supports use their
+    upgraded values. Supports spawned with attempt_spawn this turn are already on the map, so they
+    are counted too.
+
+    Since a unit is shielded by each support once, the shield picked up along a path is not the sum
+    of shield over its tiles. Every tile also stores which supports reach it, as the bits of an int,
+    so path_shield only has to combine the bits of the path's tiles and add up the supports found.
+
+    Attributes :
+        * supports (list): For each player, [location, shield] of every support that gives shield
+        * shield (list): For each player, an array of the total shield of the supports in range of each tile, see board.py
+
+    """
+    def __init__(self, game_state):
+        """Finds the supports on the board of game_state and the tiles they reach
+
+        Args:
+            game_state: The GameState to analyse
+
+        """
+        config_hit_radius = hit_radius(game_state.config)
+        self.supports = [[], []]
+        self.shield = [array("d", [0.0]) * TILE_COUNT for _ in range(2)]
+        self.__reaches = [[0] * TILE_COUNT for _ in range(2)]
+        self.__amounts = [[], []]
+        for index in ARENA_TILES:
+            unit = game_state.contains_stationary_unit(tile_location(index))
+            if not unit or unit.shieldRange <= 0:
+                continue
+            player = unit.player_index
+            rows_forward = unit.y if player == 0 else ARENA_SIZE - 1 - unit.y
+            amount = unit.shieldPerUnit + unit.shieldBonusPerY * rows_forward
+            if amount <= 0:
+                continue
+            bit = 1 << len(self.__amounts[player])
+            self.__amounts[player].append(amount)
+            self.supports[player].append([[unit.x, unit.y], amount])
+
+            shield, reaches = self.shield[player], self.__reaches[player]
+            for tile in tiles_in_range(index, unit.shieldRange, config_hit_radius):
+                shield[tile] += amount
+                reaches[tile] |= bit
+
+    def shield_at(self, location, player_index=0):
+        """Gets the shield a unit on a location picks up from the supports in range, if none of them has shielded it yet
+
+        Args:
+            location: The location to check
+            player_index: The owner of the unit, 0 for you and 1 for the enemy
+
+        Returns:
+            The total shield of the player's supports in range of the location
+
+        """
+        return self.shield[player_index][tile_index(location)]
+
+    def path_shield(self, path, player_index=0):
+        """Gets the shield a unit picks up walking a path, counting every support once
+
+        Args:
+            path: A list of locations, such as one returned by find_path_to_edge
+            player_index: The owner of the unit, 0 for you and 1 for the enemy
+
+        Returns:
+            The shield a unit walking the path would end up with
+
+        """
+        if not path:
+            return 0
+        reaches = self.__reaches[player_index]
+        mask = 0
+        for location in path:
+            mask |= reaches[int(location[1]) * ARENA_SIZE + int(location[0])]
+        return self.__total(mask, player_index)
+
+    def shield_gains(self, path, player_index=0):
+        """Gets the shield a unit picks up on each location of a path, from the supports that have not shielded it yet
+
+        Args:
+            path: A list of locations, such as one returned by find_path_to_edge
+            player_index: The owner of the unit, 0 for you and 1 for the enemy
+
+        Returns:
+            A list with the shield gained on each location of the path, adding up to path_shield
+
+        """
+        reaches = self.__reaches[player_index]
+        mask = 0
+        gains = []
+        for location in path:
+            new = reaches[int(location[1]) * ARENA_SIZE + int(location[0])] & ~mask
+            mask |= new
+            gains.append(self.__total(new, player_index) if new else 0)
+        return gains
+
+    def __total(self, mask, player_index):
+        """The total shield of the supports whose bits are set in mask
+        """
+        total = 0
+        amounts = self.__amounts[player_index]
+        while mask:
+            bit = mask & -mask
+            total += amounts[bit.bit_length() - 1]
+            mask ^= bit
+        return total
+
+    def supports_in_range(self, location, player_index=0):
+        """Gets the player's supports that reach a location
+
+        Args:
+            location: The location to check
+            player_index: The owner of the supports, 0 for you and 1 for the enemy
+
+        Returns:
+            A list of [location, shield] of every support in range, as in supports
+
+        """
+        mask = self.__reaches[player_index][tile_index(location)]
+        return [support for number, support in enumerate(self.supports[player_index]) if mask >> number & 1]
@@ -0,0 +1,275 @@
+from .board import HALF_ARENA, ARENA_TILES, EDGE_TILES, hit_radius, tile_index, tile_location, tiles_in_range, tiles_in_range_by_distance
+from .pockets import target_edge
+from .shield_map import ShieldMap
+
+
+class SurvivalEstimator:
+    """Estimates how a group of mobile units spawned together fares walking a path on the current board.
+
+    The group is played out frame by frame the way Simulator plays it: supports shield it, it moves
+    at its unit type's speed, then every enemy turret in range fires at it and it fires at the closest
+    enemy structure. A group on one tile is all the same distance from a turret, so every turret fires
+    at the same unit, the one with the least health, and damage past what kills it is lost. Units are
+    therefore lost one at a time, and a larger group survives by spreading the enemy's fire over more
+    frames. The group's own fire is split the same way: all of it goes into one structure at a time.
+    Structures it destroys stop firing. Units left when the path ends without reaching the edge self
+    destruct.
+
+    The frames of a path, which tiles the group is on and which turrets and structures are in range
+    of each, do not depend on the size of the group, so they are worked out once per path and unit
+    type and reused for every group size and every spawn location sharing tiles. The path is taken
+    as it is at the start, it is not found again when structures are destroyed, and enemy mobile
+    units are not counted.
+
+    Attributes :
+        * game_state (:obj: GameState): The board the estimates are made on
+
+    """
+    def __init__(self, game_state, shield_map=None):
+        """Reads the structures on the board of game_state
+
+        Args:
+            game_state: The GameState to analyse
+            shield_map: Optional, a ShieldMap of the same board. Made when first needed if not given.
+
+        """
+        self.game_state = game_state
+        self.__config = game_state.config
+        self.__hit_radius = hit_radius(self.__config)
+        self.__shield_map = shield_map
+        # every structure on the board, as [location, unit]
+        self.__structures = []
+        # tile index -> number of the structure on it
+        self.__numbers = {}
+        # for each player, the attack ranges of their turrets
+        self.__turret_ranges = [set(), set()]
+        for index in ARENA_TILES:
+            unit = game_state.contains_stationary_unit(tile_location(index))
+            if unit:
+                self.__numbers[index] = len(self.__structures)
+                self.__structures.append([tile_location(index), unit])
+                if unit.damage_i > 0:
+                    self.__turret_ranges[unit.player_index].add(unit.attackRange)
+        self.__health = [unit.health for _, unit in self.__structures]
+        # (tile index, player) -> numbers of the turrets of the player's opponent that fire on the tile
+        self.__threats = {}
+        # (tile index, player, radius) -> numbers of the opponent's structures in range, grouped by distance
+        self.__in_range = {}
+        # (path, unit type, player) -> frames of the path
+        self.__timelines = {}
+
+    def __type(self, unit_type):
+        for unit_information in self.__config["unitInformation"]:
+            if unit_information.get("shorthand") == unit_type:
+                return unit_information
+        raise ValueError("{} is not a unit type".format(unit_type))
+
+    def __turrets_on(self, index, player_index):
+        key = (index, player_index)
+        turrets = self.__threats.get(key)
+        if turrets is None:
+            # a turret reaches a tile when the tile reaches the turret with the same range
+            turrets = set()
+            for attack_range in self.__turret_ranges[1 - player_index]:
+                for tile in tiles_in_range(index, attack_range, self.__hit_radius):
+                    number = self.__numbers.get(tile)
+                    if number is not None:
+                        unit = self.__structures[number][1]
+                        if unit.player_index != player_index and unit.damage_i > 0 and unit.attackRange == attack_range:
+                            turrets.add(number)
+            turrets = self.__threats[key] = sorted(turrets)
+        return turrets
+
+    def __structures_near(self, index, player_index, radius):
+        key = (index, player_index, radius)
+        groups = self.__in_range.get(key)
+        if groups is None:
+            groups = []
+            for tiles in tiles_in_range_by_distance(index, radius, self.__hit_radius):
+                group = sorted(self.__numbers[tile] for tile in tiles
+                    if tile in self.__numbers and self.__structures[self.__numbers[tile]][1].player_index != player_index)
+                if group:
+                    groups.append(group)
+            self.__in_range[key] = groups
+        return groups
+
+    def __timeline(self, path, unit_type, player_index):
+        """The frames of a group walking a path: [tile index, shield gained, turrets, structures in range] for every
+        frame the group attacks, and whether it ends on the edge, the number of steps taken and its last tile index
+        """
+        key = (tuple(tuple(location) for location in path), unit_type, player_index)
+        if key in self.__timelines:
+            return self.__timelines[key]
+        type_config = self.__type(unit_type)
+        speed = type_config.get("speed", 1)
+        attack_range = type_config.get("attackRange", 0)
+        if self.__shield_map is None:
+            self.__shield_map = ShieldMap(self.game_state)
+        gains = self.__shield_map.shield_gains(path, player_index)
+        indices = [tile_index(location) for location in path]
+        edge = set(EDGE_TILES[target_edge(indices[0])])
+
+        frames = []
+        progress = 0
+        position = 0
+        shielded = -1
+        breach = False
+        while speed > 0:
+            gain = 0
+            if position > shielded:
+                gain, shielded = gains[position], position
+            progress += speed
+            if progress >= 1:
+                progress -= 1
+                if position + 1 >= len(path):
+                    break
+                position += 1
+                if indices[position] in edge:
+                    breach = True
+                    break
+            index = indices[position]
+            frames.append([index, gain, self.__turrets_on(index, player_index), self.__structures_near(index, player_index, attack_range)])
+        timeline = self.__timelines[key] = (frames, breach, position, indices[position])
+        return timeline
+
+    def __target(self, groups, health, lowest_y):
+        """The structure a group attacks, in the order get_target picks them
+        """
+        for group in groups:
+            best = None
+            for number in group:
+                if health[number] <= 0:
+                    continue
+                location = self.__structures[number][0]
+                key = (health[number], location[1] if lowest_y else -location[1], -abs(HALF_ARENA - 0.5 - location[0]))
+                if best is None or key < best_key:
+                    best, best_key = number, key
+            if best is not None:
+                return best
+        return None
+
+    def estimate(self, path, unit_type, counts, player_index=0):
+        """Estimates how groups of different sizes fare walking a path
+
+        Args:
+            path: A list of locations, such as one returned by find_path_to_edge, starting where the group is spawned
+            unit_type: The type of the units, such as SCOUT
+            counts: A group size, or a list of group sizes
+            player_index: The owner of the group, 0 for you and 1 for the enemy
+
+        Returns:
+            A dict for each group size, a single dict if counts is a number, with the keys units, reached, lost,
+            damage, damaged, destroyed, frames, positions and in_range. reached is the number of units that reach
+            the edge, damage the damage the group deals to structures, counting only the health they had left,
+            damaged [location, damage] of every structure it hits and destroyed the locations of the structures it
+            destroys. positions holds [location, frames] of every tile the group attacks from and in_range
+            [location, frames] of every structure in its range along the way. Those two are the same for every
+            group size and are shared between the dicts.
+
+        """
+        single = not isinstance(counts, (list, tuple, range))
+        if single:
+            counts = [counts]
+        type_config = self.__type(unit_type)
+        frames, breach, steps, last = self.__timeline(path, unit_type, player_index)
+        health = type_config.get("startHealth", 0)
+        damage_f = type_config.get("attackDamageTower", 0)
+        lowest_y = player_index == 0
+        self_destruct = []
+        if not breach and steps >= type_config.get("selfDestructStepsRequired", 5) and type_config.get("selfDestructDamageTower", 0) > 0:
+            self_destruct = [number for group in self.__structures_near(last, player_index, type_config.get("selfDestructRange", 1.5)) for number in group]
+        positions = []
+        in_range = {}
+        for index, _, _, nearby in frames:
+            if positions and positions[-1][0] == index:
+                positions[-1][1] += 1
+            else:
+                positions.append([index, 1])
+            for group in nearby:
+                for number in group:
+                    in_range[number] = in_range.get(number, 0) + 1
+        positions = [[tile_location(index), spent] for index, spent in positions]
+        in_range = [[self.__structures[number][0], spent] for number, spent in in_range.items()]
+
+        results = []
+        for count in counts:
+            structure_health = list(self.__health)
+            alive = count
+            fresh = front = health
+            dealt = 0
+            damaged = {}
+            destroyed = []
+            played = 0
+            for index, gain, turrets, nearby in frames:
+                if alive <= 0:
+                    break
+                played += 1
+                fresh += gain
+                front += gain
+                # every attack of the frame is chosen before any damage is done, as in Simulator
+                fire = 0
+                for number in turrets:
+                    if structure_health[number] > 0:
+                        fire += self.__structures[number][1].damage_i
+                if damage_f > 0 and nearby:
+                    target = self.__target(nearby, structure_health, lowest_y)
+                    if target is not None:
+                        damage = min(structure_health[target], alive * damage_f)
+                        dealt += damage
+                        damaged[target] = damaged.get(target, 0) + damage
+                        structure_health[target] -= alive * damage_f
+                        if structure_health[target] <= 0:
+                            destroyed.append(self.__structures[target][0])
+                if fire > 0:
+                    front -= fire
+                    if front <= 0:
+                        alive -= 1
+                        front = fresh
+            if alive > 0 and self_destruct:
+                for number in self_destruct:
+                    if structure_health[number] > 0:
+                        damage = alive * type_config.get("selfDestructDamageTower", 0)
+                        dealt += min(structure_health[number], damage)
+                        damaged[number] = damaged.get(number, 0) + min(structure_health[number], damage)
+                        structure_health[number] -= damage
+                        if structure_health[number] <= 0:
+                            destroyed.append(self.__structures[number][0])
+            results.append({
+                "units": count,
+                "reached": alive if breach and alive > 0 else 0,
+                "lost": count - max(alive, 0) if breach else count,
+                "damage": dealt,
+                "damaged": [[self.__structures[number][0], damage] for number, damage in damaged.items()],
+                "destroyed": destroyed,
+                "frames": played + 1 if alive > 0 else played,
+                "positions": positions,
+                "in_range": in_range,
+            })
+        return results[0] if single else results
+
+    def best_spawns(self, locations, unit_type, counts, player_index=0):
+        """Estimates every group size from every spawn location, using the paths the GameState finds
+
+        Args:
+            locations: The spawn locations to try
+            unit_type: The type of the units, such as SCOUT
+            counts: The group sizes to try
+            player_index: The owner of the groups, 0 for you and 1 for the enemy
+
+        Returns:
+            A list of the dicts returned by estimate, with the spawn location added under location, sorted by units
+            reached and then damage dealt, best first. Blocked locations are left out.
+
+        """
+        results = []
+        for location in locations:
+            if self.game_state.contains_stationary_unit(location):
+                continue
+            path = self.game_state.find_path_to_edge(location)
+            if not path:
+                continue
+            for result in self.estimate(path, unit_type, list(counts), player_index):
+                result["location"] = location
+                results.append(result)
+        results.sort(key=lambda result: (-result["reached"], -result["damage"], result["units"]))
+        return results
@@ -0,0 +1,395 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to time the parts of gamelib that algos call the most, on recorded
+boards, and to compare the timings against a saved baseline. It is intended for measuring
+every change made to gamelib for speed.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the scripts/benchmarks directory
+
+Every benchmark is run on every board in scripts/benchmarks/boards. Each board is a turn
+recorded from a real game, with the turn before it and the action frames that followed it:
+	empty		turn 0, before anything is built
+	midgame		a mid-game board
+	dense		a late-game board, with more than a hundred structures
+
+The benchmarks are:
+	game_state		GameState built from the turn string
+	game_state_carried	GameState built from the turn string, carried forward from the turn before
+	find_path_to_edge	find_path_to_edge from every edge location on your side
+	get_attackers		get_attackers on every location of the arena
+	get_target		get_target for a scout on every location of your half
+	targeting		TargetingEngine.get_targets for a scout on every location of your half
+	can_spawn		can_spawn of a wall, turret and scout on every location of the arena
+	attempt_spawn		attempt_spawn of walls on every location of your half
+	transactions		attempt_spawn of a wall on every location of your half, each in a transaction that is rolled back
+	action_frames		GameState built from every action frame of the turn
+	ledger			DamageLedger.consume of every action frame of the turn
+	criticality		CriticalityMap of the board
+	pockets			PocketMap of the board
+	shield_map		ShieldMap of the board
+	survival		SurvivalEstimator.best_spawns of 1 to 15 scouts from every edge location on your side
+	demolisher		DemolisherAnalyzer.scan of 5 demolishers behind lines on rows 10 to 12, from both sides
+	timeline		InterceptionPlanner.best_spawns against scouts from every unblocked enemy edge location
+	placement		TurretOptimizer.plan against scouts from 3 enemy edge locations with 30 SP
+	supports		SupportOptimizer.plan for scouts from [13, 0] with 30 SP, supports shielding as in the season 5 config
+
+Everything a benchmark needs, such as a new GameState so no cached paths are reused, is made
+before its clock starts. The garbage collector is off while the clock runs, as in timeit.
+Each benchmark is run -r times, every run calling it enough times to take at least -m seconds,
+and the fastest run, the median run and the spread of the runs (the interquartile range over
+the median) are printed, all per call.
+
+Time python-2l-aet's gamelib and save the timings as the baseline:
+>py scripts/benchmarks/benchmark_gamelib.py -s
+
+After changing gamelib, compare against the baseline:
+>py scripts/benchmarks/benchmark_gamelib.py
+
+Benchmarks whose median changed by more than -x (10% by default) are marked. -a times another
+algo's gamelib, -k only runs the benchmarks whose name contains the given text, and -b only uses
+the given boards.
+
+Record a new board from a replay, here turn 20 as seen by player 1:
+>py scripts/benchmarks/benchmark_gamelib.py --record [REPLAY_FILE].replay 20 name
+
+Timings depend on the computer, so save a baseline on the computer you compare on.
+'''
+
+import sys
+try:
+	import os
+	import gc
+	import json
+	import glob
+	import time
+	import argparse
+	import statistics
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+file_dir = os.path.dirname(os.path.realpath(__file__))
+parent_dir = os.path.abspath(os.path.join(file_dir, os.pardir, os.pardir))
+boards_dir = os.path.join(file_dir, 'boards')
+
+
+def load_boards(names=None):
+	with open(os.path.join(boards_dir, 'config.json')) as f:
+		config = json.load(f)
+	boards = {}
+	for f_name in sorted(glob.glob(os.path.join(boards_dir, '*.json'))):
+		name = os.path.splitext(os.path.basename(f_name))[0]
+		if name == 'config' or (names and name not in names):
+			continue
+		with open(f_name) as f:
+			boards[name] = json.load(f)
+	return config, boards
+
+
+# Saves the turn of a replay, the turn before it and its action frames as a board, with the replay's config
+def record_board(f_name, turn, name):
+	config, frames = None, {}
+	with open(f_name) as f:
+		for line in f:
+			line = line.strip()
+			if line == '':
+				continue
+			frame = json.loads(line)
+			if 'turnInfo' not in frame:
+				if 'replaySave' in line:
+					config = frame
+				continue
+			frames.setdefault(frame['turnInfo'][1], []).append((frame['turnInfo'][0], line))
+	if turn not in frames:
+		print ('Turn {} is not in {}'.format(turn, f_name))
+		return
+	board = {
+		'source': os.path.basename(f_name),
+		'turn': next(line for state_type, line in frames[turn] if state_type == 0),
+		'previous': next((line for state_type, line in frames.get(turn - 1, []) if state_type == 0), None),
+		'action_frames': [line for state_type, line in frames[turn] if state_type == 1]
+		}
+	if not os.path.exists(boards_dir):
+		os.makedirs(boards_dir)
+	with open(os.path.join(boards_dir, name + '.json'), 'w') as f:
+		json.dump(board, f)
+	if not os.path.exists(os.path.join(boards_dir, 'config.json')):
+		with open(os.path.join(boards_dir, 'config.json'), 'w') as f:
+			json.dump(config, f)
+	print ('Saved turn {} of {} as {}'.format(turn, f_name, name))
+
+
+# Every benchmark is a function that takes the config and a board and returns a setup function,
+# which makes whatever one call needs, and the call to time, which is passed what setup returned
+def make_benchmarks(gamelib):
+	def fresh_state(config, board):
+		def setup():
+			game_state = gamelib.GameState(config, board['turn'])
+			game_state.suppress_warnings(True)
+			return game_state
+		return setup
+
+	def game_state(config, board):
+		return (lambda: None), (lambda _: gamelib.GameState(config, board['turn']))
+
+	def game_state_carried(config, board):
+		if board['previous'] is None:
+			return None
+		return (lambda: gamelib.GameState(config, board['previous'])), (lambda previous: gamelib.GameState(config, board['turn'], previous))
+
+	def find_path_to_edge(config, board):
+		game_map = gamelib.GameMap(config)
+		edges = game_map.get_edge_locations(game_map.BOTTOM_LEFT) + game_map.get_edge_locations(game_map.BOTTOM_RIGHT)
+		def run(game_state):
+			for location in edges:
+				if not game_state.contains_stationary_unit(location):
+					game_state.find_path_to_edge(location)
+		return fresh_state(config, board), run
+
+	def get_attackers(config, board):
+		def run(game_state):
+			for location in game_state.game_map:
+				game_state.get_attackers(location, 0)
+		return fresh_state(config, board), run
+
+	def get_target(config, board):
+		setup_state = fresh_state(config, board)
+		scout = config['unitInformation'][3]['shorthand']
+		def setup():
+			game_state = setup_state()
+			units = [gamelib.GameUnit(scout, config, 0, None, x, y) for x, y in game_state.game_map if y < game_state.HALF_ARENA]
+			return game_state, units
+		def run(setup_result):
+			game_state, units = setup_result
+			for unit in units:
+				game_state.get_target(unit)
+		return setup, run
+
+	def targeting(config, board):
+		# one engine for every call, as in Simulator, so its precomputed ranges are reused but its buckets are not
+		engine = gamelib.TargetingEngine(config)
+		def run(setup_result):
+			game_state, units = setup_result
+			engine.get_targets(game_state.game_map, units)
+		return get_target(config, board)[0], run
+
+	def can_spawn(config, board):
+		unit_types = [config['unitInformation'][index]['shorthand'] for index in (0, 2, 3)]
+		def run(game_state):
+			for location in game_state.game_map:
+				for unit_type in unit_types:
+					game_state.can_spawn(unit_type, location)
+		return fresh_state(config, board), run
+
+	def attempt_spawn(config, board):
+		wall = config['unitInformation'][0]['shorthand']
+		def run(game_state):
+			game_state.attempt_spawn(wall, [location for location in game_state.game_map if location[1] < game_state.HALF_ARENA])
+		return fresh_state(config, board), run
+
+	def transactions(config, board):
+		wall = config['unitInformation'][0]['shorthand']
+		def run(game_state):
+			for location in game_state.game_map:
+				if location[1] < game_state.HALF_ARENA:
+					game_state.begin()
+					game_state.attempt_spawn(wall, location)
+					game_state.rollback()
+		return fresh_state(config, board), run
+
+	def action_frames(config, board):
+		if not board['action_frames']:
+			return None
+		def run(_):
+			for frame in board['action_frames']:
+				gamelib.GameState(config, frame)
+		return (lambda: None), run
+
+	def ledger(config, board):
+		if not board['action_frames']:
+			return None
+		def run(damage_ledger):
+			for frame in board['action_frames']:
+				damage_ledger.consume(frame)
+		return (lambda: gamelib.DamageLedger(config)), run
+
+	def criticality(config, board):
+		return fresh_state(config, board), gamelib.CriticalityMap
+
+	def pockets(config, board):
+		return fresh_state(config, board), gamelib.PocketMap
+
+	def shield_map(config, board):
+		return fresh_state(config, board), gamelib.ShieldMap
+
+	def survival(config, board):
+		setup_state = fresh_state(config, board)
+		scout = config['unitInformation'][3]['shorthand']
+		def setup():
+			game_state = setup_state()
+			spawns = [location for edge in (game_state.game_map.BOTTOM_LEFT, game_state.game_map.BOTTOM_RIGHT) for location in game_state.game_map.get_edge_locations(edge)]
+			# the paths are found before the clock starts, as find_path_to_edge has its own benchmark
+			for location in spawns:
+				if not game_state.contains_stationary_unit(location):
+					game_state.find_path_to_edge(location)
+			return game_state, spawns
+		def run(setup_result):
+			game_state, spawns = setup_result
+			gamelib.SurvivalEstimator(game_state).best_spawns(spawns, scout, range(1, 16))
+		return setup, run
+
+	def demolisher(config, board):
+		setup_state = fresh_state(config, board)
+		candidates = []
+		for row in (10, 11, 12):
+			candidates.append([[[x, row] for x in range(27, 5, -1)], [13 + row, row - 1]])
+			candidates.append([[[x, row] for x in range(0, 22)], [14 - row, row - 1]])
+		def run(game_state):
+			gamelib.DemolisherAnalyzer(game_state).scan(candidates, 5, 100)
+		return setup_state, run
+
+	def timeline(config, board):
+		setup_state = fresh_state(config, board)
+		scout = config['unitInformation'][3]['shorthand']
+		def setup():
+			game_state = setup_state()
+			game_map = game_state.game_map
+			spawns = [location for edge in (game_map.TOP_LEFT, game_map.TOP_RIGHT) for location in game_map.get_edge_locations(edge)]
+			# the paths are found before the clock starts, as find_path_to_edge has its own benchmark
+			waves = [[game_state.find_path_to_edge(location), scout, 1] for location in spawns if not game_state.contains_stationary_unit(location)]
+			for location in game_map.get_edge_locations(game_map.BOTTOM_LEFT) + game_map.get_edge_locations(game_map.BOTTOM_RIGHT):
+				if not game_state.contains_stationary_unit(location):
+					game_state.find_path_to_edge(location)
+			return game_state, waves
+		def run(setup_result):
+			game_state, waves = setup_result
+			gamelib.InterceptionPlanner(game_state).best_spawns(waves)
+		return setup, run
+
+	def placement(config, board):
+		setup_state = fresh_state(config, board)
+		scout = config['unitInformation'][3]['shorthand']
+		optimizer = gamelib.TurretOptimizer(config)
+		def setup():
+			game_state = setup_state()
+			game_map = game_state.game_map
+			spawns = [location for edge in (game_map.TOP_LEFT, game_map.TOP_RIGHT) for location in game_map.get_edge_locations(edge)]
+			spawns = [location for location in spawns if not game_state.contains_stationary_unit(location)]
+			# the paths are found before the clock starts, as find_path_to_edge has its own benchmark
+			waves = [[game_state.find_path_to_edge(location), scout, 1 / 3, 10] for location in spawns[::max(len(spawns) // 3, 1)][:3]]
+			return game_state, waves
+		def run(setup_result):
+			game_state, waves = setup_result
+			optimizer.plan(game_state, waves, 30)
+		return setup, run
+
+	def supports(config, board):
+		# supports in the boards' config make resources instead of shielding, which would leave nothing to place
+		config = json.loads(json.dumps(config))
+		config['unitInformation'][1].update({'shieldRange': 3, 'shieldPerUnit': 3, 'shieldBonusPerY': 0.7})
+		config['unitInformation'][1]['upgrade'].update({'shieldRange': 7, 'shieldPerUnit': 4, 'cost1': 4})
+		setup_state = fresh_state(config, board)
+		optimizer = gamelib.SupportOptimizer(config)
+		def setup():
+			game_state = setup_state()
+			location = [13, 0] if not game_state.contains_stationary_unit([13, 0]) else [14, 0]
+			return game_state, game_state.find_path_to_edge(location)
+		def run(setup_result):
+			game_state, path = setup_result
+			optimizer.plan(game_state, path, 30)
+		return setup, run
+
+	return [game_state, game_state_carried, find_path_to_edge, get_attackers, get_target, targeting, can_spawn, attempt_spawn, transactions, action_frames, ledger, criticality, pockets, shield_map, survival, demolisher, timeline, placement, supports]
+
+
+# Returns [fastest, median, spread] of the time per call over repeat runs, each at least min_time seconds long
+def measure(setup, run, repeat=7, min_time=0.2):
+	def timed(loops):
+		total = 0
+		gc_enabled = gc.isenabled()
+		for _ in range(loops):
+			argument = setup()
+			gc.disable()
+			start = time.perf_counter()
+			run(argument)
+			total += time.perf_counter() - start
+			if gc_enabled:
+				gc.enable()
+		return total
+
+	loops = 1
+	while True:
+		taken = timed(loops)
+		if taken >= min_time:
+			break
+		loops = max(loops * 2, int(loops * min_time / max(taken, 1e-9) * 1.1))
+
+	times = sorted(timed(loops) / loops for _ in range(repeat))
+	median = statistics.median(times)
+	quartiles = times[(len(times) - 1) * 3 // 4] - times[(len(times) - 1) // 4]
+	return [times[0], median, quartiles / median if median > 0 else 0]
+
+
+def format_time(seconds):
+	for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+		if seconds >= scale:
+			return '{:.2f} {}'.format(seconds / scale, unit)
+	return '{:.0f} ns'.format(seconds / 1e-9)
+
+
+if __name__ == '__main__':
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument('-a', '--algo', default=os.path.join(parent_dir, 'python-2l-aet'), help="the algo whose gamelib is timed\n\n")
+	ap.add_argument('-k', '--keyword', default='', help='only run the benchmarks whose name contains this\n\n')
+	ap.add_argument('-b', '--boards', nargs='*', default=[], help='only use these boards\n\n')
+	ap.add_argument('-r', '--repeat', type=int, default=7, help='the number of runs of each benchmark\n\n')
+	ap.add_argument('-m', '--min-time', type=float, default=0.2, help='the least number of seconds a run takes\n\n')
+	ap.add_argument('-s', '--save', action='store_true', help='save the timings as the baseline\n\n')
+	ap.add_argument('-c', '--baseline', default=os.path.join(file_dir, 'baseline.json'), help='the baseline file\n\n')
+	ap.add_argument('-x', '--threshold', type=float, default=0.1, help='mark medians that changed by more than this fraction\n\n')
+	ap.add_argument('--record', nargs=3, metavar=('REPLAY', 'TURN', 'NAME'), default=None, help='record a board from a replay\n\n')
+	args = vars(ap.parse_args())
+
+	if args['record'] is not None:
+		record_board(args['record'][0], int(args['record'][1]), args['record'][2])
+		sys.exit()
+
+	sys.path.insert(0, os.path.abspath(args['algo']))
+	import gamelib
+
+	baseline = {}
+	if not args['save'] and os.path.exists(args['baseline']):
+		with open(args['baseline']) as f:
+			baseline = json.load(f)
+
+	config, boards = load_boards(args['boards'])
+	results = {}
+	print ('{: <20}{: <10}{: >12}{: >12}{: >9}{: >10}'.format('Benchmark', 'Board', 'Fastest', 'Median', 'Spread', 'Change'))
+	for benchmark in make_benchmarks(gamelib):
+		if args['keyword'] not in benchmark.__name__:
+			continue
+		for name, board in boards.items():
+			functions = benchmark(config, board)
+			if functions is None:
+				continue
+			key = '{}/{}'.format(benchmark.__name__, name)
+			results[key] = measure(*functions, repeat=args['repeat'], min_time=args['min_time'])
+			fastest, median, spread = results[key]
+			change = ''
+			if key in baseline:
+				ratio = median / baseline[key][1] - 1
+				change = '{:+.0%}{}'.format(ratio, ' *' if abs(ratio) > args['threshold'] else '')
+			print ('{: <20}{: <10}{: >12}{: >12}{: >9.1%}{: >10}'.format(benchmark.__name__, name, format_time(fastest), format_time(median), spread, change))
+
+	if args['save']:
+		with open(args['baseline'], 'w') as f:
+			json.dump(results, f, indent=1)
+		print ('Saved the baseline to {}'.format(args['baseline']))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script that keeps a python algo loaded between games.
+It is started by run_arena.py -w and local_engine.py, and is not usually run by hand.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the scripts/contributions directory
+
+Starting an algo through run.sh means a new python interpreter, and importing gamelib and the
+strategy, for every game. This worker imports the algo's algo_strategy.py once and then plays
+game after game over the same stdin and stdout, with a new AlgoStrategy for each game, so
+nothing carries over from one game to the next except module level state.
+
+Before each game the worker reads one extra line, {"seed": <int>}, and seeds python's random
+with it before the AlgoStrategy is made, so games can be replayed exactly. For the same reason
+the algo's opening book (see gamelib/opening_book.py) is turned off, so a game does not depend
+on what earlier games recorded. Set OPENING_BOOK to a directory to use a book anyway.
+
+Example:
+>py scripts/contributions/algo_worker.py python-algo
+
+Only python algos built on the starter kit can be kept warm. If the algo crashes during a game
+the worker exits, the same way the algo would have.
+'''
+
+import sys
+try:
+	import os
+	import json
+	import random
+	import importlib.util
+	import traceback
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+# Imports algo_strategy.py from the algo directory, with the algo's gamelib on the path
+def load_strategy(algo_dir):
+	algo_dir = os.path.abspath(algo_dir)
+	sys.path.insert(0, algo_dir)
+	spec = importlib.util.spec_from_file_location("algo_strategy", os.path.join(algo_dir, "algo_strategy.py"))
+	module = importlib.util.module_from_spec(spec)
+	sys.modules["algo_strategy"] = module
+	spec.loader.exec_module(module)
+	return module
+
+
+# Returns True if the algo directory can be run by this worker
+def can_warm(algo_dir):
+	return os.path.isfile(os.path.join(algo_dir, "algo_strategy.py")) and os.path.isdir(os.path.join(algo_dir, "gamelib"))
+
+
+# Returns the command that starts a worker for the algo
+def worker_command(algo_dir):
+	return [sys.executable, "-u", os.path.realpath(__file__), os.path.abspath(algo_dir)]
+
+
+if __name__ == '__main__':
+	if len(sys.argv) != 2 or not can_warm(sys.argv[1]):
+		sys.stderr.write("Usage: algo_worker.py <python algo directory>\n")
+		sys.exit(1)
+
+	# the book is read when the AlgoStrategy is configured, so it has to be turned off before then
+	os.environ.setdefault("OPENING_BOOK", "off")
+	module = load_strategy(sys.argv[1])
+	while True:
+		line = sys.stdin.readline()
+		if line == "":
+			sys.exit()
+		# AlgoCore.start returns after the end of game frame, and exits when stdin closes
+		try:
+			random.seed(json.loads(line)["seed"])
+			module.AlgoStrategy().start()
+		except Exception:
+			traceback.print_exc()
+			sys.exit(1)
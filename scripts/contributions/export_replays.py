@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to turn replays into videos without opening a window, using every cpu.
+It draws the same picture as watch_replay.py -s, but much faster, and can export a whole
+directory of replays at once (for example every game of a tournament).
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the scripts/contributions directory
+
+Each replay's frames are split into chunks and every chunk is drawn by a worker process with
+matplotlib's Agg backend (no window). The raw images are then joined into one video by ffmpeg,
+or into a gif by ffmpeg or Pillow if ffmpeg is not installed.
+
+Export the latest replay:
+>py scripts/contributions/export_replays.py
+
+Export specific replays:
+>py scripts/contributions/export_replays.py -f [REPLAY_FILE].replay [REPLAY_FILE].replay
+
+Export every replay in a directory:
+>py scripts/contributions/export_replays.py -d replays
+
+The videos are written to replays/videos by default (change this with -o), named after their
+replay, as .mp4 unless you ask for -e gif. -b sets the number of worker processes (one per
+cpu by default), -r the frames per second and --dpi the resolution.
+
+matplotlib is required, and ffmpeg must be installed and in your PATH for .mp4 files.
+'''
+
+import sys
+try:
+	import os
+	import glob
+	import shutil
+	import argparse
+	import tempfile
+	import subprocess
+	import concurrent.futures
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+try:
+	# the backend must be chosen before pyplot is imported by watch_replay
+	import matplotlib
+	matplotlib.use('Agg')
+except ImportError:
+	print('matplotlib is required to export replays, install it with:\n>pip3 install matplotlib')
+	sys.exit()
+
+import watch_replay
+
+watch_replay.BLIT = False
+replay_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir, 'replays'))
+
+
+# Draws frames start to stop of a replay into a file of raw RGBA images, returns the image size
+def render_chunk(f_name, start, stop, dpi, out_name):
+	watch_replay.plt.rcParams['figure.dpi'] = dpi
+	replay = watch_replay.Replay(f_name)
+	graph = watch_replay.Graph(replay.frames, replay.frames_in_turn, replay.healths, ['empty'], False, headless=True)
+	keys = list(replay.frames)[start:stop]
+	with open(out_name, 'wb') as out:
+		for key in keys:
+			out.write(graph.render(key))
+	size = graph.render_size()
+	watch_replay.plt.close(graph.fig)
+	return size
+
+
+# Joins the chunk files in order into a video with ffmpeg
+def join_ffmpeg(chunk_names, size, fps, out_name):
+	command = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', '{}x{}'.format(*size), '-r', str(fps), '-i', '-']
+	if out_name.endswith('.mp4'):
+		command += ['-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2']
+	process = subprocess.Popen(command + [out_name], stdin=subprocess.PIPE)
+	for chunk_name in chunk_names:
+		with open(chunk_name, 'rb') as chunk:
+			shutil.copyfileobj(chunk, process.stdin)
+	process.stdin.close()
+	return process.wait() == 0
+
+
+# Joins the chunk files in order into a gif with Pillow
+def join_pillow(chunk_names, size, fps, out_name):
+	from PIL import Image
+	frame_bytes = size[0] * size[1] * 4
+	images = []
+	for chunk_name in chunk_names:
+		with open(chunk_name, 'rb') as chunk:
+			while True:
+				data = chunk.read(frame_bytes)
+				if len(data) < frame_bytes:
+					break
+				images.append(Image.frombytes('RGBA', size, data).convert('RGB').quantize())
+	if not images:
+		return False
+	images[0].save(out_name, save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+	return True
+
+
+# Splits every replay into chunks, renders them all on one process pool and joins each replay's chunks in order
+def export(f_names, out_dir, extension='mp4', jobs=None, fps=10, dpi=60):
+	jobs = jobs or os.cpu_count() or 1
+	has_ffmpeg = shutil.which('ffmpeg') is not None
+	if extension == 'mp4' and not has_ffmpeg:
+		print ('ffmpeg was not found in your PATH, it is needed for .mp4 files (use -e gif for Pillow)')
+		return
+	if not os.path.exists(out_dir):
+		os.makedirs(out_dir)
+
+	with tempfile.TemporaryDirectory() as tmp_dir, concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+		jobs_by_replay = []
+		for index, f_name in enumerate(f_names):
+			num_frames = len(watch_replay.Replay(f_name).frames)
+			chunk_size = max(10, -(-num_frames // jobs))
+			chunks = []
+			for start in range(0, num_frames, chunk_size):
+				chunk_name = os.path.join(tmp_dir, '{}-{}.rgba'.format(index, start))
+				chunks.append((chunk_name, executor.submit(render_chunk, f_name, start, start + chunk_size, dpi, chunk_name)))
+			jobs_by_replay.append((f_name, chunks))
+
+		for f_name, chunks in jobs_by_replay:
+			out_name = os.path.join(out_dir, '{}.{}'.format(os.path.splitext(os.path.basename(f_name))[0], extension))
+			try:
+				size = [future.result() for _, future in chunks][0]
+			except Exception as e:
+				print ('Error rendering {}:\n\t{}'.format(f_name, e))
+				continue
+			chunk_names = [chunk_name for chunk_name, _ in chunks]
+			joined = join_ffmpeg(chunk_names, size, fps, out_name) if has_ffmpeg else join_pillow(chunk_names, size, fps, out_name)
+			for chunk_name in chunk_names:
+				os.remove(chunk_name)
+			print ('{} {}'.format('Saved' if joined else 'Failed to save', out_name))
+
+
+if __name__ == '__main__':
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument('-f', '--file', nargs='*', default=[], help='replay files to export\n\n')
+	ap.add_argument('-d', '--directory', default='', help='export every replay in this directory\n\n')
+	ap.add_argument('-o', '--out', default=os.path.join(replay_dir, 'videos'), help='the directory videos are written to\n\n')
+	ap.add_argument('-e', '--extension', default='mp4', choices=['mp4', 'gif'], help='the video format\n\n')
+	ap.add_argument('-b', '--batch', type=int, default=None, help='number of worker processes (defaults to the number of cpus)\n\n')
+	ap.add_argument('-r', '--rate', type=int, default=10, help='frames per second\n\n')
+	ap.add_argument('--dpi', type=int, default=60, help='resolution of the video\n\n')
+	args = vars(ap.parse_args())
+
+	if args['directory'] != '':
+		f_names = sorted(glob.glob(os.path.join(args['directory'], '*.replay')))
+	elif len(args['file']) > 0:
+		f_names = [f_name if f_name.find('replays') != -1 else os.path.join(replay_dir, f_name) for f_name in args['file']]
+	else:
+		f_names = sorted(glob.glob(os.path.join(replay_dir, '*.replay')), key=os.path.getctime)[-1:]
+
+	if len(f_names) == 0:
+		print ('No replays found')
+	else:
+		export(f_names, args['out'], args['extension'], args['batch'], args['rate'], args['dpi'])
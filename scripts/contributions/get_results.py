@@ -70,6 +70,14 @@ You can specify how many replays back you would like to run (by date) using the
 
 would run the last 3 games you ran
 
+----------------------------------------------------------------------------------------
+-j: Number of processes reading replay files
+
+Replay files are read in one pass, keeping only the numbers per frame that are shown, and
+several files are read at a time on a process pool. By default one process per cpu is used,
+you can change this with:
+>py scripts/contributions/get_results.py -a -j 4
+
 ----------------------------------------------------------------------------------------
 -avg: Print average data fro a single replay (not very useful right now)
 
@@ -175,6 +183,7 @@ try:
 	import glob
 	import math
 	import argparse
+	import concurrent.futures
 except ImportError as e:
 	sys.stderr.write("WARNING: Module not found, full error:\n\n")
 	sys.stderr.write(e)
@@ -231,6 +240,11 @@ def parse_args():
 		nargs="*",
 		default=[],
 		help="specify what data you would like to be graphed - you must have matplotlib installed\n\nValid Options For Single Game:\n\t- health\n\t- bits\n\t- cores\n\t- cores_spent\n\t- bits_spent\n\t- cores_on_board\n\nValid Options For Multiple Games:\n\t- wins\n\n")
+	ap.add_argument(
+		"-j", "--jobs",
+		type=int,
+		default=None,
+		help="number of processes reading replay files (defaults to the number of cpus)\n\n")
 	return vars(ap.parse_args())
 
 
@@ -440,15 +454,71 @@ class Algo:
 		return disp
 
 
+# Reads a replay file in one pass, keeping only the per frame numbers Replay.unpack_data needs.
+# This is a plain function so it can run in a process pool, see read_replays.
+def read_replay(f_name):
+	data = {'fname': f_name, 'ref': None, 'frames': {}, 'endStats': None}
+	frames = data['frames']
+	with open(f_name) as f:
+		for line in f:
+			line = line.replace("\n", "")
+			line = line.replace("\t", "")
+			if line == '':
+				continue
+
+			frame = json.loads(line)
+			if 'debug' in frame:
+				data['ref'] = frame
+				continue
+
+			turn_num = frame['turnInfo'][1]
+			frame_num = frame['turnInfo'][2]
+			spawn = frame['events']['spawn'] if frame_num == 0 else []
+			# keyed by (turn, frame) so repeated frames keep their first position and their last values
+			frames[(turn_num, frame_num)] = (
+				frame['p1Stats'][:3],
+				frame['p2Stats'][:3],
+				get_cores_on_board(*frame['p1Units'][:3]),
+				get_cores_on_board(*frame['p2Units'][:3]),
+				[get_cores_spent(p_index, spawn) for p_index in (1, 2)],
+				[get_bits_spent(p_index, spawn) for p_index in (1, 2)]
+			)
+			if 'endStats' in frame:
+				data['endStats'] = frame['endStats']
+	return data
+
+# Reads many replay files at once, on a process pool when there is more than one file
+def read_replays(f_names, jobs=None):
+	if len(f_names) < 2 or jobs == 1:
+		return [read_replay(f_name) for f_name in f_names]
+	with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+		return list(executor.map(read_replay, f_names, chunksize=max(1, len(f_names) // (4 * (jobs or os.cpu_count() or 1)))))
+
+def get_cores_on_board(filters, encryptors, destructors):
+	return len(filters) + len(encryptors) * 4 + len(destructors) * 3
+
+def get_bits_spent(p_index, spawn):
+	pings = [x for x in spawn if x[3] == p_index and x[1] == 3]
+	emps = [x for x in spawn if x[3] == p_index and x[1] == 4]
+	scramblers = [x for x in spawn if x[3] == p_index and x[1] == 5]
+	return len(pings) + len(emps) * 3 + len(scramblers)
+
+def get_cores_spent(p_index, spawn):
+	filters = [x for x in spawn if x[3] == p_index and x[1] == 0]
+	encryptors = [x for x in spawn if x[3] == p_index and x[1] == 1]
+	destructors = [x for x in spawn if x[3] == p_index and x[1] == 2]
+	return len(filters) + len(encryptors) * 4 + len(destructors) * 3
+
 # Stores data from a single replay and creates the Algo classes
 class Replay:
-	def __init__(self, f_name, algos):
+	def __init__(self, f_name, algos, data=None):
 		self.fname = f_name;
-		self.ref = None
-		self.turns = {}
-		self.valid_turns = []
 
-		self.load_data()				# handles loading all the data from file into python variables
+		if data is None:
+			data = read_replay(f_name)	# handles loading all the data from file into python variables
+		self.ref = data['ref']
+		self.turns = data['frames']
+		self.end_stats = data['endStats']
 		self.unpack_data(algos)		# stores relevant data after it has been loaded
 
 	def __eq__(self, other):
@@ -460,85 +530,36 @@ class Replay:
 	def __repr__(self):
 		return self.__string()
 
-	def load_data(self):
-		with open(self.fname) as f:
-			for line in f:
-				line = line.replace("\n", "")
-				line = line.replace("\t", "")
-
-				if (line != ''):
-					data = json.loads(line)
-
-					try:
-						data['debug']
-						self.ref = data
-					except:
-						turn_num = data['turnInfo'][1]
-						frame_num = data['turnInfo'][2]
-						self.turns[(turn_num, frame_num)] = data
-						if (turn_num, frame_num) not in self.valid_turns:
-							self.valid_turns.append((turn_num, frame_num))
-
-	def get_cores_on_board(self, filters, encryptors, destructors):
-		return len(filters) + len(encryptors) * 4 + len(destructors) * 3
-
-	def get_bits_spent(self, algo, spawn):
-		p_index = 1 if algo == self.algo1 else 2
-		pings = [x for x in spawn if x[3] == p_index and x[1] == 3]
-		emps = [x for x in spawn if x[3] == p_index and x[1] == 4]
-		scramblers = [x for x in spawn if x[3] == p_index and x[1] == 5]
-		return len(pings) + len(emps) * 3 + len(scramblers)
-
-	def get_cores_spent(self, algo, spawn):
-		p_index = 1 if algo == self.algo1 else 2
-		filters = [x for x in spawn if x[3] == p_index and x[1] == 0]
-		encryptors = [x for x in spawn if x[3] == p_index and x[1] == 1]
-		destructors = [x for x in spawn if x[3] == p_index and x[1] == 2]
-		return len(filters) + len(encryptors) * 4 + len(destructors) * 3
-
-	def add_data_to_algo(self, algo, t, f, stats, units, spawn):
+	def add_data_to_algo(self, algo, p_index, t, f, frame):
+		stats = frame[p_index]
 		algo.add_data(self.fname, t, 'health', stats[0])
 		algo.add_data(self.fname, t, 'cores', stats[1])
 		algo.add_data(self.fname, t, 'bits', stats[2])
 
-		filters, encryptors, destructors, pings, emps, scramblers, removes = units
-
-		algo.add_data(self.fname, t, 'cores_on_board', self.get_cores_on_board(filters, encryptors, destructors))
+		algo.add_data(self.fname, t, 'cores_on_board', frame[2 + p_index])
 
 		if f == 0:
-			algo.add_data(self.fname, t, 'cores_spent', self.get_cores_spent(algo, spawn), True)
-			algo.add_data(self.fname, t, 'bits_spent', self.get_bits_spent(algo, spawn), True)
+			algo.add_data(self.fname, t, 'cores_spent', frame[4][p_index], True)
+			algo.add_data(self.fname, t, 'bits_spent', frame[5][p_index], True)
 
 	def unpack_data(self, algos):
 		try:
 			self.algo1, self.algo2 = self.create_algos(algos)
 
-			for t, f in self.get_valid_turns():
-				turn = self.get_turn(t, f)
-
-				turn_info = turn['turnInfo']
-				events = turn['events']
-				spawn = events['spawn']
-
-				p1_stats = turn['p1Stats']
-				p1_units = turn['p1Units']
-
-				p2_stats = turn['p2Stats']
-				p2_units = turn['p2Units']
-
-				self.add_data_to_algo(self.algo1, t, f, p1_stats, p1_units, spawn)
-				self.add_data_to_algo(self.algo2, t, f, p2_stats, p2_units, spawn)
+			for (t, f), frame in self.turns.items():
+				self.add_data_to_algo(self.algo1, 0, t, f, frame)
+				self.add_data_to_algo(self.algo2, 1, t, f, frame)
 
 			self.algo1.recored_final_data(self.fname, self.algo2)
 			self.algo2.recored_final_data(self.fname, self.algo1)
-			self.algo1.add_end_stats(self.fname, self.turns[self.valid_turns[-1]]['endStats']['player1'])
-			self.algo2.add_end_stats(self.fname, self.turns[self.valid_turns[-1]]['endStats']['player2'])
+			self.algo1.add_end_stats(self.fname, self.end_stats['player1'])
+			self.algo2.add_end_stats(self.fname, self.end_stats['player2'])
 		except Exception as e:
 			sys.stderr.write(str(e))
 
 	# only creates a new algo class if that algo does not already exist. Otherwise data is added to the existing one
 	def create_algos(self, algos):
-		end_stats = self.turns[self.valid_turns[-1]]['endStats']
+		end_stats = self.end_stats
 		p1_algo = end_stats['player1']['name']
 		p2_algo = end_stats['player2']['name']
 
@@ -560,7 +581,7 @@ class Replay:
 		return [self.algo1, self.algo2]
 
 	def get_valid_turns(self):
-		return self.valid_turns
+		return list(self.turns)
 	def get_turns(self):
 		return self.turns
 	def get_turn(self, turn, frame=-1):
@@ -593,23 +614,22 @@ class FileHandler:
 		return self.replays[i]
 
 	def __latest_replays(self, num=1, a=False):
-		replay_dir = os.path.dirname(os.path.realpath(__file__)).replace('scripts\\contributions', '')+'replays\\'
-		files = glob.glob('{}*.replay'.format(replay_dir))
+		replay_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir, 'replays'))
+		files = glob.glob(os.path.join(replay_dir, '*.replay'))
 		files = sorted(files, key=os.path.getctime, reverse=True)
 		if a:
 			return files
 		return files[:num]
 
-	def load_files(self, num=1, a=False, f_names=[]):
+	def load_files(self, num=1, a=False, f_names=[], jobs=None):
 		if len(f_names) > 0:
-			for f_name in f_names:
-				if f_name.find('replays') == -1:
-					self.replays.append(Replay('replays/'+f_name, self.algos))
-				else:
-					self.replays.append(Replay(f_name, self.algos))
+			f_names = [f_name if f_name.find('replays') != -1 else 'replays/'+f_name for f_name in f_names]
 		else:
-			for f_name in self.__latest_replays(num, a):
-				self.replays.append(Replay(f_name, self.algos))
+			f_names = self.__latest_replays(num, a)
+
+		# files are read in parallel, then merged into the algos one at a time in order
+		for data in read_replays(f_names, jobs):
+			self.replays.append(Replay(data['fname'], self.algos, data))
 
 	def add_plot(self, lbl):
 		if lbl == 'wins':
@@ -711,7 +731,7 @@ def main(args):
 	verbose_options, summary_options = get_graph_options(args['graph'])
 
 	fh = FileHandler()
-	fh.load_files(int(args['num']), args['all'], args['file']) #loads the files - all JSON reading is here
+	fh.load_files(int(args['num']), args['all'], args['file'], args.get('jobs')) #loads the files - all JSON reading is here
 
 	# check to see if matplotlib is installed
 	graphing_enabled = True if len(verbose_options) > 0 or len(summary_options) > 0 else False
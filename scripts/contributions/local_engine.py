@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to play a match between two algos without engine.jar or java.
+It is intended for quick local testing, for example running many matches in a row while
+tuning a strategy.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the scripts/contributions directory
+
+The algos are started with their run.sh (run.ps1 on windows) and spoken to over stdin and
+stdout exactly like the engine does, so any algo built on the starter kit works unchanged.
+The game itself is played by the Simulator class in gamelib/simulator.py.
+
+Example:
+>py scripts/contributions/local_engine.py python-algo python-2l-aet
+
+The replay is written to the replays directory in the engine's format, so get_results.py and
+watch_replay.py can read it. Use -t to cap the number of turns and -v to see the algos' debug output.
+
+Note the simulator follows the engine's rules closely, but not exactly. Targeting, pathing and
+resources match, but the exact order of events within a frame and rarely used config options
+(such as metalForBreach) are not reproduced. Use engine.jar for the final word on a strategy.
+
+If an algo takes longer than waitTimeBotMax in game-configs.json to send its turn, or exits,
+it loses the match, the same way it would crash on the engine.
+'''
+
+import sys
+try:
+	import os
+	import json
+	import time
+	import random
+	import argparse
+	import datetime
+	import threading
+	import subprocess
+	import queue
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+file_dir = os.path.dirname(os.path.realpath(__file__))
+parent_dir = os.path.abspath(os.path.join(file_dir, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(parent_dir, "python-algo"))
+
+from gamelib.simulator import Simulator, flip_frame
+
+
+# Returns the command that starts an algo and the algo's name
+def algo_command(path):
+	is_windows = sys.platform.startswith('win')
+	run_file = "run.ps1" if is_windows else "run.sh"
+	if not path.endswith(run_file):
+		path = os.path.join(path, run_file)
+	command = ["powershell.exe", "-File", path] if is_windows else ["bash", path]
+	return command, os.path.basename(os.path.dirname(os.path.abspath(path)))
+
+
+class Algo:
+	# Runs one algo and reads its stdout on a thread, so reads can time out
+	def __init__(self, command, name, verbose=False, seeded=False):
+		self.name = name
+		# algos run by algo_worker.py are sent a seed before every game
+		self.seeded = seeded
+		self.process = subprocess.Popen(
+			command,
+			stdin=subprocess.PIPE,
+			stdout=subprocess.PIPE,
+			stderr=None if verbose else subprocess.DEVNULL,
+			universal_newlines=True,
+			bufsize=1
+			)
+		self.lines = queue.Queue()
+		self.alive = True
+		self.timed_out = False
+		reader = threading.Thread(target=self.read)
+		# daemon necessary so the script exits if the algo hangs
+		reader.daemon = True
+		reader.start()
+
+	def read(self):
+		for line in self.process.stdout:
+			self.lines.put(line)
+		self.lines.put(None)
+
+	def send(self, message):
+		if not self.alive:
+			return
+		try:
+			self.process.stdin.write(message + "\n")
+			self.process.stdin.flush()
+		except (BrokenPipeError, OSError):
+			self.alive = False
+
+	def receive(self, timeout):
+		# Returns the next non empty line, or None if the algo died or ran out of time
+		deadline = time.time() + timeout
+		while self.alive:
+			try:
+				line = self.lines.get(timeout=max(deadline - time.time(), 0))
+			except queue.Empty:
+				return None
+			if line is None:
+				self.alive = False
+				return None
+			if line.strip():
+				return line.strip()
+		return None
+
+	def close(self):
+		if self.timed_out:
+			self.process.kill()
+			return
+		try:
+			self.process.stdin.close()
+			self.process.wait(timeout=5)
+		except (OSError, subprocess.TimeoutExpired):
+			self.process.kill()
+
+
+def flip_commands(commands):
+	return [[command[0], 27 - int(command[1]), 27 - int(command[2])] for command in commands]
+
+
+def parse_commands(line):
+	try:
+		commands = json.loads(line)
+	except (TypeError, ValueError):
+		return []
+	return [command for command in commands if isinstance(command, list) and len(command) >= 3]
+
+
+def send_frame(algos, frame):
+	line = json.dumps(frame)
+	algos[0].send(line)
+	algos[1].send(json.dumps(flip_frame(frame)))
+	return line
+
+
+def load_config(config_path):
+	with open(config_path) as config_file:
+		return json.load(config_file)
+
+
+# Plays one match between two running algos, which are left running afterwards
+def play(algos, config, max_turns, seed=None):
+	config_line = json.dumps(config)
+	if seed is None:
+		seed = random.randrange(2 ** 63)
+	time_limit = config.get("timingAndReplay", {}).get("waitTimeBotMax", 35000) / 1000
+
+	simulator = Simulator(config, max_turns=max_turns)
+	replay = [config_line]
+	start = time.time()
+	for algo in algos:
+		if algo.seeded:
+			algo.send(json.dumps({"seed": seed}))
+		algo.send(config_line)
+
+	turn_frame = simulator.turn_frame()
+	while True:
+		replay.append(send_frame(algos, turn_frame))
+		turns = []
+		for player_index, algo in enumerate(algos):
+			turn_start = time.time()
+			build = algo.receive(time_limit)
+			deploy = algo.receive(time_limit - (time.time() - turn_start)) if build is not None else None
+			taken = int((time.time() - turn_start) * 1000)
+			simulator.time[player_index] = taken
+			simulator.stats[player_index]["total_computation_time"] += taken
+			if deploy is None:
+				simulator.stats[player_index]["crashed"] = algo.alive is False
+				simulator.stats[player_index]["timeout_death"] = algo.alive
+				# an algo still working on its turn cannot be sent anything else
+				algo.timed_out = algo.alive
+				algo.alive = False
+				simulator.winner = 1 - player_index
+			turns.append((parse_commands(build), parse_commands(deploy)))
+		if simulator.is_over():
+			break
+
+		for player_index, (build, _) in enumerate(turns):
+			simulator.build(player_index, flip_commands(build) if player_index else build)
+		for player_index, (_, deploy) in enumerate(turns):
+			simulator.deploy(player_index, flip_commands(deploy) if player_index else deploy)
+		simulator.run_action_phase(on_frame=lambda frame: replay.append(send_frame(algos, frame)))
+		if simulator.is_over():
+			break
+		turn_frame = simulator.next_turn()
+
+	end_frame = simulator.end_frame([algo.name for algo in algos], int((time.time() - start) * 1000))
+	replay.append(send_frame(algos, end_frame))
+	return end_frame, replay
+
+
+def save_replay(replay):
+	replay_dir = os.path.join(parent_dir, "replays")
+	if not os.path.exists(replay_dir):
+		os.makedirs(replay_dir)
+	now = datetime.datetime.now()
+	name = "p1-{}-{:03d}--{}.replay".format(now.strftime("%d-%m-%Y-%H-%M-%S"), now.microsecond // 1000, random.randint(0, 2 ** 31))
+	path = os.path.join(replay_dir, name)
+	with open(path, "w") as replay_file:
+		replay_file.write("\n".join(replay) + "\n")
+	return path
+
+
+if __name__ == '__main__':
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument('algos', nargs='*', default=[], help='the two algo directories, both default to python-algo')
+	ap.add_argument('-c', '--config', default=os.path.join(parent_dir, "game-configs.json"), help='the game config to play with')
+	ap.add_argument('-t', '--turns', type=int, default=100, help='the game is decided on health after this many turns')
+	ap.add_argument('-v', '--verbose', action='store_true', help="show the algos' debug output")
+	args = vars(ap.parse_args())
+
+	paths = args['algos'] + [os.path.join(parent_dir, "python-algo")] * (2 - len(args['algos']))
+	algos = [Algo(*algo_command(path), verbose=args['verbose']) for path in paths[:2]]
+	end_frame, replay = play(algos, load_config(args['config']), args['turns'])
+	for algo in algos:
+		algo.close()
+	stats = end_frame["endStats"]
+	print("Winner: {} after {} turns ({} vs {} health)".format(
+		stats["player{}".format(stats["winner"])]["name"], stats["turns"], end_frame["p1Stats"][0], end_frame["p2Stats"][0]))
+	print("Replay saved to {}".format(save_replay(replay)))
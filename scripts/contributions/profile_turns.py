@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to measure how long a python algo takes to decide its turns, on the
+boards of real games, without running any matches. It is intended for catching an algo (or a
+change to gamelib) getting slower on busy late-game boards.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the scripts/contributions directory
+
+Every replay is played back to the algo in this process: the config and every frame the algo
+saw during that game (flipped when it played as player 2) are fed through a fake stdin, and its
+commands are read from a fake stdout. The algo's commands do not change the game, so every turn
+is decided on exactly the board of the recorded game, whatever the algo sends.
+
+For every turn the wall-clock time of on_turn, and the commands it sent, are recorded. With -m
+the memory allocated during the turn (its peak, above what was allocated before the turn) and
+the number of memory blocks the turn left allocated are recorded too, at the cost of slower turns.
+
+Profile python-2l-aet as player 1 on the latest replay:
+>py scripts/contributions/profile_turns.py python-2l-aet
+
+Profile it as player 2 on every replay in a directory, and save the results:
+>py scripts/contributions/profile_turns.py python-2l-aet -d replays -p 2 -o profile.json
+
+Compare against saved results, for example after a change to the algo or to gamelib:
+>py scripts/contributions/profile_turns.py python-2l-aet -d replays -p 2 -c profile.json
+
+The comparison prints how much slower or faster every replay is, the turns that became more
+than -x times slower, and the turns whose commands changed. python's random is seeded with -s
+before each replay so the same algo sends the same commands every time. -n plays every replay
+that many times and keeps the fastest time of each turn, for steadier timings. The algo's opening
+book is turned off, as in algo_worker.py, so every run computes its first turns live and nothing is
+written into the algo directory. Set OPENING_BOOK to a directory to profile with a book.
+
+If the algo raises an exception, the replay, the turn and the traceback are printed, the turns
+before it are kept, and profiling carries on with the next replay.
+
+Only python algos built on the starter kit can be profiled, the same as run_arena.py -w.
+'''
+
+import sys
+try:
+	import os
+	import io
+	import gc
+	import json
+	import glob
+	import time
+	import random
+	import argparse
+	import statistics
+	import traceback
+	import tracemalloc
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+from algo_worker import can_warm, load_strategy
+
+replay_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir, 'replays'))
+
+
+# Returns the lines the algo playing as player (1 or 2) was sent during the game, config first
+def replay_lines(f_name, player, flip_frame):
+	lines = []
+	with open(f_name) as f:
+		for line in f:
+			line = line.strip()
+			if line == '':
+				continue
+			frame = json.loads(line)
+			if 'turnInfo' not in frame:
+				# the config, the same check AlgoCore.start makes
+				if 'replaySave' in line:
+					lines.append(line)
+				continue
+			lines.append(json.dumps(flip_frame(frame)) if player == 2 else line)
+	return lines
+
+
+# Plays the lines to a new AlgoStrategy and returns [turn, ms, peak KB, blocks, build, deploy] for every turn,
+# and [turn, traceback] if the algo raised an exception, the turn being None if it was not in on_turn
+def profile_game(module, lines, seed=0, memory=False):
+	turns = []
+	stdout = io.StringIO()
+	error = None
+	current = [None]
+
+	def timed_on_turn(turn_state):
+		# the turn number is read from the string before the clock starts
+		turn = json.loads(turn_state)['turnInfo'][1]
+		current[0] = turn
+		written = stdout.tell()
+		if memory:
+			tracemalloc.reset_peak()
+			allocated, _ = tracemalloc.get_traced_memory()
+			blocks = sys.getallocatedblocks()
+		start = time.perf_counter()
+		on_turn(turn_state)
+		taken = (time.perf_counter() - start) * 1000
+		peak, blocks_left = None, None
+		if memory:
+			peak = (tracemalloc.get_traced_memory()[1] - allocated) / 1024
+			blocks_left = sys.getallocatedblocks() - blocks
+		commands = stdout.getvalue()[written:].splitlines()
+		commands += ['[]'] * (2 - len(commands))
+		turns.append([turn, taken, peak, blocks_left, commands[0], commands[1]])
+		current[0] = None
+
+	streams = sys.stdin, sys.stdout, sys.stderr
+	sys.stdin = io.StringIO('\n'.join(lines) + '\n')
+	sys.stdout = stdout
+	sys.stderr = io.StringIO()
+	if memory:
+		tracemalloc.start()
+	try:
+		# seeded before the AlgoStrategy is made, the same as algo_worker.py, as algos often seed themselves from random
+		random.seed(seed)
+		strategy = module.AlgoStrategy()
+		on_turn = strategy.on_turn
+		strategy.on_turn = timed_on_turn
+		strategy.start()
+	except SystemExit:
+		# get_command exits when the replay ends without an end of game frame
+		pass
+	except Exception:
+		error = [current[0], traceback.format_exc()]
+	finally:
+		if memory:
+			tracemalloc.stop()
+		sys.stdin, sys.stdout, sys.stderr = streams
+	return turns, error
+
+
+# Profiles the algo on every replay, playing each one repeat times and keeping the fastest time of every turn.
+# Returns the turns of every replay, and [replay, turn, traceback] for every replay the algo raised an exception on.
+def profile(algo_dir, f_names, player=1, seed=0, memory=False, repeat=1):
+	# a book would make every run after the first time lookups instead of the turns
+	os.environ.setdefault("OPENING_BOOK", "off")
+	module = load_strategy(algo_dir)
+	from gamelib.simulator import flip_frame
+
+	results = {}
+	errors = []
+	for f_name in f_names:
+		lines = replay_lines(f_name, player, flip_frame)
+		runs = []
+		for _ in range(repeat):
+			# so garbage from the previous run is not collected during this one
+			gc.collect()
+			turns, error = profile_game(module, lines, seed, memory)
+			runs.append(turns)
+			if error is not None:
+				# the algo plays the same turns every run, so it would only raise again
+				errors.append([os.path.basename(f_name)] + error)
+				break
+		turns = runs[0]
+		for run in runs[1:]:
+			for turn, other in zip(turns, run):
+				turn[1] = min(turn[1], other[1])
+		results[os.path.basename(f_name)] = turns
+	return results, errors
+
+
+def summary(results):
+	times = [turn[1] for turns in results.values() for turn in turns]
+	if not times:
+		return 'No turns were played'
+	times.sort()
+	line = '{} turns in {} replays, mean {:.1f} ms, median {:.1f} ms, 95th percentile {:.1f} ms, max {:.1f} ms'.format(
+		len(times), len(results), statistics.mean(times), statistics.median(times), times[int(0.95 * (len(times) - 1))], times[-1])
+	peaks = [turn[2] for turns in results.values() for turn in turns if turn[2] is not None]
+	if peaks:
+		line += '\nmemory allocated per turn: mean {:.0f} KB, max {:.0f} KB'.format(statistics.mean(peaks), max(peaks))
+	return line
+
+
+def print_turns(results):
+	print ('{: >5}{: >10}{: >10}{: >10}{: >8}{: >8}'.format('Turn', 'ms', 'Peak KB', 'Blocks', 'Build', 'Deploy'))
+	for f_name, turns in results.items():
+		print (f_name)
+		for turn, taken, peak, blocks, build, deploy in turns:
+			print ('{: >5}{: >10.1f}{: >10}{: >10}{: >8}{: >8}'.format(turn, taken, '-' if peak is None else '{:.0f}'.format(peak),
+				'-' if blocks is None else blocks, len(json.loads(build)), len(json.loads(deploy))))
+
+
+# Prints how the results differ from a baseline, returns the number of turns that got slower or changed their commands
+def compare(results, baseline, threshold=1.5):
+	regressions = 0
+	for f_name, turns in results.items():
+		if f_name not in baseline:
+			print ('{}: not in the baseline'.format(f_name))
+			continue
+		before = {turn[0]: turn for turn in baseline[f_name]}
+		total, total_before = 0, 0
+		for turn in turns:
+			if turn[0] not in before:
+				continue
+			old = before[turn[0]]
+			total += turn[1]
+			total_before += old[1]
+			if turn[1] > threshold * old[1]:
+				print ('\tturn {} took {:.1f} ms, was {:.1f} ms'.format(turn[0], turn[1], old[1]))
+				regressions += 1
+			if turn[4:] != old[4:]:
+				print ('\tturn {} sent different commands'.format(turn[0]))
+				regressions += 1
+		if total_before > 0:
+			print ('{}: {:.1f} ms, was {:.1f} ms ({:+.0%})'.format(f_name, total, total_before, total / total_before - 1))
+	return regressions
+
+
+if __name__ == '__main__':
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument('algo', help='the python algo directory to profile\n\n')
+	ap.add_argument('-f', '--file', nargs='*', default=[], help='replay files to play back\n\n')
+	ap.add_argument('-d', '--directory', default='', help='play back every replay in this directory\n\n')
+	ap.add_argument('-p', '--player', type=int, default=1, choices=[1, 2], help='the side the algo plays from\n\n')
+	ap.add_argument('-s', '--seed', type=int, default=0, help="the seed of python's random before each replay\n\n")
+	ap.add_argument('-n', '--repeat', type=int, default=1, help='play every replay this many times and keep the fastest turns\n\n')
+	ap.add_argument('-m', '--memory', action='store_true', help='also record the memory allocated during every turn\n\n')
+	ap.add_argument('-t', '--turns', action='store_true', help='print every turn, not just the summary\n\n')
+	ap.add_argument('-o', '--out', default='', help='save the results to this json file\n\n')
+	ap.add_argument('-c', '--compare', default='', help='compare against results saved with -o\n\n')
+	ap.add_argument('-x', '--threshold', type=float, default=1.5, help='report turns that became this many times slower\n\n')
+	args = vars(ap.parse_args())
+
+	if not can_warm(args['algo']):
+		print ('{} is not a python algo built on the starter kit'.format(args['algo']))
+		sys.exit()
+
+	if args['directory'] != '':
+		f_names = sorted(glob.glob(os.path.join(args['directory'], '*.replay')))
+	elif len(args['file']) > 0:
+		f_names = [f_name if f_name.find('replays') != -1 else os.path.join(replay_dir, f_name) for f_name in args['file']]
+	else:
+		f_names = sorted(glob.glob(os.path.join(replay_dir, '*.replay')), key=os.path.getctime)[-1:]
+	if len(f_names) == 0:
+		print ('No replays found')
+		sys.exit()
+
+	results, errors = profile(args['algo'], f_names, args['player'], args['seed'], args['memory'], args['repeat'])
+	if args['turns']:
+		print_turns(results)
+		print ()
+	for f_name, turn, trace in errors:
+		print ('{}: the algo raised an exception {}\n{}'.format(f_name, 'on turn {}'.format(turn) if turn is not None else 'outside on_turn', trace))
+	print (summary(results))
+	if errors:
+		print ('{} of {} replays stopped early on an exception'.format(len(errors), len(results)))
+
+	if args['out'] != '':
+		with open(args['out'], 'w') as f:
+			json.dump(results, f)
+		print ('Saved to {}'.format(args['out']))
+	if args['compare'] != '':
+		with open(args['compare']) as f:
+			baseline = json.load(f)
+		print ()
+		regressions = compare(results, baseline, args['threshold'])
+		print ('{} turns got slower or changed their commands'.format(regressions))
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to index replay files once into an SQLite database, so questions about
+many matches (win rates, resources spent, health over time) can be answered without reading
+every .replay file again.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the scripts/contributions directory
+
+The index is kept in replays/index.sqlite and holds one row per frame with both players' stats,
+one row per spawn and death event, and one row per player with their end stats. A manifest of
+the indexed files, with their size and modification time, means only new or changed replays are
+read on each update, and replays that were deleted are dropped from the index. Replays of matches
+that are still running are indexed as far as they have been written, and the next update only
+reads the lines added since; they count towards wins and resources once their end frame is in.
+
+Update the index (every other command does this first, unless -n is given):
+>py scripts/contributions/replay_index.py update
+
+Win rate of every algo, and of every pairing with -p:
+>py scripts/contributions/replay_index.py wins
+>py scripts/contributions/replay_index.py wins -p
+
+Average resources spent per game by every algo:
+>py scripts/contributions/replay_index.py spent
+
+Health of both players at the start of every turn of a replay (the latest one if none is given):
+>py scripts/contributions/replay_index.py health [REPLAY_FILE].replay
+
+Each query only reads the columns it needs. The database can also be opened with any SQLite
+tool, see SCHEMA below for its tables.
+'''
+
+import sys
+try:
+	import os
+	import json
+	import glob
+	import sqlite3
+	import argparse
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+	id INTEGER PRIMARY KEY,
+	fname TEXT UNIQUE NOT NULL,
+	mtime REAL NOT NULL,
+	size INTEGER NOT NULL,
+	p1_name TEXT,
+	p2_name TEXT,
+	winner INTEGER,
+	turns INTEGER,
+	frames INTEGER,
+	read_to INTEGER
+);
+CREATE TABLE IF NOT EXISTS frames (
+	file_id INTEGER NOT NULL,
+	turn INTEGER NOT NULL,
+	frame INTEGER NOT NULL,
+	p1_health REAL, p1_sp REAL, p1_mp REAL, p1_time REAL,
+	p2_health REAL, p2_sp REAL, p2_mp REAL, p2_time REAL,
+	PRIMARY KEY (file_id, turn, frame)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+	file_id INTEGER NOT NULL,
+	turn INTEGER NOT NULL,
+	frame INTEGER NOT NULL,
+	kind TEXT NOT NULL,
+	x INTEGER, y INTEGER,
+	unit_type INTEGER,
+	unit_id TEXT,
+	player INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_by_file ON events (file_id, kind);
+CREATE TABLE IF NOT EXISTS end_stats (
+	file_id INTEGER NOT NULL,
+	player INTEGER NOT NULL,
+	name TEXT,
+	points_scored REAL,
+	stationary_resource_spent REAL,
+	dynamic_resource_spent REAL,
+	dynamic_resource_destroyed REAL,
+	dynamic_resource_spoiled REAL,
+	stationary_resource_left_on_board REAL,
+	total_computation_time REAL,
+	crashed INTEGER,
+	timeout_death INTEGER,
+	PRIMARY KEY (file_id, player)
+) WITHOUT ROWID;
+'''
+
+END_STATS = ['points_scored', 'stationary_resource_spent', 'dynamic_resource_spent', 'dynamic_resource_destroyed',
+	'dynamic_resource_spoiled', 'stationary_resource_left_on_board', 'total_computation_time', 'crashed', 'timeout_death']
+
+replay_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir, 'replays'))
+
+
+# Opens the index, creating its directory and tables if needed
+def connect(path=None):
+	path = path or os.path.join(replay_dir, 'index.sqlite')
+	directory = os.path.dirname(os.path.abspath(path))
+	if not os.path.isdir(directory):
+		os.makedirs(directory)
+	connection = sqlite3.connect(path)
+	connection.executescript(SCHEMA)
+	# indexes made before unfinished replays were kept have no read_to column
+	if 'read_to' not in [row[1] for row in connection.execute('PRAGMA table_info(files)')]:
+		with connection:
+			connection.execute('ALTER TABLE files ADD COLUMN read_to INTEGER')
+	return connection
+
+
+# Reads a replay in one pass from a byte offset and returns its rows for each table, and the offset read up to
+def read_replay(f_name, offset=0):
+	frames = {}
+	events = []
+	end_stats = None
+	with open(f_name, 'rb') as f:
+		f.seek(offset)
+		for raw in f:
+			line = raw.strip()
+			if line == b'':
+				offset += len(raw)
+				continue
+			try:
+				frame = json.loads(line)
+			except ValueError:
+				if raw.endswith(b'\n'):
+					raise
+				# the engine is still writing this line, it is read on the next update
+				break
+			offset += len(raw)
+			if 'debug' in frame:
+				continue
+
+			turn, frame_num = frame['turnInfo'][1], frame['turnInfo'][2]
+			frames[(turn, frame_num)] = (turn, frame_num) + tuple(frame['p1Stats'][:4]) + tuple(frame['p2Stats'][:4])
+			for kind in ('spawn', 'death'):
+				for event in frame['events'].get(kind, []):
+					location, unit_type, unit_id, player = event[:4]
+					events.append((turn, frame_num, kind, location[0], location[1], unit_type, str(unit_id), player))
+			if 'endStats' in frame:
+				end_stats = frame['endStats']
+	return list(frames.values()), events, end_stats, offset
+
+
+# Adds new and changed replays to the index and drops deleted ones, returns the number of files read
+def update(connection, f_names=None):
+	if f_names is None:
+		f_names = glob.glob(os.path.join(replay_dir, '*.replay'))
+	f_names = [os.path.abspath(f_name) for f_name in f_names]
+	known = {row[1]: (row[0],) + row[2:] for row in connection.execute('SELECT id, fname, mtime, size, read_to FROM files')}
+
+	read = 0
+	with connection:
+		for fname in set(known) - set(f_names):
+			drop(connection, known[fname][0])
+		for fname in f_names:
+			stat = os.stat(fname)
+			file_id, offset = None, 0
+			if fname in known:
+				file_id, mtime, size, read_to = known[fname]
+				if (mtime, size) == (stat.st_mtime, stat.st_size):
+					continue
+				if read_to is not None and stat.st_size >= read_to:
+					# a running match only appends to its replay, so reading carries on where the last update stopped
+					offset = read_to
+				else:
+					drop(connection, file_id)
+					file_id = None
+
+			frames, events, end_stats, read_to = read_replay(fname, offset)
+			if file_id is None:
+				file_id = connection.execute('INSERT INTO files (fname, mtime, size, read_to) VALUES (?, ?, ?, ?)',
+					(fname, stat.st_mtime, stat.st_size, read_to)).lastrowid
+			else:
+				connection.execute('UPDATE files SET mtime = ?, size = ?, read_to = ? WHERE id = ?', (stat.st_mtime, stat.st_size, read_to, file_id))
+			connection.executemany('INSERT OR REPLACE INTO frames VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [(file_id,) + row for row in frames])
+			connection.executemany('INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [(file_id,) + row for row in events])
+			read += 1
+			if end_stats is None:
+				# the match is still running
+				continue
+			connection.execute('UPDATE files SET p1_name = ?, p2_name = ?, winner = ?, turns = ?, frames = ?, read_to = NULL WHERE id = ?',
+				(end_stats['player1']['name'], end_stats['player2']['name'], end_stats['winner'], end_stats['turns'], end_stats['frames'], file_id))
+			for player in (1, 2):
+				stats = end_stats['player{}'.format(player)]
+				connection.execute('INSERT INTO end_stats VALUES (?, ?, ?, {})'.format(', '.join('?' * len(END_STATS))),
+					[file_id, player, stats['name']] + [stats.get(key) for key in END_STATS])
+	return read
+
+
+def drop(connection, file_id):
+	for table, column in (('frames', 'file_id'), ('events', 'file_id'), ('end_stats', 'file_id'), ('files', 'id')):
+		connection.execute('DELETE FROM {} WHERE {} = ?'.format(table, column), (file_id,))
+
+
+# Returns [name, wins, games] for every algo, or [name, opponent, wins, games] for every pairing
+def win_rates(connection, pairings=False):
+	if pairings:
+		query = '''
+			SELECT name, opponent, SUM(won), COUNT(*) FROM (
+				SELECT p1_name AS name, p2_name AS opponent, winner = 1 AS won FROM files WHERE read_to IS NULL
+				UNION ALL SELECT p2_name, p1_name, winner = 2 FROM files WHERE read_to IS NULL)
+			GROUP BY name, opponent ORDER BY name, opponent'''
+	else:
+		query = '''
+			SELECT name, SUM(won), COUNT(*) FROM (
+				SELECT p1_name AS name, winner = 1 AS won FROM files WHERE read_to IS NULL
+				UNION ALL SELECT p2_name, winner = 2 FROM files WHERE read_to IS NULL)
+			GROUP BY name ORDER BY SUM(won) * 1.0 / COUNT(*) DESC'''
+	return [list(row) for row in connection.execute(query)]
+
+
+# Returns [name, SP spent, MP spent, MP spoiled, points scored] averaged over every game of every algo
+def resources_spent(connection):
+	return [list(row) for row in connection.execute('''
+		SELECT name, AVG(stationary_resource_spent), AVG(dynamic_resource_spent), AVG(dynamic_resource_spoiled), AVG(points_scored)
+		FROM end_stats GROUP BY name ORDER BY name''')]
+
+
+# Returns the names of both players and [turn, p1 health, p2 health] at the start of every turn of a replay
+def health_curve(connection, fname=None):
+	if fname is None:
+		row = connection.execute('SELECT id, p1_name, p2_name FROM files ORDER BY mtime DESC LIMIT 1').fetchone()
+	else:
+		row = connection.execute('SELECT id, p1_name, p2_name FROM files WHERE fname = ?', (os.path.abspath(fname),)).fetchone()
+	if row is None:
+		return None, []
+	file_id, p1_name, p2_name = row
+	# the names are only known once the match has finished
+	p1_name, p2_name = p1_name or 'Player 1', p2_name or 'Player 2'
+	curve = connection.execute('SELECT turn, p1_health, p2_health FROM frames WHERE file_id = ? AND frame = -1 ORDER BY turn', (file_id,))
+	return (p1_name, p2_name), [list(point) for point in curve]
+
+
+if __name__ == '__main__':
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument('command', choices=['update', 'wins', 'spent', 'health'], help='what to do, see the top of this file\n\n')
+	ap.add_argument('file', nargs='?', default=None, help='the replay to show with health\n\n')
+	ap.add_argument('-p', '--pairings', action='store_true', help='show win rates for every pairing\n\n')
+	ap.add_argument('-n', '--no-update', action='store_true', help='query the index without updating it first\n\n')
+	ap.add_argument('-d', '--database', default=None, help='the index file, replays/index.sqlite by default\n\n')
+	args = vars(ap.parse_args())
+
+	connection = connect(args['database'])
+	if args['command'] == 'update' or not args['no_update']:
+		read = update(connection)
+		if args['command'] == 'update':
+			print ('Indexed {} new or changed replays'.format(read))
+
+	if args['command'] == 'wins':
+		for row in win_rates(connection, args['pairings']):
+			print ('{: <30}'.format(' vs '.join(row[:-2])) + '{: >5} / {: <5} {:.0%}'.format(row[-2], row[-1], row[-2] / row[-1]))
+	elif args['command'] == 'spent':
+		print ('{: <30}{: >10}{: >10}{: >10}{: >10}'.format('Algo', 'SP', 'MP', 'Spoiled', 'Scored'))
+		for row in resources_spent(connection):
+			print ('{: <30}{: >10.1f}{: >10.1f}{: >10.1f}{: >10.1f}'.format(*row))
+	elif args['command'] == 'health':
+		names, curve = health_curve(connection, args['file'])
+		if names is None:
+			print ('Replay not found in the index')
+		else:
+			print ('{: >5}{: >15}{: >15}'.format('Turn', names[0][:14], names[1][:14]))
+			for turn, p1_health, p2_health in curve:
+				print ('{: >5}{: >15.0f}{: >15.0f}'.format(turn, p1_health, p2_health))
+	connection.close()
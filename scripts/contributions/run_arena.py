@@ -58,6 +58,15 @@ For example:
 
 This would run every single game like before, but 6 games at a time.
 
+Adding -w runs the matches with local_engine.py instead of engine.jar, keeping the algos
+loaded between matches. Every one of the batch_size worker processes starts each python algo
+once, through algo_worker.py, and reuses it for every match it is given, so interpreter
+startup and imports are only paid once per algo per worker. Algos that are not python
+are started with their run.sh for every match. -t caps the number of turns in warm matches.
+
+For example:
+>py scripts/contributions/run_arena.py -s algo1 algo2 algo3 -w -b 4
+
 DO NOT RUN WITH A LARGE BATCH SIZE (like >15, depending on your computer) or else it will take forever and crash.
 
 
@@ -79,6 +88,7 @@ try:
 	import time
 	import copy
 	import multiprocessing as mp
+	import concurrent.futures
 except ImportError as e:
 	print("WARNING: Module not found, full error:\n")
 	print(str(e))
@@ -164,6 +174,15 @@ def parse_args():
 		type=int,
 		default=5,
 		help="number of games to run at a single time (on seperate threads)\n\n")
+	ap.add_argument(
+		"-w", "--warm",
+		action='store_true',
+		help="run games with local_engine.py, keeping algos loaded between games\n\n")
+	ap.add_argument(
+		"-t", "--turns",
+		type=int,
+		default=100,
+		help="the most turns in a game run with -w\n\n")
 	return vars(ap.parse_args())
 
 # called by the -a arg, runs every algo in directory
@@ -225,6 +244,70 @@ def run_matches(matches, batch_size):
 	print ('Finished all matches!')
 	print ()
 
+# algos kept running by this worker process, keyed by algo directory and side
+warm_algos = {}
+warm_config = None
+
+# returns a running algo for the side, starting it if this worker has none
+def get_warm_algo(algo_dir, player_index):
+	from local_engine import Algo, algo_command
+	from algo_worker import can_warm, worker_command
+
+	key = (algo_dir, player_index)
+	algo = warm_algos.get(key)
+	if algo is not None and algo.alive:
+		return algo
+	if can_warm(algo_dir):
+		algo = Algo(worker_command(algo_dir), os.path.basename(algo_dir), seeded=True)
+		warm_algos[key] = algo
+	else:
+		algo = Algo(*algo_command(algo_dir))
+	return algo
+
+# plays a single game in a worker process and returns the names of the algos and the winner
+def run_warm_match(algo1, algo2, turns, seed=None):
+	global warm_config
+	from local_engine import play, save_replay, load_config, parent_dir
+
+	if warm_config is None:
+		warm_config = load_config(os.path.join(parent_dir, "game-configs.json"))
+	algos = [get_warm_algo(algo1, 0), get_warm_algo(algo2, 1)]
+	end_frame, replay = play(algos, warm_config, turns, seed)
+	for key, algo in zip(((algo1, 0), (algo2, 1)), algos):
+		# algos started with run.sh exit after every game, and crashed workers are replaced
+		if warm_algos.get(key) is not algo or not algo.alive:
+			if warm_algos.get(key) is algo:
+				del warm_algos[key]
+			algo.close()
+	save_replay(replay)
+	return algos[0].name, algos[1].name, end_frame["endStats"]["winner"]
+
+# runs every match on batch_size worker processes, which keep their algos loaded between matches
+def run_warm_matches(matches, batch_size, turns):
+	matches = list(matches)
+	if not matches:
+		return
+	max_name_len = len(max(matches, key=lambda e:len(e[0]))[0])
+	algos_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir, 'algos')
+
+	def finished(future):
+		if future.exception() is not None:
+			print ('Error with match:\n\tError:\n{}'.format(future.exception()))
+			return
+		algo1, algo2, winner = future.result()
+		print ("{: <30}{: <{fill}}   vs   {}   winner: {}".format('Finished running match:', algo1, algo2, (algo1, algo2)[winner - 1], fill=str(max_name_len)))
+
+	with concurrent.futures.ProcessPoolExecutor(max_workers=batch_size) as executor:
+		for match in matches:
+			print ('{: <30}{: <{fill}}   vs   {}'.format('Starting match:', match[0], match[1], fill=str(max_name_len)))
+			algo1 = os.path.abspath(os.path.join(algos_dir, match[0]))
+			algo2 = os.path.abspath(os.path.join(algos_dir, match[1]))
+			executor.submit(run_warm_match, algo1, algo2, turns).add_done_callback(finished)
+
+	print ()
+	print ('Finished all matches!')
+	print ()
+
 if __name__ == '__main__':
 	args = parse_args() # get command line arguments
 
@@ -240,7 +323,10 @@ if __name__ == '__main__':
 		sys.exit()
 
 	tmp = copy.deepcopy(matches)
-	run_matches(matches, args['batch'])		# run all matches
+	if args['warm']:
+		run_warm_matches(matches, args['batch'], args['turns'])		# run all matches on warm algos
+	else:
+		run_matches(matches, args['batch'])		# run all matches
 
 	# if get_results is avalible, run a summary of the matches played
 	try:
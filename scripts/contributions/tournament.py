@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to find out which of a set of algos is strongest with as few games as
+possible. It is intended for comparing strategies that make random choices, where one game per
+pairing (like run_arena.py) says little.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the scripts/contributions directory
+
+Every pairing of algos plays repeated games on warm algos (see run_arena.py -w), swapping sides
+after every game. Both games of a swapped pair use the same seed, so the algos make the same
+random choices from both sides and the seeds make every game repeatable.
+
+After every game a sequential probability ratio test (SPRT) checks whether the pairing is
+decided, that is whether the first algo wins more than half its games against the second by
+at least the margin in -e (in Elo), or loses by at least as much. Decided pairings stop, and
+their workers are given to the pairings that are least decided. Pairings that reach -g games
+without being decided stop as well.
+
+Bradley-Terry ratings, on the Elo scale with 95% confidence intervals, are printed for all algos
+once every pairing has stopped, and with -p every time a pairing is decided.
+
+Example:
+>py scripts/contributions/tournament.py algo1 algo2 algo3 -b 4 -g 200
+
+Where algo1,2,3 are folders in the /algos/ directory, the same as for run_arena.py -s.
+
+-a and -r set the chance of the SPRT wrongly declaring a winner and wrongly declaring a loser
+(0.05 each by default), and -s sets the seed of the first game, so a whole tournament can be
+replayed.
+'''
+
+import sys
+try:
+	import os
+	import math
+	import queue
+	import argparse
+	import itertools
+	import concurrent.futures
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+from run_arena import run_warm_match
+
+ELO_SCALE = 400 / math.log(10)
+
+
+# Converts an Elo difference into the chance the stronger algo wins
+def elo_to_score(elo):
+	return 1 / (1 + 10 ** (-elo / 400))
+
+
+class Pairing:
+	# The games played between two algos and the state of their SPRT
+	def __init__(self, algo1, algo2, seed):
+		self.algos = (algo1, algo2)
+		self.seed = seed
+		self.wins = 0
+		self.losses = 0
+		self.running = 0
+		self.result = None
+
+	@property
+	def games(self):
+		return self.wins + self.losses
+
+	def next_game(self):
+		# Returns the algos in side order and the seed of the next game, sides swap every game
+		game = self.games + self.running
+		self.running += 1
+		algos = self.algos if game % 2 == 0 else self.algos[::-1]
+		return algos, self.seed + game // 2
+
+	def record(self, first_won):
+		self.running -= 1
+		if first_won:
+			self.wins += 1
+		else:
+			self.losses += 1
+
+	def llr(self, elo_margin):
+		# Log likelihood ratio of the first algo being elo_margin stronger against it being elo_margin weaker
+		p0 = elo_to_score(-elo_margin)
+		p1 = elo_to_score(elo_margin)
+		return self.wins * math.log(p1 / p0) + self.losses * math.log((1 - p1) / (1 - p0))
+
+
+class Tournament:
+	# Schedules games between every pairing of algos until each pairing is decided
+	def __init__(self, algos, max_games=200, elo_margin=50, alpha=0.05, beta=0.05, seed=0):
+		self.algos = list(algos)
+		self.max_games = max_games
+		self.elo_margin = elo_margin
+		self.lower = math.log(beta / (1 - alpha))
+		self.upper = math.log((1 - beta) / alpha)
+		self.pairings = [Pairing(algo1, algo2, seed + index * max_games) for index, (algo1, algo2) in enumerate(itertools.combinations(self.algos, 2))]
+
+	def open_pairings(self):
+		return [pairing for pairing in self.pairings if pairing.result is None and pairing.games + pairing.running < self.max_games]
+
+	def next_pairing(self):
+		# The pairing furthest from a decision, measured by how far its LLR is from either bound
+		candidates = self.open_pairings()
+		if not candidates:
+			return None
+		return min(candidates, key=lambda pairing: (-min(pairing.llr(self.elo_margin) - self.lower, self.upper - pairing.llr(self.elo_margin)), pairing.running, pairing.games))
+
+	def record(self, pairing, winner):
+		# Records a game and returns True if it decided the pairing
+		pairing.record(winner == pairing.algos[0])
+		if pairing.result is not None:
+			return False
+		llr = pairing.llr(self.elo_margin)
+		if llr >= self.upper:
+			pairing.result = pairing.algos[0]
+		elif llr <= self.lower:
+			pairing.result = pairing.algos[1]
+		elif pairing.games >= self.max_games:
+			pairing.result = "undecided"
+		else:
+			return False
+		return True
+
+	def ratings(self, iterations=200):
+		# Bradley-Terry strengths found with the MM algorithm, as Elo with a 95% confidence interval.
+		# Every pairing that has played counts as half a win each way more, so unbeaten algos get a finite rating.
+		strength = {algo: 1.0 for algo in self.algos}
+		wins = {algo: 0.0 for algo in self.algos}
+		games = {}
+		for pairing in self.pairings:
+			if pairing.games == 0:
+				continue
+			first, second = pairing.algos
+			wins[first] += pairing.wins + 0.5
+			wins[second] += pairing.losses + 0.5
+			games[first, second] = games[second, first] = pairing.games + 1
+		for _ in range(iterations):
+			for algo in self.algos:
+				total = sum(count / (strength[algo] + strength[other]) for (player, other), count in games.items() if player == algo)
+				if total > 0:
+					strength[algo] = wins[algo] / total
+			mean = math.exp(sum(math.log(value) for value in strength.values()) / len(strength))
+			strength = {algo: value / mean for algo, value in strength.items()}
+
+		ratings = []
+		for algo in self.algos:
+			information = sum(count * strength[algo] * strength[other] / (strength[algo] + strength[other]) ** 2 for (player, other), count in games.items() if player == algo)
+			error = ELO_SCALE / math.sqrt(information) if information > 0 else float('inf')
+			played = sum(pairing.games for pairing in self.pairings if algo in pairing.algos)
+			ratings.append((algo, ELO_SCALE * math.log(strength[algo]), 1.96 * error, played))
+		ratings.sort(key=lambda rating: -rating[1])
+		return ratings
+
+	def summary(self):
+		fill = max(len(algo) for algo in self.algos)
+		lines = ['{: <{fill}}   {: >7}   {: >7}   {: >5}'.format('Algo', 'Elo', '95% CI', 'Games', fill=fill)]
+		for algo, elo, error, games in self.ratings():
+			lines.append('{: <{fill}}   {: >7.0f}   {: >7}   {: >5}'.format(algo, elo, '+-{:.0f}'.format(error), games, fill=fill))
+		lines.append('')
+		for pairing in self.pairings:
+			lines.append('{} vs {}: {}-{}, {}'.format(pairing.algos[0], pairing.algos[1], pairing.wins, pairing.losses, pairing.result or 'stopped'))
+		return '\n'.join(lines)
+
+
+# Runs the tournament on batch_size worker processes, handing each freed worker the least decided pairing
+def run_tournament(tournament, batch_size, turns, progress=False):
+	algos_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir, 'algos')
+	finished = queue.Queue()
+	running = 0
+
+	with concurrent.futures.ProcessPoolExecutor(max_workers=batch_size) as executor:
+		def start_game():
+			pairing = tournament.next_pairing()
+			if pairing is None:
+				return False
+			(algo1, algo2), seed = pairing.next_game()
+			future = executor.submit(run_warm_match, os.path.abspath(os.path.join(algos_dir, algo1)), os.path.abspath(os.path.join(algos_dir, algo2)), turns, seed)
+			future.add_done_callback(lambda future: finished.put((pairing, (algo1, algo2), future)))
+			return True
+
+		while running < batch_size and start_game():
+			running += 1
+		while running > 0:
+			pairing, algos, future = finished.get()
+			running -= 1
+			if future.exception() is not None:
+				print ('Error with match - {} {}:\n\tError:\n{}'.format(algos[0], algos[1], future.exception()))
+				pairing.running -= 1
+				pairing.result = pairing.result or 'error'
+			else:
+				winner = algos[future.result()[2] - 1]
+				if tournament.record(pairing, winner):
+					print ('{} vs {} decided after {} games: {}'.format(pairing.algos[0], pairing.algos[1], pairing.games, pairing.result))
+					if progress:
+						print (tournament.summary())
+						print ()
+			while running < batch_size and start_game():
+				running += 1
+
+	print ()
+	print ('Finished the tournament!')
+	print ()
+	print (tournament.summary())
+
+
+if __name__ == '__main__':
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument('algos', nargs='+', help='names of folders in the algos directory\n\n')
+	ap.add_argument('-b', '--batch', type=int, default=5, help='number of games to run at a single time\n\n')
+	ap.add_argument('-g', '--games', type=int, default=200, help='the most games a pairing plays before it is called undecided\n\n')
+	ap.add_argument('-e', '--elo', type=float, default=50, help='the Elo margin the SPRT tests for\n\n')
+	ap.add_argument('-a', '--alpha', type=float, default=0.05, help='the chance of wrongly declaring the first algo of a pairing the winner\n\n')
+	ap.add_argument('-r', '--beta', type=float, default=0.05, help='the chance of wrongly declaring the second algo of a pairing the winner\n\n')
+	ap.add_argument('-s', '--seed', type=int, default=0, help='the seed of the first game\n\n')
+	ap.add_argument('-t', '--turns', type=int, default=100, help='the most turns in a game\n\n')
+	ap.add_argument('-p', '--progress', action='store_true', help='print the ratings every time a pairing is decided\n\n')
+	args = vars(ap.parse_args())
+
+	if len(args['algos']) < 2:
+		print ('At least two algos are needed')
+		sys.exit()
+	tournament = Tournament(args['algos'], args['games'], args['elo'], args['alpha'], args['beta'], args['seed'])
+	run_tournament(tournament, args['batch'], args['turns'], args['progress'])
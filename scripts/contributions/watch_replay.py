@@ -359,7 +359,7 @@ class Unit:
 			 self.unit_type == EMP or \
 			 self.unit_type == SCRAMBLER:
 				verts = GET_VERTS[self.unit_type](self.x, self.y)
-				polygon = Polygon(verts, True)
+				polygon = Polygon(verts, closed=True)
 
 				self.polygons.append(polygon)
 				self.patches.append(ax.add_patch(polygon))
@@ -400,7 +400,7 @@ class Unit:
 		if self.unit_type == ENCRYPTOR:
 			self.patches[1].set_alpha(0.3)
 
-		if self.stability > MAX_HP[self.unit_type]:
+		if self.stability > MAX_HP[self.unit_type] and len(self.patches) > 1:
 			self.patches[1].set_fill(False)
 			self.patches[1].set_alpha(0.5)
 
@@ -442,6 +442,22 @@ class Unit:
 		for polygon in self.polygons:
 			polygon.remove()
 
+	# hides the unit so its patches can be reused by a new unit of the same type and player
+	def hide(self):
+		for patch in self.patches:
+			patch.set_visible(False)
+
+	# turns a hidden unit into a new unit, moving its patches instead of creating new ones
+	def reuse(self, x, y, stability, ID, count, ax):
+		self.ID = ID
+		self.stability = stability
+		for patch in self.patches:
+			patch.set_visible(True)
+			if type(patch) == Wedge: patch.set_center((x, y))
+		self.x = x
+		self.y = y
+		self.update(x, y, stability, self.p_index, ID, count, ax)
+
 
 # holds all units (patches) and handles their creation/destruction on the board
 class PatchWrapper:
@@ -449,19 +465,25 @@ class PatchWrapper:
 		self.units = {}		# stores every unit currently on the board with each ID as the key
 		self.loc = {}		# stores the number of units at a location with each location tuple (x,y) as the key
 		self.lbls = []		# stores the text labels if a location has more than 1 unit
+		self.pool = {}		# hidden units that can be reused, with (unit type, player index) as the key
+		self.shown = None	# the Frame currently on the board
 
-	# creates a unit and stores it in self.units
+	# creates a unit and stores it in self.units, reusing a hidden one if there is one
 	def create_unit(self, unit_type, pos, stability, p_index, ID, count, ax):
 		x,y = pos
-		self.units[ID] = Unit(unit_type, x, y, stability, p_index, ID, count, ax)
+		pool = self.pool.get((unit_type, p_index))
+		if pool:
+			self.units[ID] = pool.pop()
+			self.units[ID].reuse(x, y, stability, ID, count, ax)
+		else:
+			self.units[ID] = Unit(unit_type, x, y, stability, p_index, ID, count, ax)
 
-	# removes a unit by ID from both the board and self.units
+	# removes a unit by ID from self.units and hides it for reuse
 	def remove_unit(self, ID):
-		for key, val in self.units.items():
-			if val == ID:
-				self.units[ID].remove()
-				self.units.pop(ID, None)
-				break
+		unit = self.units.pop(ID, None)
+		if unit is not None:
+			unit.hide()
+			self.pool.setdefault((unit.unit_type, unit.p_index), []).append(unit)
 
 	# clears the entire board - not used anymore (very inefficient mode of updating)
 	def clear_board(self):
@@ -469,8 +491,13 @@ class PatchWrapper:
 
 		for ID in self.units:
 			self.units[ID].remove()
+		for pool in self.pool.values():
+			for unit in pool:
+				unit.remove()
 		
 		self.units = {}
+		self.pool = {}
+		self.shown = None
 		self.remove_lbls()
 
 	# removes all number labels from the board and from self.lbls
@@ -479,45 +506,40 @@ class PatchWrapper:
 			lbl.remove()
 		self.lbls = []
 
-	# removes all previous labels and creates new ones at locations with more than one unit, then resets self.loc
-	def update_lbls(self, ax):
+	# removes all previous labels and creates new ones at locations with more than one unit
+	def update_lbls(self, counts, ax):
+		if counts == self.loc:
+			return
 		self.remove_lbls()
-		for pos, val in self.loc.items():
-			if val > 1:
-				self.plot_text(val, pos, ax)
-		self.loc = {}
-
-	# updates all units
-	def update_units(self, units, ax):
-		ids = [u[4] for u in units]
-
-		# get all units that are no longer on the board
-		# (you cannot use the engines remove since using the slider does not remove them)
-		remove = []
-		for unit in self.units.values():
-			if unit not in ids:
-				remove.append(unit.ID)
+		for pos, val in counts.items():
+			self.plot_text(val, pos, ax)
+		self.loc = counts
+
+	# shows a frame, only touching the units that changed if the previous frame is on the board
+	def show_frame(self, frame, ax):
+		units = frame.units
+		if frame is self.shown:
+			return
+		if frame.previous is not None and frame.previous is self.shown:
+			died, spawned, changed = frame.died, frame.spawned, frame.moved + frame.damaged
+		else:
+			# jumped with the slider or keyboard, compare against the whole frame
+			# (you cannot use the engines remove since using the slider does not remove them)
+			died = [ID for ID in self.units if ID not in units]
+			spawned = [ID for ID in units if ID not in self.units]
+			changed = [ID for ID in units if ID in self.units]
 
-		# remove all the units (cannot do it from the above loop - RuntimeError)
-		for ID in remove:
+		for ID in died:
 			self.remove_unit(ID)
+		for ID in changed:
+			unit_type, (x, y), stability, p_index, count = units[ID]
+			self.units[ID].update(x, y, stability, p_index, ID, count, ax)
+		for ID in spawned:
+			unit_type, (x, y), stability, p_index, count = units[ID]
+			self.create_unit(unit_type, (x, y), stability, p_index, ID, count, ax)
 
-		# loop through all the units given by the engine
-		for unit_raw in units:
-			unit_type, (x, y), stability, p_index, ID = unit_raw
-
-			# update the board locations count of units
-			try:
-				self.loc[(x,y)] += 1
-			except KeyError:
-				self.loc[(x,y)] = 1
-
-			# if a unit already exists, update it. If not, create it
-			try:
-				self.units[ID].update(x, y, stability, p_index, ID, self.loc[(x,y)], ax)
-			except KeyError:
-				self.create_unit(unit_type, (x,y), stability, p_index, ID, self.loc[(x,y)], ax)
-
+		self.update_lbls(frame.counts, ax)
+		self.shown = frame
 
 	# adds the count lable to a position on the board
 	def plot_text(self, txt, pos, ax):
@@ -676,7 +698,7 @@ class Plot:
 
 # this class contains all information regarding the entire window
 class Graph:
-	def __init__(self, data, frames_in_turn, healths, writers, keep_trying, save='', fh=None):
+	def __init__(self, data, frames_in_turn, healths, writers, keep_trying, save='', fh=None, headless=False):
 
 		# pretty clear, if no data, raise an Error
 		if len(data) < 1:
@@ -706,6 +728,12 @@ class Graph:
 
 		self.setup_board()															# initialize static parts of the board
 
+		# headless graphs are drawn one frame at a time with render() (see export_replays.py)
+		if headless:
+			if self.slider_exists:
+				self.slider.drawon = False		# otherwise every slider move draws the whole figure again
+			return
+
 		self.fig.canvas.mpl_connect('key_press_event', self.keyboard_input)			# connect keyboard events to the keyboard_input function
 
 		# if in real-time, use a generator function to update number of frames, otherwise frames is static
@@ -815,7 +843,7 @@ class Graph:
 					return False
 			return False
 
-	# extension of __init__(), called every frame when real-time
+	# extension of __init__(), called again when a real-time game ends
 	def general_init(self, data, frames_in_turn, healths):
 		self.data = data 													# dict with keys of (turn, frame) tuple and values of a Frame object
 		self.frames_in_turn = frames_in_turn								# dict with keys of turn and values of number of frames in that turn
@@ -999,18 +1027,20 @@ class Graph:
 	def data_stream(self):
 		while True:
 
-			# everything in this block (real-time) is extrememly inefficient, becuase it has to constantly load new data
+			# in real-time only the lines the engine added since the last call are read, and the
+			# frames, healths, etc. that are already shown are updated in place
 			if self.real_time:
-				self.info_ax.clear()															# clear the inforation side
-
-				self.fh.load_files(1,False,args['file']) 										# load latest replay (again)
-				replay = self.fh.get_last_replay()												# get latest replay (again)
+				replay = self.fh.get_last_replay()												# the replay being written
+				new_frames = replay.follow()													# read the new lines only
 
 				# user paused game, don't advance
 				if not self.is_manual:
 					self.advance()
 
-				self.general_init(replay.frames, replay.frames_in_turn, replay.healths)			# call general initialization
+				self.num_frames = len(self.data)
+				if new_frames > 0 and 'endStats' in self.data[max(self.data)].data:
+					self.info_ax.clear()														# clear the inforation side
+					self.general_init(replay.frames, replay.frames_in_turn, replay.healths)		# the game is over, show the slider and winner
 
 				# this is for the first call - cannot send before yield is reached (function called)
 				try:
@@ -1019,14 +1049,10 @@ class Graph:
 					pass
 
 			# get the data
-			p1Units = self.data[self.head]['p1Units']
-			p2Units = self.data[self.head]['p2Units']
 			p1Stats = self.data[self.head]['p1Stats']
 			p2Stats = self.data[self.head]['p2Stats']
 
-			units = self.cache_units(p1Units, 1) + self.cache_units(p2Units, 2)						# format the unit data into how it is passed to my functions
-			self.patches.update_units(units, self.board_ax)											# update all the units
-			self.patches.update_lbls(self.board_ax)													# update all the unit count labels
+			self.patches.show_frame(self.data[self.head], self.board_ax)							# update the units and unit count labels that changed
 
 			self.info.update(p1Stats, p2Stats)														# update the information board
 			self.plot.update(self.frame_turn_to_val(self.head[0], self.head[1]))					# update the health plot
@@ -1036,6 +1062,17 @@ class Graph:
 
 			yield self.patches.values() + self.patches.lbls + self.info.lbls + self.plot.lines		# send all dynamic data to the matplotlib animator
 
+	# draws the given (turn, frame) off screen and returns the image as raw RGBA bytes
+	def render(self, head):
+		self.head = head
+		next(self.stream)							# draws the head (and then moves it forward)
+		self.fig.canvas.draw()
+		return bytes(self.fig.canvas.buffer_rgba())
+
+	# the width and height in pixels of the images render() returns
+	def render_size(self):
+		return self.fig.canvas.get_width_height()
+
 	# called by the animator everytime it's interval finishes
 	def update(self, i=0):
 		# self.patches.clear_board()	# inefficient, no longer used
@@ -1051,19 +1088,6 @@ class Graph:
 			num = yield
 			yield num
 
-	# format all of the raw unit data into how my functions recieve it
-	def cache_units(self, units, p_index):
-		filters, encryptors, destructors, pings, emps, scramblers, removes, upgrades = units
-		units_new = []
-		for unit in filters: units_new.append((FILTER, (unit[0], unit[1]), unit[2], p_index, unit[3]))
-		for unit in encryptors: units_new.append((ENCRYPTOR, (unit[0], unit[1]), unit[2], p_index, unit[3]))
-		for unit in destructors: units_new.append((DESTRUCTOR, (unit[0], unit[1]), unit[2], p_index, unit[3]))
-		for unit in pings: units_new.append((PING, (unit[0], unit[1]), unit[2], p_index, unit[3]))
-		for unit in emps: units_new.append((EMP, (unit[0], unit[1]), unit[2], p_index, unit[3]))
-		for unit in scramblers: units_new.append((SCRAMBLER, (unit[0], unit[1]), unit[2], p_index, unit[3]))
-
-		return units_new
-
 	# checks if reached the final frame - if so, display winner
 	def check_end_of_game(self):
 		self.end_of_game = False
@@ -1127,12 +1151,48 @@ class Graph:
 		return grid
 
 
+# format all of the raw unit data into how my functions recieve it, keyed by ID
+def cache_units(units, p_index, units_new):
+	for unit_type, unit_list in enumerate(units[:SCRAMBLER+1]):
+		for unit in unit_list:
+			units_new[unit[3]] = (unit_type, (unit[0], unit[1]), unit[2], p_index)
+
 # a simple data storage class to hold the data for a single frame
+# the units on the board and how they changed since the previous frame are worked out once when the replay loads
 class Frame:
-	def __init__(self, t, f, data):
+	def __init__(self, t, f, data, previous=None):
 		self.turn = t 					# the turn for this frame
 		self.frame = f 					# the local frame for this frame
 		self.data = data 				# the data for this frame
+		self.previous = previous		# the Frame before this one in the replay
+
+		raw = {}
+		cache_units(data['p1Units'], 1, raw)
+		cache_units(data['p2Units'], 2, raw)
+
+		# units are numbered at each location so only the first shows its shield (count is 1)
+		self.units = {}					# every unit as (unit_type, (x, y), stability, p_index, count) with its ID as the key
+		self.counts = {}				# the number of units at every location with more than one unit
+		loc = {}
+		for ID, (unit_type, pos, stability, p_index) in raw.items():
+			loc[pos] = loc.get(pos, 0) + 1
+			self.units[ID] = (unit_type, pos, stability, p_index, loc[pos])
+		self.counts = {pos: val for pos, val in loc.items() if val > 1}
+
+		# diffs against the previous frame, by ID
+		self.spawned, self.moved, self.damaged, self.died = list(self.units), [], [], []
+		if previous is not None:
+			before = previous.units
+			self.spawned = [ID for ID in self.units if ID not in before]
+			self.died = [ID for ID in before if ID not in self.units]
+			for ID, unit in self.units.items():
+				old = before.get(ID)
+				if old is None or old == unit:
+					continue
+				if old[1] != unit[1] or old[4] != unit[4]:
+					self.moved.append(ID)
+				else:
+					self.damaged.append(ID)
 
 	def __repr__(self):
 		return ('({}, {})'.format(self.turn, self.frame))
@@ -1149,6 +1209,9 @@ class Replay:
 		self.frames = {}				# dict containing all data, keys are turn, frame tuple with Frame objects as values
 		self.frames_in_turn = {}		# number of frames in each turn
 		self.healths = ([], [])			# contains the healths for player1 and player2
+		self.offset = 0					# how far into the file has been read
+		self.partial = b''				# the start of a line the engine has not finished writing yet
+		self.last = None				# the last frame read, the next frame's diffs are against it
 
 		self.load_data()				# handles loading all the data from file into python variables
 
@@ -1163,30 +1226,44 @@ class Replay:
 
 	# loads all data from a replay into the python variables
 	def load_data(self):
-		with open(self.fname) as f:
-			i = 0
-			for line in f:
-				line = line.replace("\n", "")
-				line = line.replace("\t", "")
+		self.follow()
+
+	# reads only the lines added to the file since the last call, returns the number of new frames
+	# frames, frames_in_turn and healths are updated in place, so everything holding them sees the new data
+	def follow(self):
+		with open(self.fname, 'rb') as f:
+			f.seek(self.offset)
+			chunk = f.read()
+		self.offset += len(chunk)
+
+		lines = (self.partial + chunk).split(b'\n')
+		self.partial = lines.pop()		# empty unless the last line is still being written
+
+		new_frames = 0
+		for line in lines:
+			line = line.decode().replace("\t", "").strip()
+
+			if (line != ''):
+				data = json.loads(line)
+
+				try:
+					data['debug']
+					self.ref = data
+				except:
+					turn_num = data['turnInfo'][1]
+					frame_num = data['turnInfo'][2]
+					self.last = Frame(turn_num, frame_num, data, self.last)
+					self.frames[(turn_num, frame_num)] = self.last
 
-				if (line != ''):
-					data = json.loads(line)
+					self.healths[0].append(data['p1Stats'][0])
+					self.healths[1].append(data['p2Stats'][0])
 
 					try:
-						data['debug']
-						self.ref = data
-					except:
-						turn_num = data['turnInfo'][1]
-						frame_num = data['turnInfo'][2]
-						self.frames[(turn_num, frame_num)] = Frame(turn_num, frame_num, data)
-
-						self.healths[0].append(data['p1Stats'][0])
-						self.healths[1].append(data['p2Stats'][0])
-
-						try:
-							self.frames_in_turn[turn_num] += 1
-						except KeyError:
-							self.frames_in_turn[turn_num] = 1
+						self.frames_in_turn[turn_num] += 1
+					except KeyError:
+						self.frames_in_turn[turn_num] = 1
+					new_frames += 1
+		return new_frames
 
 # handles opening multiple games (replays)
 class FileHandler: